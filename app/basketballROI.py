@@ -8,7 +8,7 @@
     Flask web application
 ----------------------------------------------------------------------
     Created by Megan Schroeder
-    Last Modified 2014-09-01
+    Last Modified 2026-10-18
 ----------------------------------------------------------------------
 """
 
@@ -42,9 +42,10 @@ def search():
     with db:
         # Cursor to database
         cur = db.cursor()
-        # Demographics
-        cur.execute('SELECT Height, Weight, YearsPro, BirthDate, Team, PictureURL FROM NBA_Player_Demographics WHERE Player = "%s"' % player_name)
+        # Demographics (and player ID for the other tables)
+        cur.execute('SELECT Height, Weight, YearsPro, BirthDate, Team, PictureURL, PlayerID FROM NBA_Player_Demographics WHERE Player = %s', (player_name,))
         query_results = cur.fetchall()
+        player_id = int(query_results[0][6])
         height_inches = int(query_results[0][0])
         height = str(int(math.floor(height_inches/12.0)))+"'"+str(np.mod(height_inches, 12))+'"'
         weight = str(int(query_results[0][1]))
@@ -54,17 +55,17 @@ def search():
         picture_url = query_results[0][5]
         # Team Logo
         try:
-            cur.execute('SELECT ImageURL FROM NBA_Teams JOIN NBA_Player_Demographics AS Demo ON Demo.Team = CONCAT(NBA_Teams.City," ",NBA_Teams.Nickname) WHERE Demo.Player = "%s"' % player_name)
+            cur.execute('SELECT ImageURL FROM NBA_Teams JOIN NBA_Player_Demographics AS Demo ON Demo.Team = CONCAT(NBA_Teams.City," ",NBA_Teams.Nickname) WHERE Demo.PlayerID = %s', (player_id,))
             query_results = cur.fetchall()
             logo_url = query_results[0][0]
         except:
             logo_url = None
         # Injury Risk
-        cur.execute('SELECT Probability FROM Predict_InjuryRisk WHERE Player = "%s"' % player_name)
+        cur.execute('SELECT Probability FROM Predict_InjuryRisk WHERE PlayerID = %s', (player_id,))
         query_results = cur.fetchall()
         probability = str(query_results[0][0])+"%"
         # Similar Players
-        cur.execute('SELECT SimilarPlayers FROM Predict_SimilarPlayers WHERE Player = "%s"' % player_name)
+        cur.execute('SELECT SimilarPlayers FROM Predict_SimilarPlayers WHERE PlayerID = %s', (player_id,))
         query_results = cur.fetchall()
         similarplayers = query_results[0][0]
     # Render template
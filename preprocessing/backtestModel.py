@@ -0,0 +1,176 @@
+"""
+----------------------------------------------------------------------
+    backtestModel.py
+----------------------------------------------------------------------
+    Walk-forward backtest of the injury risk model: for each season,
+    select features (RFECV, as classifyData does) and train on the
+    seasons before it only, then score that season, so no fold sees
+    the future (unlike the random train/test split)
+
+    Seasons are scored in parallel. The feature matrix, labels and
+    seasons are written once as .npy files and every worker opens
+    them memory-mapped instead of being sent its own pickled copy.
+    Metrics and timings for each season go to the Backtest_InjuryRisk
+    table
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.externals.joblib import Parallel, delayed
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
+from storeData import readTable, writeTable, DATA_DIR
+from makePredictions import parallelJobs, selectFeatures
+
+
+# Columns of the model table that are not features
+ID_COLUMNS = ['PlayerID','Player','Season','MissedBin']
+# Working directory for the shared memory-mapped arrays
+MATRIX_DIR = os.path.join(DATA_DIR, 'matrices')
+# Columns of the results table
+RESULT_COLUMNS = ['Season','FirstTrainSeason','LastTrainSeason','TrainRows','TestRows','Features',
+                  'InjuryRate','Accuracy','Precision','Recall','AUC','Seconds']
+
+
+def modelArrays(tableName='BR_Player_Summary_BuildModel'):
+    """
+    Feature names, feature matrix, labels and seasons of a model table
+    """
+    data = readTable(tableName)
+    features = [col for col in data.columns if col not in ID_COLUMNS]
+    X = np.ascontiguousarray(data[features].values, dtype=np.float64)
+    y = data.MissedBin.values.astype(np.int8)
+    seasons = data.Season.values.astype(np.int16)
+    return features, X, y, seasons
+
+"""----------------------------------------------------------------"""
+def saveArrays(directory, **arrays):
+    """
+    Write arrays as .npy files in directory; returns {name: path}
+    """
+    paths = {}
+    for name, values in arrays.items():
+        paths[name] = os.path.join(directory, name + '.npy')
+        np.save(paths[name], values)
+    return paths
+
+"""----------------------------------------------------------------"""
+def backtestSeason(paths, season, trainSeasons=None):
+    """
+    Select features and train on the seasons before season (the last
+    trainSeasons of them, or all if None) and score season; returns a
+    row of RESULT_COLUMNS
+    paths - .npy files of X, y and seasons (opened memory-mapped)
+    """
+    start = time.time()
+    X = np.load(paths['X'], mmap_mode='r')
+    y = np.load(paths['y'], mmap_mode='r')
+    seasons = np.load(paths['seasons'], mmap_mode='r')
+    # Rows of the training seasons and the scored season
+    train = seasons < season
+    if trainSeasons is not None:
+        train &= seasons >= season - trainSeasons
+    test = seasons == season
+    # Feature selection on the training seasons only (seasons already
+    # run in parallel, so the folds run in this process)
+    XTrain = np.asarray(X[train])
+    yTrain = np.asarray(y[train])
+    support, _ = selectFeatures(pd.DataFrame(XTrain), yTrain, nJobs=1, cachePath=None)
+    logreg = LogisticRegression()
+    logreg.fit(XTrain[:, support], yTrain)
+    probability = logreg.predict_proba(np.asarray(X[test])[:, support])[:,1]
+    predicted = (probability >= 0.5).astype(np.int8)
+    yTest = np.asarray(y[test])
+    # Precision is undefined without predicted injuries, AUC without
+    # both classes in the scored season
+    precision = precision_score(yTest, predicted) if predicted.any() else np.nan
+    auc = roc_auc_score(yTest, probability) if len(np.unique(yTest)) == 2 else np.nan
+    return [season, int(seasons[train].min()), int(seasons[train].max()), int(train.sum()), int(test.sum()),
+            int(support.sum()), float(yTest.mean()), accuracy_score(yTest, predicted), precision,
+            recall_score(yTest, predicted), auc, time.time() - start]
+
+"""----------------------------------------------------------------"""
+def runBacktest(X, y, seasons, testSeasons=None, trainSeasons=None, minTrainSeasons=1, nJobs=-1,
+                directory=MATRIX_DIR):
+    """
+    Walk-forward backtest on arrays; returns a dataframe of
+    RESULT_COLUMNS (one row per scored season)
+    testSeasons     - seasons to score (all with enough earlier seasons
+                      if None)
+    trainSeasons    - number of earlier seasons to train on (all if None)
+    minTrainSeasons - fewest earlier seasons needed to score a season
+    nJobs           - number of processes (-1 for one per CPU)
+    directory       - where the shared .npy files are written (removed
+                      afterwards)
+    """
+    allSeasons = sorted(set(int(season) for season in seasons))
+    if testSeasons is None:
+        testSeasons = allSeasons
+    # ----------------
+    def earlierSeasons(season):
+        return [s for s in allSeasons if s < season and (trainSeasons is None or s >= season - trainSeasons)]
+    # ----------------
+    testSeasons = [season for season in testSeasons if season in allSeasons and
+                   len(earlierSeasons(season)) >= max(minTrainSeasons, 1)]
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    workDir = tempfile.mkdtemp(prefix='Backtest_', dir=directory)
+    try:
+        paths = saveArrays(workDir, X=X, y=y, seasons=seasons)
+        nJobs = parallelJobs(nJobs, 'runBacktest')
+        rows = Parallel(n_jobs=nJobs)(delayed(backtestSeason)(paths, season, trainSeasons)
+                                      for season in testSeasons)
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+"""----------------------------------------------------------------"""
+def backtestModel(firstSeason=None, lastSeason=None, trainSeasons=None, nJobs=-1,
+                  tableName='BR_Player_Summary_BuildModel'):
+    """
+    Walk-forward backtest of the model data over a range of seasons
+    (all if None); writes the Backtest_InjuryRisk table
+    """
+    features, X, y, seasons = modelArrays(tableName)
+    testSeasons = [int(season) for season in np.unique(seasons)
+                   if (firstSeason is None or season >= firstSeason) and
+                      (lastSeason is None or season <= lastSeason)]
+    start = time.time()
+    df = runBacktest(X, y, seasons, testSeasons, trainSeasons, nJobs=nJobs)
+    print 'Walk-forward backtest (' + str(len(features)) + ' features)'
+    print df.to_string(index=False)
+    print 'Wall time: ' + str(round(time.time() - start, 1)) + ' s'
+    print 'Sum of season times: ' + str(round(df.Seconds.sum(), 1)) + ' s'
+    writeTable(df, 'Backtest_InjuryRisk')
+    return df
+
+"""----------------------------------------------------------------"""
+def main():
+    """
+    Main function for running
+    (--first=YYYY and --last=YYYY limit the scored seasons,
+     --window=N trains on the last N seasons only, --workers=N sets
+     the number of processes)
+    """
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    toInt = lambda name: int(options[name]) if name in options else None
+    backtestModel(firstSeason=toInt('first'), lastSeason=toInt('last'), trainSeasons=toInt('window'),
+                  nJobs=toInt('workers') or -1)
+
+
+"""*******************************************************************
+*                                                                    *
+*                   Script Execution                                 *
+*                                                                    *
+*******************************************************************"""
+if __name__ == '__main__':
+    main()
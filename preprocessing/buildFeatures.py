@@ -0,0 +1,115 @@
+"""
+----------------------------------------------------------------------
+    buildFeatures.py
+----------------------------------------------------------------------
+    Workload features from the regular season game logs: minutes
+    played over the last 7/14/30 days, back-to-backs and games in 5
+    nights, summarized per player and season for the injury model
+
+    Rolling windows are computed for all players at once: game logs
+    are sorted by (player, date) and each game is given the key
+    PlayerID*KEY_SPAN + day number, so a window's first game is found
+    with one searchsorted over the whole log and window sums are
+    differences of a cumulative sum
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import numpy as np
+import pandas as pd
+from storeData import readTable, writeTable
+
+
+# Days spanned by a single player's keys (more than the days from
+# 1970 to any game date, so windows never reach another player)
+KEY_SPAN = 100000
+# Rolling windows (days, today included) for minutes played
+MINUTE_WINDOWS = [7, 14, 30]
+
+
+def gameKeys(playerIDs, dates):
+    """
+    Sort keys for games: PlayerID*KEY_SPAN + days since 1970
+    """
+    days = dates.astype('datetime64[D]').astype(np.int64)
+    return playerIDs.astype(np.int64)*KEY_SPAN + days
+
+"""----------------------------------------------------------------"""
+def windowSums(keys, values, days):
+    """
+    Sum of values over each game's last `days` days (today included)
+    for the same player; keys must be sorted
+    """
+    cumulative = np.concatenate([[0], np.cumsum(values)])
+    start = np.searchsorted(keys, keys - (days - 1), side='left')
+    return cumulative[1:] - cumulative[start]
+
+"""----------------------------------------------------------------"""
+def rollingWorkload(df_gl):
+    """
+    Workload at each game a player played: minutes over the last
+    7/14/30 days, whether it was the second night of a back-to-back
+    and games played in the last 5 nights
+    df_gl - game logs with PlayerID, Year, Date, G and MP (G is missing
+            for games the player did not play)
+    """
+    # Games played, in (player, date) order
+    df = df_gl.ix[df_gl.G.notnull(), ['PlayerID','Year','Date','MP']]
+    df = df.sort(columns=['PlayerID','Date']).reset_index(drop=True)
+    keys = gameKeys(df.PlayerID.values, df.Date.values)
+    minutes = np.nan_to_num(df.MP.values.astype(np.float64))
+    # Minutes over rolling windows
+    for days in MINUTE_WINDOWS:
+        df['Minutes' + str(days) + 'd'] = windowSums(keys, minutes, days).astype(np.float32)
+    # Back-to-back: previous game played the day before
+    df['BackToBack'] = np.concatenate([[False], np.diff(keys) == 1])
+    # Games in 5 nights (this one included)
+    df['Games5Nights'] = windowSums(keys, np.ones(len(df)), 5).astype(np.int8)
+    return df
+
+"""----------------------------------------------------------------"""
+def seasonWorkload(df_games):
+    """
+    Summarize game workload per player and season (one grouped pass)
+    """
+    df_games = df_games.copy()
+    df_games['FourInFive'] = df_games.Games5Nights >= 4
+    aggs = {'BackToBack':'sum', 'FourInFive':'sum', 'Games5Nights':'max'}
+    for days in MINUTE_WINDOWS:
+        aggs['Minutes' + str(days) + 'd'] = ['mean', 'max']
+    df = df_games.groupby(['PlayerID','Year']).agg(aggs)
+    # Flatten column names (e.g. Minutes7d/max -> MaxMinutes7d)
+    names = {'sum':'', 'max':'Max', 'mean':'Mean'}
+    df.columns = [names[stat] + col for col, stat in df.columns]
+    df = df.rename(columns = {'BackToBack':'BackToBacks', 'FourInFive':'FourInFives'})
+    df = df.reset_index().rename(columns = {'Year':'Season'})
+    columns = ['PlayerID','Season'] + sorted(col for col in df.columns if col not in ['PlayerID','Season'])
+    return df[columns]
+
+"""----------------------------------------------------------------"""
+def buildWorkload_BR():
+    """
+    Compute workload features from the cleaned game logs and write the
+    BR_Player_Workload table (one row per player and season)
+    """
+    df_gl = readTable('BR_Player_GameLogs_RegularSeason', columns=['PlayerID','Year','Date','G','MP'])
+    workload = seasonWorkload(rollingWorkload(df_gl))
+    writeTable(workload, 'BR_Player_Workload')
+
+"""----------------------------------------------------------------"""
+def main():
+    """
+    Main function for running
+    """
+    buildWorkload_BR()
+
+
+"""*******************************************************************
+*                                                                    *
+*                   Script Execution                                 *
+*                                                                    *
+*******************************************************************"""
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+----------------------------------------------------------------------
+    checkpointData.py
+----------------------------------------------------------------------
+    Keeps track of finished scraping work so an interrupted run can
+    pick up where it stopped; streams scraped rows to disk
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+
+class ProgressManifest:
+    """
+    A class to record finished units of work (e.g. one game log URL
+    for a player and year); rows they produce are written to the
+    RecordSink from sink() before the unit is marked done
+    """
+
+    def __init__(self, name, directory='../../data/checkpoints'):
+        """
+        name      - name of the scraping job (e.g. 'BR_Player_GameLogs')
+        directory - location of the manifest and partial results
+        """
+        self.directory = os.path.join(directory, name)
+        self.manifestPath = os.path.join(self.directory, 'manifest.txt')
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        # Keys finished by a previous (interrupted) run
+        self.done = set()
+        if os.path.exists(self.manifestPath):
+            with open(self.manifestPath) as f:
+                self.done = set(line.rstrip('\n').decode('utf-8') for line in f if line.strip())
+            print 'Resuming ' + name + ': ' + str(len(self.done)) + ' items already done'
+
+    """------------------------------------------------------------"""
+    def isDone(self, key):
+        """
+        Check whether a unit of work has already been finished
+        """
+        return key in self.done
+
+    """------------------------------------------------------------"""
+    def pending(self, keys):
+        """
+        Boolean list; True for keys that still need to be processed
+        """
+        return [key not in self.done for key in keys]
+
+    """------------------------------------------------------------"""
+    def markDone(self, key):
+        """
+        Record a finished unit of work (write results first)
+        """
+        with open(self.manifestPath, 'a') as f:
+            f.write(unicode(key).encode('utf-8') + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.add(key)
+
+    """------------------------------------------------------------"""
+    def sink(self, table, partitionBy):
+        """
+        RecordSink for a table's results, kept with the manifest
+        """
+        return RecordSink(os.path.join(self.directory, table), partitionBy)
+
+    """------------------------------------------------------------"""
+    def clear(self):
+        """
+        Remove the manifest and partial results (after a finished run)
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.done = set()
+
+
+"""----------------------------------------------------------------"""
+def widenCSV(path, header, chunksize=100000):
+    """
+    Rewrite a CSV file with a wider header (new columns left empty),
+    reading it in chunks
+    """
+    tempPath = path + '.tmp'
+    if os.path.exists(tempPath):
+        os.remove(tempPath)
+    first = True
+    for chunk in pd.read_csv(path, dtype=object, encoding='utf-8', chunksize=chunksize):
+        chunk.reindex(columns=header).to_csv(tempPath, mode='a', header=first, index=False, encoding='utf-8')
+        first = False
+    if first:
+        pd.DataFrame(columns=header).to_csv(tempPath, index=False, encoding='utf-8')
+    os.rename(tempPath, path)
+
+"""----------------------------------------------------------------"""
+def appendCSV(df, path):
+    """
+    Append rows to a CSV file (creating it with a header if needed);
+    columns are aligned with those already in the file, and columns
+    the file does not have yet are added to it (empty for earlier rows)
+    """
+    if os.path.exists(path):
+        with open(path) as f:
+            header = pd.read_csv(f, nrows=0).columns.tolist()
+        extra = [col for col in df.columns if col not in header]
+        if extra:
+            header = header + extra
+            widenCSV(path, header)
+        df.reindex(columns=header).to_csv(path, mode='a', header=False, index=False, encoding='utf-8')
+    else:
+        df.to_csv(path, index=False, encoding='utf-8')
+
+
+class RecordSink:
+    """
+    A class to stream rows to CSV files partitioned by a column (one
+    file per season), so scraped rows never pile up in memory
+    """
+
+    def __init__(self, directory, partitionBy):
+        """
+        directory   - location of the partition files
+        partitionBy - column used to split rows into files (e.g. 'Year')
+        """
+        self.directory = directory
+        self.partitionBy = partitionBy
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    """------------------------------------------------------------"""
+    def partitionPath(self, value):
+        """
+        Path to the file holding rows with the given partition value
+        """
+        return os.path.join(self.directory, self.partitionBy + '=' + unicode(value) + '.csv')
+
+    """------------------------------------------------------------"""
+    def append(self, df):
+        """
+        Append rows to their partition files
+        """
+        if df is None or len(df) == 0:
+            return
+        for value, group in df.groupby(self.partitionBy):
+            appendCSV(group, self.partitionPath(value))
+
+    """------------------------------------------------------------"""
+    def iterPartitions(self, **kwargs):
+        """
+        Read partitions one at a time (in order of partition value);
+        rows written twice because of a crash between append and
+        ProgressManifest.markDone are dropped
+        """
+        fileNames = sorted(f for f in os.listdir(self.directory) if f.endswith('.csv'))
+        for fileName in fileNames:
+            df = pd.read_csv(os.path.join(self.directory, fileName), encoding='utf-8', **kwargs)
+            yield df.drop_duplicates()
+
+    """------------------------------------------------------------"""
+    def assemble(self, path, transform=None, **kwargs):
+        """
+        Write all partitions to a single CSV file, holding only one
+        partition in memory at a time; transform (optional) is applied
+        to each partition before writing. The header is the union of
+        all partitions' columns (see appendCSV), so columns missing
+        from earlier partitions are kept. The file is written next to
+        path and only replaces it when there are partitions, so an
+        existing file is left alone when nothing was scraped. Returns
+        the number of rows
+        """
+        tempPath = path + '.tmp'
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        nRows = 0
+        written = False
+        for df in self.iterPartitions(**kwargs):
+            if transform is not None:
+                df = transform(df)
+            appendCSV(df, tempPath)
+            nRows += len(df)
+            written = True
+        if written:
+            os.rename(tempPath, path)
+        return nRows
+
+"""----------------------------------------------------------------"""
+def replaceRows(path, newPath, keyColumns, chunksize=100000):
+    """
+    Merge the rows in newPath into the CSV file at path: existing rows
+    whose key columns match a row in newPath are dropped and all rows
+    of newPath are added. Both files are read in chunks; newPath is
+    removed afterwards
+    """
+    if not os.path.exists(newPath):
+        return
+    if not os.path.exists(path):
+        os.rename(newPath, path)
+        return
+    # Keys being replaced (compared as text so formatting is kept)
+    newKeys = pd.read_csv(newPath, usecols=keyColumns, dtype=object, encoding='utf-8')
+    newKeys = set(tuple(row) for row in newKeys[keyColumns].values)
+    tempPath = path + '.tmp'
+    if os.path.exists(tempPath):
+        os.remove(tempPath)
+    for chunk in pd.read_csv(path, dtype=object, encoding='utf-8', chunksize=chunksize):
+        keep = np.array([tuple(row) not in newKeys for row in chunk[keyColumns].values], dtype=bool)
+        if keep.any():
+            appendCSV(chunk[keep], tempPath)
+    for chunk in pd.read_csv(newPath, dtype=object, encoding='utf-8', chunksize=chunksize):
+        appendCSV(chunk, tempPath)
+    os.rename(tempPath, path)
+    os.remove(newPath)
@@ -2,25 +2,31 @@
 ----------------------------------------------------------------------
     cleanData.py
 ----------------------------------------------------------------------
-    Cleans raw data scraped from the web and stores in new csv files
+    Cleans raw data scraped from the web and stores in new tables
 ----------------------------------------------------------------------
     Created by Megan Schroeder
-    Last Modified 2014-08-08
+    Last Modified 2026-10-18
 ----------------------------------------------------------------------
 """
 
 
-import re
 import numpy as np
 import pandas as pd
+from storeData import readTable, writeTable, iterTable, appendTable, removeTable, tableColumns
+from storeData import memoryUsage, printMemory
+from playerRegistry import PlayerRegistry
+
+
+# Raw game log columns that are never used (not read in streaming mode)
+UNUSED_GAMELOG_COLUMNS = ['FG%', '3P%', 'FT%', 'GmSc', '+/-']
 
 
 def cleanDemographics_NBA():
     """
     Clean NBA demographics
     """
-    # Read NBA demographics CSV
-    demo_df = pd.read_csv('../../data/NBA_Player_Demographics__RAW.csv', parse_dates=['BirthDate'])
+    # Read NBA demographics
+    demo_df = readTable('NBA_Player_Demographics__RAW')
     # This dataframe has 'Player' sorted by first name
     # Drop rows with missing data
     demo_df = demo_df.dropna()
@@ -31,48 +37,98 @@ def cleanDemographics_NBA():
     ##      http://stats.nba.com/player/#!/{stats_url}/
     demo_df['StatsURL'] = demo_df['StatsURL'].map(lambda x: x.split('#!')[1][1:-1])
     # -------
-    # Read NBA player link CSV
-    link_df = pd.read_csv('../../data/NBA_Player_ProfileLinks__RAW.csv')
+    # Read NBA player links
+    link_df = readTable('NBA_Player_ProfileLinks__RAW')
     # Only keep the target for the profile URL
     ##      http://www.nba.com/playerfile/
     link_df['ProfileURL'] = link_df['ProfileURL'].map(lambda x: x.split('playerfile/')[1])
     # This dataframe has 'Player' sorted by last name (**preferred**)
     # -------
-    # Merge dataframes
-    df = pd.merge(link_df, demo_df, on='Player')
-    # Write CSV
-    df.to_csv('../../data/NBA_Player_Demographics.csv', index=False, date_format='%Y-%m-%d')
+    # Merge dataframes (on player IDs)
+    registry = PlayerRegistry()
+    link_df = registry.addIDs(link_df)
+    demo_df = registry.addIDs(demo_df, keepName=False)
+    df = pd.merge(link_df, demo_df, on='PlayerID')
+    # Write table
+    writeTable(df, 'NBA_Player_Demographics')
 
 """----------------------------------------------------------------"""
-def cleanGameLogs_BR():
+def transformGameLogs_BR(df):
     """
-    Clean game log file; separate regular season
+    Convert raw game log columns to numbers/booleans and keep the
+    regular season (column operations only, no per-row Python)
     """
-    df = pd.read_csv('../../data/BR_Player_GameLogs__RAW.csv', parse_dates=['Date'])
-    # Minutes played
-    df['MP'].fillna('999:0', inplace=True)
-    df['MP'] = df['MP'].map(lambda x: np.round(np.float(int(x.split(':')[0]) + np.float(x.split(':')[1])/60.0), decimals=2))
-    df.MP[df.MP == 999] = np.nan
-    # Age
-    df['Age'] = df['Age'].map(lambda x: np.round(np.float(int(x.split('-')[0]) + np.float(x.split('-')[1])/365.0), decimals=3))
+    # Minutes played (e.g. 34:30 -> 34.5)
+    mp = df['MP'].str.extract('^(\d+):(\d+)$', expand=True)
+    df['MP'] = np.round(mp[0].astype(float) + mp[1].astype(float)/60.0, decimals=2)
+    # Age (e.g. 25-123 -> 25.337)
+    age = df['Age'].str.extract('^(\d+)-(\d+)$', expand=True)
+    df['Age'] = np.round(age[0].astype(float) + age[1].astype(float)/365.0, decimals=3)
     # Update HomeAway to Bool
-    df.insert(10, u'Home', True)
-    df.Home[df.HomeAway == u'Away'] = False
-    # Update WinLoss to Bool and points
-    df.insert(12, u'Win', True)
-    df.Win = df.WinLoss.map(lambda x: re.findall('^([WL])', x)[0])
-    df.Win[df.Win == u'W'] = True
-    df.Win[df.Win == u'L'] = False
-    df.Win = df.Win.astype(np.bool)
-    df.insert(13, u'PtDif', 0)
-    df.PtDif = df.WinLoss.map(lambda x: np.int(re.findall('[+-]\d+', x)[0]))
-    # Delete columns
-    df = df.drop(['HomeAway', 'WinLoss', 'FG%', '3P%', 'FT%', 'GmSc', '+/-'], axis=1)
+    df.insert(10, u'Home', (df.HomeAway != u'Away').values)
+    # Update WinLoss to Bool and points (e.g. W (+12))
+    df.insert(12, u'Win', (df.WinLoss.str.extract('^([WL])', expand=False) == u'W').values)
+    df.insert(13, u'PtDif', df.WinLoss.str.extract('([+-]\d+)', expand=False).astype(int).values)
+    # Delete columns (unused ones may not have been read at all)
+    dropCols = ['HomeAway', 'WinLoss'] + [col for col in UNUSED_GAMELOG_COLUMNS if col in df.columns]
+    df = df.drop(dropCols, axis=1)
     # Separate regular season from playoffs
     reg_df = df[df.Season == u'Regular']
     reg_df = reg_df.drop('Season', axis=1)
-    # Write to CSV
-    reg_df.to_csv('../../data/BR_Player_GameLogs_RegularSeason.csv', index=False, date_format='%Y-%m-%d')
+    return reg_df
+
+"""----------------------------------------------------------------"""
+def cleanGameLogs_BR(chunksize=100000):
+    """
+    Clean game log file; separate regular season
+    chunksize - rows of the raw file processed at a time (None to read
+                the whole file at once); only the regular season rows
+                and needed columns are kept as each chunk is read and
+                cleaned chunks are written straight out, so memory use
+                does not grow with the size of the raw file
+    """
+    # Game logs are stored with player IDs instead of names
+    registry = PlayerRegistry()
+    if chunksize is None:
+        df = readTable('BR_Player_GameLogs__RAW')
+        reg_df = registry.addIDs(transformGameLogs_BR(df), keepName=False)
+        printMemory('Game logs', *memoryUsage(reg_df, 'BR_Player_GameLogs_RegularSeason'))
+        # Write table (split by year)
+        writeTable(reg_df, 'BR_Player_GameLogs_RegularSeason')
+        return
+    # Skip unused columns and playoff rows while reading
+    columns = [col for col in tableColumns('BR_Player_GameLogs__RAW') if col not in UNUSED_GAMELOG_COLUMNS]
+    chunks = iterTable('BR_Player_GameLogs__RAW', columns=columns,
+                       filters=[('Season', '=', u'Regular')], chunksize=chunksize)
+    # Write cleaned chunks as they are done (split by year)
+    removeTable('BR_Player_GameLogs_RegularSeason')
+    nRows = 0
+    default = compact = 0
+    for df in chunks:
+        reg_df = registry.addIDs(transformGameLogs_BR(df), keepName=False)
+        # Memory with default and compact types (summed over chunks)
+        chunkDefault, chunkCompact = memoryUsage(reg_df, 'BR_Player_GameLogs_RegularSeason')
+        default += chunkDefault
+        compact += chunkCompact
+        appendTable(reg_df, 'BR_Player_GameLogs_RegularSeason')
+        nRows += len(reg_df)
+    print 'Cleaned ' + str(nRows) + ' regular season game logs'
+    printMemory('Game logs', default, compact)
+
+"""----------------------------------------------------------------"""
+def dropTradedDuplicates(df, keys=['Player','Season']):
+    """
+    For players who switched teams during a season, keep only the
+    season total (Tm == TOT) and drop the per-team rows
+    keys - columns identifying a player season
+    """
+    isTot = df['Tm'].str.contains('TOT', na=False).values
+    # Player seasons that have a TOT row
+    totKeys = df.ix[isTot, keys].drop_duplicates()
+    totKeys['HasTOT'] = True
+    hasTot = pd.merge(df[keys], totKeys, on=keys, how='left')['HasTOT']
+    hasTot = hasTot.fillna(False).values.astype(bool)
+    return df[~(hasTot & ~isTot)]
 
 """----------------------------------------------------------------"""
 def cleanStatsSummary_BR(csvName):
@@ -80,8 +136,8 @@ def cleanStatsSummary_BR(csvName):
     Clean Basketball-Reference data
     """
     # Manually fill in missing Position information first
-    # Read CSV
-    df = pd.read_csv('../../data/' + csvName + '__RAW.csv')
+    # Read raw table
+    df = readTable(csvName + '__RAW')
     # Use convention to name season by the year it ends
     # (e.g., 2013-14 season is named 2014)
     df['Season'] = df['Season'].map(lambda x: int(x[:4])+1)
@@ -92,20 +148,17 @@ def cleanStatsSummary_BR(csvName):
     df['Pos'] = df['Pos'].map(lambda x: posDict[str(x).split('-')[0]])
     # Get rid of league (assume NBA)
     df = df.drop('Lg', axis=1)
+    # Player IDs
+    registry = PlayerRegistry()
+    df = registry.addIDs(df)
     # Clean up instances where player switches teams during a season;
     # Only keep the totals
-    playerSeasonInd = df.ix[df['Tm'].str.contains('TOT'), ['Player','Season']]
-    for indx in playerSeasonInd.index[::-1]:
-        dropPlayer = playerSeasonInd.ix[indx, 'Player']
-        dropSeason = playerSeasonInd.ix[indx, 'Season']
-        # Check for up to three teams in one season
-        for i in range(3,0,-1):
-            if df.ix[indx+i, 'Player'] == dropPlayer and df.ix[indx+i, 'Season'] == dropSeason:
-                df = df.drop(indx+i)
+    df = dropTradedDuplicates(df, keys=['PlayerID','Season'])
     # Drop seasons prior to 2010
     df = df[df.Season >= 2010]
-    # Write CSV
-    df.to_csv('../../data/' + csvName + '.csv', index=False)
+    printMemory(csvName, *memoryUsage(df, csvName))
+    # Write table (split by season)
+    writeTable(df, csvName)
 
 """----------------------------------------------------------------"""
 def main():
@@ -116,7 +169,6 @@ def main():
     cleanGameLogs_BR()
     cleanStatsSummary_BR('BR_Player_StatsSummary_RegularSeason_Total')
     cleanStatsSummary_BR('BR_Player_StatsSummary_RegularSeason_PerGame')
-    getSeasonSummary_BR()
 
 
 """*******************************************************************
@@ -0,0 +1,204 @@
+"""
+----------------------------------------------------------------------
+    clusterTracking.py
+----------------------------------------------------------------------
+    Clusters player-seasons from every SportVU tracking table we hold
+    (NBA_Player_SportVU_RegularSeason_<year>) without loading them all
+
+    Tables are streamed in chunks: one pass collects the means and
+    standard deviations used to standardize features, then
+    MiniBatchKMeans is fit one chunk at a time (partial_fit), so memory
+    depends on the chunk size and not on the number of seasons. The
+    fitted model is saved and new rows are assigned to its clusters
+    without refitting
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import cPickle as pickle
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from storeData import appendTable, removeTable, DATA_DIR
+from loadTracking import SPORTVU_FEATURES, trackingTables, iterTracking
+from playerRegistry import PlayerRegistry
+
+
+# Saved clusters
+MODEL_PATH = os.path.join(DATA_DIR, 'models', 'SportVUClusters.pkl')
+
+
+def trackingChunks(chunksize=5000, tables=None):
+    """
+    Stream the SportVU tables in chunks; yields (season, dataframe
+    with Player and the float32 SPORTVU_FEATURES columns)
+    tables - list of (name, season) (all stored tables if None)
+    """
+    for name, season in (tables if tables is not None else trackingTables()):
+        for df in iterTracking(name, chunksize=chunksize):
+            yield season, df
+
+
+class StreamingClusters:
+    """
+    A class to fit KMeans clusters to data seen one chunk at a time:
+    feature means and standard deviations are accumulated first
+    (updateScale), then MiniBatchKMeans is updated with each
+    standardized chunk (partialFit)
+    """
+
+    def __init__(self, k=18, batchSize=1000, seed=0):
+        """
+        k         - number of clusters
+        batchSize - mini-batch size
+        seed      - random seed
+        """
+        self.k = k
+        self.model = MiniBatchKMeans(n_clusters=k, batch_size=batchSize, random_state=seed)
+        # Running totals for standardization
+        self.count = 0
+        self.total = None
+        self.totalSquares = None
+        # Rows held back until there are enough for the first update
+        self.pending = None
+        self.fitted = False
+
+    """------------------------------------------------------------"""
+    def updateScale(self, data):
+        """
+        Add a chunk to the running totals used to standardize
+        """
+        data = np.asarray(data, dtype=np.float64)
+        if self.total is None:
+            self.total = np.zeros(data.shape[1])
+            self.totalSquares = np.zeros(data.shape[1])
+        self.count += len(data)
+        self.total += data.sum(axis=0)
+        self.totalSquares += (data**2).sum(axis=0)
+
+    """------------------------------------------------------------"""
+    def scale(self):
+        """
+        Feature means and standard deviations of all rows seen by
+        updateScale
+        """
+        mean = self.total/self.count
+        std = np.sqrt(np.maximum(self.totalSquares/self.count - mean**2, 0))
+        std[std == 0] = 1.0
+        return mean, std
+
+    """------------------------------------------------------------"""
+    def finishScale(self):
+        """
+        Fix the standardization (call after the last updateScale)
+        """
+        self.mean, self.std = self.scale()
+
+    """------------------------------------------------------------"""
+    def standardize(self, data):
+        """
+        Standardize rows with the accumulated mean and standard deviation
+        """
+        return (np.asarray(data, dtype=np.float64) - self.mean)/self.std
+
+    """------------------------------------------------------------"""
+    def partialFit(self, data):
+        """
+        Update the clusters with a chunk of (not standardized) rows; the
+        first update waits until at least k rows have been given
+        """
+        data = self.standardize(data)
+        if not self.fitted:
+            if self.pending is not None:
+                data = np.vstack([self.pending, data])
+            if len(data) < self.k:
+                self.pending = data
+                return
+            self.pending = None
+            self.fitted = True
+        self.model.partial_fit(data)
+
+    """------------------------------------------------------------"""
+    def predict(self, data):
+        """
+        Nearest cluster for each (not standardized) row
+        """
+        return self.model.predict(self.standardize(data))
+
+    """------------------------------------------------------------"""
+    def save(self, path=MODEL_PATH):
+        """
+        Write the fitted clusters to a file
+        """
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+"""----------------------------------------------------------------"""
+def loadClusters(path=MODEL_PATH):
+    """
+    Read saved StreamingClusters
+    """
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+"""----------------------------------------------------------------"""
+def fitStreaming(k=18, chunksize=5000, epochs=3, tables=None):
+    """
+    Fit StreamingClusters over all SportVU tables, one chunk at a time
+    (one pass for standardization, then epochs passes of updates)
+    """
+    clusters = StreamingClusters(k)
+    for season, df in trackingChunks(chunksize, tables):
+        clusters.updateScale(df[SPORTVU_FEATURES].values)
+    if clusters.count < k:
+        raise ValueError('Fewer tracking rows (' + str(clusters.count) + ') than clusters')
+    clusters.finishScale()
+    for _ in range(epochs):
+        for season, df in trackingChunks(chunksize, tables):
+            clusters.partialFit(df[SPORTVU_FEATURES].values)
+    return clusters
+
+"""----------------------------------------------------------------"""
+def assignClusters(clusters, chunksize=5000, tables=None, tableName='Predict_SeasonClusters'):
+    """
+    Label every player-season with its nearest cluster (no refitting)
+    and write the labels table chunk by chunk
+    """
+    registry = PlayerRegistry()
+    removeTable(tableName)
+    for season, df in trackingChunks(chunksize, tables):
+        labels = pd.DataFrame({'PlayerID':registry.ids(df.Player.values), 'Player':df.Player.values,
+                               'Season':season, 'Cluster':clusters.predict(df[SPORTVU_FEATURES].values)})
+        appendTable(labels[['PlayerID','Player','Season','Cluster']], tableName)
+
+"""----------------------------------------------------------------"""
+def clusterSeasons(k=18, chunksize=5000, epochs=3):
+    """
+    Fit clusters to all SportVU seasons, save them and label every
+    player-season
+    """
+    clusters = fitStreaming(k, chunksize, epochs)
+    clusters.save()
+    assignClusters(clusters, chunksize)
+
+"""----------------------------------------------------------------"""
+def main():
+    """
+    Main function for running
+    """
+    clusterSeasons()
+
+
+"""*******************************************************************
+*                                                                    *
+*                   Script Execution                                 *
+*                                                                    *
+*******************************************************************"""
+if __name__ == '__main__':
+    main()
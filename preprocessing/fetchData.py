@@ -0,0 +1,540 @@
+"""
+----------------------------------------------------------------------
+    fetchData.py
+----------------------------------------------------------------------
+    Fetches web pages for the scraper with bounded concurrency and
+    per-host rate limiting; keeps an on-disk cache of responses.
+    ScrapePipeline hands downloaded pages to a pool of parser processes
+
+    NOTE: For offline testing, point the fetcher at a local copy of
+    the sites with hostMap, e.g.
+        server = servePages('../../data/pages/www.basketball-reference.com')
+        fetcher = Fetcher(hostMap={'www.basketball-reference.com':
+                                   'http://localhost:8000'})
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import urllib2
+import urlparse
+import datetime
+import Queue
+import threading
+import collections
+import multiprocessing
+import SocketServer
+import SimpleHTTPServer
+from multiprocessing.pool import ThreadPool
+from requestPolicy import RequestPolicy, CircuitBreaker, classifyError, isThrottled
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the request rate to a single host
+    """
+
+    def __init__(self, rate, capacity=1):
+        """
+        rate     - tokens (requests) added per second
+        capacity - maximum number of tokens (burst size)
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.lastTime = time.time()
+        self.lock = threading.Lock()
+
+    """------------------------------------------------------------"""
+    def acquire(self):
+        """
+        Block until a token is available, then consume it
+        """
+        while True:
+            with self.lock:
+                # Refill based on time since the last request
+                now = time.time()
+                self.tokens = min(self.capacity, self.tokens + (now - self.lastTime)*self.rate)
+                self.lastTime = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens)/self.rate
+            time.sleep(wait)
+
+
+def currentSeason(today=None):
+    """
+    Season in progress (or most recently finished), named by the year
+    it ends (e.g., 2013-14 season is named 2014)
+    """
+    if today is None:
+        today = datetime.date.today()
+    if today.month >= 10:
+        return today.year + 1
+    return today.year
+
+"""----------------------------------------------------------------"""
+def defaultTTLs(season=None):
+    """
+    Time-to-live (seconds) by URL pattern; game logs of finished
+    seasons never change so they never expire (None)
+    """
+    if season is None:
+        season = currentSeason()
+    pastSeasons = '|'.join(str(year) for year in range(1947, season))
+    return [('/gamelog/(' + pastSeasons + ')/', None),
+            ('/gamelog/', 6*3600)]
+
+
+class ResponseCache:
+    """
+    On-disk cache of downloaded pages; page bodies are stored once
+    under the SHA-1 of their content and an SQLite index maps each URL
+    to its body, validators (ETag/Last-Modified) and access times.
+    Least recently used pages are evicted when the cache grows past
+    maxBytes
+    """
+
+    def __init__(self, directory='../../data/cache/pages', ttls=None, defaultTTL=6*3600, maxBytes=2*1024**3):
+        """
+        directory  - location of the cache
+        ttls       - list of (regex, seconds) checked in order against
+                     the URL; None means the page never expires
+        defaultTTL - seconds for URLs that match none of the patterns
+        maxBytes   - maximum total size of stored page bodies
+        """
+        self.directory = directory
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (ttls if ttls is not None else defaultTTLs())]
+        self.defaultTTL = defaultTTL
+        self.maxBytes = maxBytes
+        self.lock = threading.Lock()
+        if not os.path.isdir(os.path.join(directory, 'objects')):
+            os.makedirs(os.path.join(directory, 'objects'))
+        self.db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, hash TEXT, size INTEGER, '
+                        'fetched REAL, accessed REAL, etag TEXT, lastModified TEXT)')
+        self.db.commit()
+
+    """------------------------------------------------------------"""
+    def objectPath(self, digest):
+        """
+        Path to the stored body with the given content hash
+        """
+        return os.path.join(self.directory, 'objects', digest[:2], digest)
+
+    """------------------------------------------------------------"""
+    def getTTL(self, url):
+        """
+        Time-to-live for a URL (None if it never expires)
+        """
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return self.defaultTTL
+
+    """------------------------------------------------------------"""
+    def lookup(self, url):
+        """
+        Return the index entry for a URL as a dictionary (None if the
+        URL has not been cached); 'fresh' is True if it has not expired
+        """
+        with self.lock:
+            row = self.db.execute('SELECT hash, fetched, etag, lastModified FROM pages WHERE url = ?', (url,)).fetchone()
+        if row is None or not os.path.exists(self.objectPath(row[0])):
+            return None
+        ttl = self.getTTL(url)
+        fresh = ttl is None or (time.time() - row[1]) < ttl
+        return {'hash':row[0], 'fetched':row[1], 'etag':row[2], 'lastModified':row[3], 'fresh':fresh}
+
+    """------------------------------------------------------------"""
+    def read(self, url, entry):
+        """
+        Return the stored body for an entry and mark it as recently used
+        """
+        with open(self.objectPath(entry['hash']), 'rb') as f:
+            body = f.read()
+        with self.lock:
+            self.db.execute('UPDATE pages SET accessed = ? WHERE url = ?', (time.time(), url))
+            self.db.commit()
+        return body
+
+    """------------------------------------------------------------"""
+    def revalidate(self, url):
+        """
+        Server confirmed the stored body is current (304 Not Modified)
+        """
+        now = time.time()
+        with self.lock:
+            self.db.execute('UPDATE pages SET fetched = ?, accessed = ? WHERE url = ?', (now, now, url))
+            self.db.commit()
+
+    """------------------------------------------------------------"""
+    def store(self, url, body, etag=None, lastModified=None):
+        """
+        Add (or replace) the body for a URL, then evict old pages if
+        the cache is over its size limit
+        """
+        digest = hashlib.sha1(body).hexdigest()
+        path = self.objectPath(digest)
+        if not os.path.exists(path):
+            if not os.path.isdir(os.path.dirname(path)):
+                try:
+                    os.makedirs(os.path.dirname(path))
+                except OSError:
+                    pass
+            # Write to a temporary file first so a crash never leaves a partial body
+            tempPath = path + '.' + str(threading.current_thread().ident)
+            with open(tempPath, 'wb') as f:
+                f.write(body)
+            os.rename(tempPath, path)
+        now = time.time()
+        with self.lock:
+            old = self.db.execute('SELECT hash FROM pages WHERE url = ?', (url,)).fetchone()
+            self.db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)',
+                            (url, digest, len(body), now, now, etag, lastModified))
+            self.db.commit()
+            # Page changed; drop the previous body if nothing else uses it
+            if old is not None and old[0] != digest:
+                self.removeUnused(old[0])
+        self.evict()
+
+    """------------------------------------------------------------"""
+    def removeUnused(self, digest):
+        """
+        Delete a stored body if no URL refers to it (call with lock held);
+        returns True if it was deleted
+        """
+        if self.db.execute('SELECT 1 FROM pages WHERE hash = ?', (digest,)).fetchone() is not None:
+            return False
+        try:
+            os.remove(self.objectPath(digest))
+        except OSError:
+            pass
+        return True
+
+    """------------------------------------------------------------"""
+    def totalBytes(self):
+        """
+        Total size of stored bodies (shared bodies counted once)
+        """
+        with self.lock:
+            row = self.db.execute('SELECT SUM(size) FROM (SELECT DISTINCT hash, size FROM pages)').fetchone()
+        return row[0] or 0
+
+    """------------------------------------------------------------"""
+    def evict(self):
+        """
+        Remove least recently used pages until under the size limit
+        """
+        total = self.totalBytes()
+        if total <= self.maxBytes:
+            return
+        with self.lock:
+            rows = self.db.execute('SELECT url, hash, size FROM pages ORDER BY accessed').fetchall()
+            for url, digest, size in rows:
+                if total <= self.maxBytes:
+                    break
+                self.db.execute('DELETE FROM pages WHERE url = ?', (url,))
+                # Only delete the body if no other URL shares it
+                if self.removeUnused(digest):
+                    total -= size
+            self.db.commit()
+
+
+class Fetcher:
+    """
+    A class to download pages with several requests in flight at once,
+    without exceeding the request rate allowed for each host
+    """
+
+    def __init__(self, workers=8, rates=None, defaultRate=1.0, burst=1, hostMap=None, timeout=30, cache=None,
+                 policy=None, retryQueue=None):
+        """
+        workers     - maximum number of requests in flight
+        rates       - dictionary of host to requests per second
+        defaultRate - requests per second for hosts not in rates
+        burst       - number of requests a host may receive back-to-back
+        hostMap     - dictionary of host to replacement base URL
+                      (used to serve saved pages locally)
+        timeout     - socket timeout in seconds
+        cache       - ResponseCache (None to always download)
+        policy      - RequestPolicy deciding retries and backoff
+        retryQueue  - RetryQueue recording requests that still failed
+                      after retrying (None to not record them)
+        """
+        self.workers = workers
+        self.rates = rates if rates is not None else {}
+        self.defaultRate = defaultRate
+        self.burst = burst
+        self.hostMap = hostMap if hostMap is not None else {}
+        self.timeout = timeout
+        self.cache = cache
+        self.policy = policy if policy is not None else RequestPolicy()
+        self.retryQueue = retryQueue
+        self.buckets = {}
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    """------------------------------------------------------------"""
+    def getBucket(self, host):
+        """
+        Return the token bucket for a host (created on first use)
+        """
+        with self.lock:
+            if host not in self.buckets:
+                rate = self.rates.get(host, self.defaultRate)
+                self.buckets[host] = TokenBucket(rate, self.burst)
+            return self.buckets[host]
+
+    """------------------------------------------------------------"""
+    def getBreaker(self, host):
+        """
+        Return the circuit breaker for a host (created on first use)
+        """
+        bucket = self.getBucket(host)
+        with self.lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(bucket)
+            return self.breakers[host]
+
+    """------------------------------------------------------------"""
+    def resolveURL(self, url):
+        """
+        Rewrite the URL if its host is mapped to a stand-in server
+        """
+        parts = urlparse.urlsplit(url)
+        if parts.netloc in self.hostMap:
+            base = self.hostMap[parts.netloc].rstrip('/')
+            url = base + urlparse.urlunsplit(('', '', parts.path, parts.query, parts.fragment))
+        return url
+
+    """------------------------------------------------------------"""
+    def fetch(self, url):
+        """
+        Download a single page (blocks until the host allows it);
+        unexpired cached pages are returned without a request, expired
+        ones are revalidated with a conditional GET. Retryable errors
+        are retried with backoff; the last error is raised
+        """
+        entry = self.cache.lookup(url) if self.cache is not None else None
+        if entry is not None and entry['fresh']:
+            return self.cache.read(url, entry)
+        host = urlparse.urlsplit(url).netloc
+        breaker = self.getBreaker(host)
+        attempt = 0
+        while True:
+            breaker.wait()
+            self.getBucket(host).acquire()
+            try:
+                page_source = self.download(url, entry)
+            except Exception as e:
+                if classifyError(e) == 'retryable':
+                    breaker.recordFailure(isThrottled(e))
+                if not self.policy.shouldRetry(e, attempt):
+                    raise
+                time.sleep(self.policy.delay(e, attempt))
+                attempt += 1
+                continue
+            breaker.recordSuccess()
+            return page_source
+
+    """------------------------------------------------------------"""
+    def download(self, url, entry=None):
+        """
+        Make one request for a page (conditional if a cache entry is
+        given) and store the response in the cache
+        """
+        request = urllib2.Request(self.resolveURL(url))
+        if entry is not None:
+            if entry['etag']:
+                request.add_header('If-None-Match', entry['etag'])
+            if entry['lastModified']:
+                request.add_header('If-Modified-Since', entry['lastModified'])
+        # Open the URL and read
+        try:
+            response = urllib2.urlopen(request, timeout=self.timeout)
+        except urllib2.HTTPError as e:
+            if e.code == 304 and entry is not None:
+                self.cache.revalidate(url)
+                return self.cache.read(url, entry)
+            raise
+        try:
+            page_source = response.read()
+            headers = response.info()
+        finally:
+            response.close()
+        if self.cache is not None:
+            self.cache.store(url, page_source, headers.getheader('ETag'), headers.getheader('Last-Modified'))
+        return page_source
+
+    """------------------------------------------------------------"""
+    def fetchSafe(self, url, job=None, args=()):
+        """
+        Download a single page; return None if the request fails (the
+        failure is recorded in the retry queue under job and args)
+        """
+        try:
+            return self.fetch(url)
+        except Exception as e:
+            print 'Error fetching ' + url + ' (' + str(e) + ')'
+            if self.retryQueue is not None and job is not None:
+                self.retryQueue.add(job, url, args, e)
+            return None
+
+    """------------------------------------------------------------"""
+    def fetchAll(self, urls):
+        """
+        Download a list of pages concurrently; yields (url, page_source)
+        tuples in the same order as the input (page_source is None if
+        the request failed)
+        """
+        urls = list(urls)
+        if not urls:
+            return
+        pool = ThreadPool(min(self.workers, len(urls)))
+        try:
+            for url, page_source in zip(urls, pool.imap(self.fetchSafe, urls)):
+                yield url, page_source
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+class ScrapePipeline:
+    """
+    A class to overlap downloading and parsing: fetcher threads put
+    pages on a bounded queue and a pool of processes parses them.
+    When parsing (or the caller) falls behind, the queue fills up and
+    the fetchers wait, so memory stays bounded
+    """
+
+    def __init__(self, fetcher, parsers=None, queueSize=32):
+        """
+        fetcher   - Fetcher used to download pages
+        parsers   - number of parser processes (default: one per CPU;
+                    0 parses in the calling process)
+        queueSize - maximum number of downloaded pages waiting to be
+                    parsed
+        """
+        self.fetcher = fetcher
+        self.parsers = parsers if parsers is not None else multiprocessing.cpu_count()
+        self.queueSize = queueSize
+
+    """------------------------------------------------------------"""
+    def fetchWorker(self, taskQueue, pageQueue, job):
+        """
+        Producer: download pages until the task queue is empty
+        """
+        while True:
+            try:
+                url, args = taskQueue.get_nowait()
+            except Queue.Empty:
+                break
+            pageQueue.put((url, args, self.fetcher.fetchSafe(url, job, args)))
+        # Tell the consumer this fetcher is finished
+        pageQueue.put(None)
+
+    """------------------------------------------------------------"""
+    def run(self, tasks, parseFunc, job=None):
+        """
+        Download and parse pages; tasks is a list of (url, args) and each
+        page is parsed with parseFunc(page_source, *args), which must be
+        a module-level function so it can be sent to the parser
+        processes. Yields (url, args, result) as pages finish; result is
+        None if the download or the parsing failed (failures are
+        recorded in the fetcher's retry queue under job)
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return
+        taskQueue = Queue.Queue()
+        for task in tasks:
+            taskQueue.put(task)
+        pageQueue = Queue.Queue(maxsize=self.queueSize)
+        nFetchers = min(self.fetcher.workers, len(tasks))
+        # Start the parser processes before any fetcher thread (forking
+        # a process that is running threads can deadlock the children)
+        pool = multiprocessing.Pool(self.parsers) if self.parsers > 0 else None
+        for _ in range(nFetchers):
+            thread = threading.Thread(target=self.fetchWorker, args=(taskQueue, pageQueue, job))
+            thread.daemon = True
+            thread.start()
+        # Parse jobs in flight (bounded so parsed rows do not pile up)
+        pending = collections.deque()
+        maxPending = max(2*self.parsers, 1)
+        # ----------------
+        def collect():
+            url, args, parse = pending.popleft()
+            try:
+                result = parse.get() if pool is not None else parse()
+            except Exception as e:
+                print 'Error parsing ' + url + ' (' + str(e) + ')'
+                if self.fetcher.retryQueue is not None and job is not None:
+                    self.fetcher.retryQueue.add(job, url, args, e, 'parse')
+                result = None
+            return url, args, result
+        # ----------------
+        try:
+            finished = 0
+            while finished < nFetchers:
+                item = pageQueue.get()
+                if item is None:
+                    finished += 1
+                    continue
+                url, args, page_source = item
+                if page_source is None:
+                    yield url, args, None
+                    continue
+                if pool is not None:
+                    parse = pool.apply_async(parseFunc, (page_source,) + tuple(args))
+                else:
+                    parse = (lambda page_source=page_source, args=args: parseFunc(page_source, *args))
+                pending.append((url, args, parse))
+                while len(pending) >= maxPending:
+                    yield collect()
+            while pending:
+                yield collect()
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+
+"""----------------------------------------------------------------"""
+class QuietHTTPRequestHandler(SimpleHTTPServer.SimpleHTTPRequestHandler):
+    """
+    Static file handler that does not log every request
+    """
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadedHTTPServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def servePages(directory, port=8000):
+    """
+    Serve saved pages from a directory on localhost (in a background
+    thread) as a stand-in for the real site; directory layout mirrors
+    the URL paths, e.g. players/a/index.html for /players/a/
+    Call shutdown() on the returned server when finished
+    """
+    directory = os.path.abspath(directory)
+    class Handler(QuietHTTPRequestHandler):
+        def translate_path(self, path):
+            path = urlparse.urlsplit(path).path
+            return os.path.join(directory, *[p for p in path.split('/') if p not in ('', '.', '..')])
+    server = ThreadedHTTPServer(('localhost', port), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
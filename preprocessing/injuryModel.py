@@ -0,0 +1,145 @@
+"""
+----------------------------------------------------------------------
+    injuryModel.py
+----------------------------------------------------------------------
+    Saved versions of the injury risk model and a predict-only path
+
+    classifyData saves each fitted model as a small JSON file (feature
+    column order, selected features, coefficients, intercept and
+    accuracies) under ../../data/models/InjuryRisk/, one file per
+    version. Scoring loads a version and computes probabilities with
+    numpy alone, so new players are scored without refitting (or
+    importing sklearn)
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+from storeData import readTable, writeTable, DATA_DIR
+
+
+# Saved model versions (v0001.json, v0002.json, ...)
+MODEL_DIR = os.path.join(DATA_DIR, 'models', 'InjuryRisk')
+
+
+def modelPath(version, directory=MODEL_DIR):
+    """
+    Path to a saved model version
+    """
+    return os.path.join(directory, 'v' + str(version).zfill(4) + '.json')
+
+"""----------------------------------------------------------------"""
+def modelVersions(directory=MODEL_DIR):
+    """
+    Saved model versions, in increasing order
+    """
+    if not os.path.isdir(directory):
+        return []
+    matches = [re.match(r'v(\d+)\.json$', f) for f in os.listdir(directory)]
+    return sorted(int(m.group(1)) for m in matches if m)
+
+"""----------------------------------------------------------------"""
+def saveModel(logreg, columns, support, dataHash=None, scores=None, directory=MODEL_DIR):
+    """
+    Save a fitted logistic regression as the next model version;
+    returns the saved model (dict)
+    logreg   - LogisticRegression fitted on the selected features
+    columns  - all feature columns, in model table order
+    support  - boolean mask of the selected features
+    dataHash - hash of the model data (see makePredictions.selectionHash)
+    scores   - dict of accuracies (e.g. train/test)
+    """
+    versions = modelVersions(directory)
+    version = versions[-1] + 1 if versions else 1
+    support = np.asarray(support, dtype=bool)
+    columns = [str(col) for col in columns]
+    model = {'version':version,
+             'created':time.strftime('%Y-%m-%d %H:%M:%S'),
+             'dataHash':dataHash,
+             'columns':columns,
+             'support':support.tolist(),
+             'features':[col for col, keep in zip(columns, support) if keep],
+             'coefficients':np.ravel(logreg.coef_).tolist(),
+             'intercept':float(np.ravel(logreg.intercept_)[0]),
+             'classes':[int(c) for c in logreg.classes_],
+             'scores':scores or {}}
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(modelPath(version, directory), 'w') as f:
+        json.dump(model, f, indent=1, sort_keys=True)
+    return model
+
+"""----------------------------------------------------------------"""
+def loadModel(version=None, directory=MODEL_DIR):
+    """
+    Load a saved model version (the latest if None)
+    """
+    if version is None:
+        versions = modelVersions(directory)
+        if not versions:
+            raise IOError('No saved injury risk model in ' + directory)
+        version = versions[-1]
+    with open(modelPath(version, directory)) as f:
+        model = json.load(f)
+    model['coefficients'] = np.array(model['coefficients'])
+    return model
+
+"""----------------------------------------------------------------"""
+def scoreRows(df, model):
+    """
+    Probability (%) of missing games for each row of a dataframe with
+    the model's feature columns (other columns are ignored)
+    """
+    missing = [col for col in model['features'] if col not in df.columns]
+    if missing:
+        raise KeyError('Missing model features: ' + ', '.join(missing))
+    X = df[model['features']].values.astype(np.float64)
+    # Logistic function of the linear model (= predict_proba[:,1])
+    z = X.dot(model['coefficients']) + model['intercept']
+    return np.round(100.0/(1.0 + np.exp(-z)))
+
+"""----------------------------------------------------------------"""
+def predictInjuryRisk(model=None, tableName='BR_Player_Summary_Predict'):
+    """
+    Score a prediction table with a saved model (the latest if None)
+    and write the Predict_InjuryRisk table
+    """
+    if model is None:
+        model = loadModel()
+    data = readTable(tableName)
+    df = pd.DataFrame({'PlayerID':data.PlayerID, 'Player':data.Player, 'Probability':scoreRows(data, model)})
+    df = df[['PlayerID','Player','Probability']]
+    writeTable(df, 'Predict_InjuryRisk')
+    return df
+
+"""----------------------------------------------------------------"""
+def main():
+    """
+    Main function for running
+    (scores BR_Player_Summary_Predict with the latest model; pass
+     --version=N to use an earlier one)
+    """
+    version = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--version='):
+            version = int(arg.split('=', 1)[1])
+    model = loadModel(version)
+    print 'Injury risk model v' + str(model['version']) + ' (' + model['created'] + ')'
+    predictInjuryRisk(model)
+
+
+"""*******************************************************************
+*                                                                    *
+*                   Script Execution                                 *
+*                                                                    *
+*******************************************************************"""
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,10 @@
 ----------------------------------------------------------------------
     loadMySQL.py
 ----------------------------------------------------------------------
-    Load csv files into MySQL database
+    Load stored tables into MySQL database
 ----------------------------------------------------------------------
     Created by Megan Schroeder
-    Last Modified 2014-08-15
+    Last Modified 2026-10-18
 ----------------------------------------------------------------------
 """
 
@@ -13,12 +13,16 @@
 import pandas as pd
 from pandas.io import sql
 import pymysql as mdb
+from storeData import readTable
 
 
-# Open connection to MySQL database
-con = mdb.connect(user="root", host="localhost", db="BasketballDB", charset="utf8")
+def connect():
+    """
+    Open connection to MySQL database
+    """
+    return mdb.connect(user="root", host="localhost", db="BasketballDB", charset="utf8")
 
-# --------------------------------------------------------------------
+"""----------------------------------------------------------------"""
 def addDataframeToSQL(con, df, table_name):
     """
     Add pandas dataframe to MySQL
@@ -30,30 +34,45 @@ def addDataframeToSQL(con, df, table_name):
         # Delete table if it already exists
         cur.execute("DROP TABLE IF EXISTS " + table_name)
         # Create a new dummy table
-        cur.execute("CREATE TABLE " + csv_name + "(Id INT PRIMARY KEY AUTO_INCREMENT, Name VARCHAR(25))")
+        cur.execute("CREATE TABLE " + table_name + "(Id INT PRIMARY KEY AUTO_INCREMENT, Name VARCHAR(25))")
         # Send dataframe contents to table
         df.to_sql(con=con, name=table_name, if_exists='replace', flavor='mysql')
-# --------------------------------------------------------------------
-
-# NBA Teams
-csv_name = 'NBA_Teams'
-df = pd.read_csv('../../data/'+csv_name+'.csv')
-df = df.set_index('City')
-addDataframeToSQL(con, df, csv_name)
-# NBA Player Demographics
-csv_name = 'NBA_Player_Demographics'
-df = pd.read_csv('../../data/'+csv_name+'.csv')
-df = df.set_index('Player')
-df = df.where(pd.notnull(df), None)
-addDataframeToSQL(con, df, csv_name)
-# Similar Players
-csv_name = 'Predict_SimilarPlayers'
-df = pd.read_csv('../../data/'+csv_name+'.csv')
-df = df.set_index('Player')
-df = df.where(pd.notnull(df), None)
-addDataframeToSQL(con, df, csv_name)
-# Injury Risk
-csv_name = 'Predict_InjuryRisk'
-df = pd.read_csv('../../data/'+csv_name+'.csv')
-df = df.set_index('Player')
-addDataframeToSQL(con, df, csv_name)
+
+"""----------------------------------------------------------------"""
+def loadTable(table_name, index, con=None):
+    """
+    Load a stored table into MySQL (missing values as NULL)
+    table_name - name of the stored table (and the MySQL table)
+    index      - column used as the MySQL table index
+    con        - open connection (a new one is opened if None)
+    """
+    if con is None:
+        con = connect()
+    df = readTable(table_name)
+    df = df.set_index(index)
+    df = df.where(pd.notnull(df), None)
+    addDataframeToSQL(con, df, table_name)
+
+"""----------------------------------------------------------------"""
+def main():
+    """
+    Main function for running
+    """
+    con = connect()
+    # NBA Teams
+    loadTable('NBA_Teams', 'City', con)
+    # NBA Player Demographics
+    loadTable('NBA_Player_Demographics', 'Player', con)
+    # Similar Players
+    loadTable('Predict_SimilarPlayers', 'Player', con)
+    # Injury Risk
+    loadTable('Predict_InjuryRisk', 'Player', con)
+
+
+"""*******************************************************************
+*                                                                    *
+*                   Script Execution                                 *
+*                                                                    *
+*******************************************************************"""
+if __name__ == '__main__':
+    main()
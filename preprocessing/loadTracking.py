@@ -0,0 +1,155 @@
+"""
+----------------------------------------------------------------------
+    loadTracking.py
+----------------------------------------------------------------------
+    Reads the SportVU tracking tables (downloaded from NBA.com as
+    NBA_Player_SportVU_RegularSeason_<year>.csv) into a float32
+    feature matrix
+
+    Only the player name and feature columns are read; numeric columns
+    are parsed as float32 by read_csv and percentage strings ('45.2%')
+    with vectorized string operations. The matrix can be saved as .npy
+    (with the player names and the source table's hash next to it) and
+    opened memory-mapped, so clustering and neighbour search reuse it
+    without re-parsing the CSV
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import re
+import json
+import numpy as np
+import pandas as pd
+from storeData import readTable, iterTable, tableHash, csvPath, tablePath, DATA_DIR, pq
+
+
+# SportVU tables, one per season (e.g. NBA_Player_SportVU_RegularSeason_2014)
+TRACKING_PREFIX = 'NBA_Player_SportVU_RegularSeason_'
+# Features used to cluster and compare players
+SPORTVU_FEATURES = ['Games_Played','Minutes_Per_Game',
+                    'Distance_Traveled_Per_Game_MILES',
+                    'Touches_Per_Game','Points_Per_Game',
+                    'Assists_Per_Game','Passes_Per_Game',
+                    'Steals_Per_Game','Blocks_Per_Game',
+                    'Rebounds_Per_Game','Rebound_Chances_Per_Game',
+                    'Drives_Per_Game','Drive_Points_Per_Game',
+                    'Catch_and_Shoot_Points_Per_Game',
+                    'Pull_Up_Shots_Points_Per_Game',
+                    'Close_Shots_Points_Per_Game',
+                    'Effective_Field_Goal_Percentage']
+# Saved feature matrices
+MATRIX_DIR = os.path.join(DATA_DIR, 'matrices')
+
+
+def trackingTables():
+    """
+    Names and seasons of the stored SportVU tables (CSV or Parquet),
+    in season order; returns a list of (name, season)
+    """
+    if not os.path.isdir(DATA_DIR):
+        return []
+    pattern = re.compile(re.escape(TRACKING_PREFIX) + r'(\d{4})\.(csv|parquet)$')
+    matches = [pattern.match(f) for f in os.listdir(DATA_DIR)]
+    seasons = sorted(set(int(m.group(1)) for m in matches if m))
+    return [(TRACKING_PREFIX + str(season), season) for season in seasons]
+
+"""----------------------------------------------------------------"""
+def isPercent(col):
+    """
+    Check whether a SportVU column holds percentage strings
+    """
+    return 'ercent' in col
+
+"""----------------------------------------------------------------"""
+def parsePercentages(df):
+    """
+    Convert percentage columns from strings ('45.2%') to float32
+    fractions in one vectorized step per column (columns that are
+    already numeric are left alone)
+    """
+    for col in df.columns:
+        if isPercent(col) and df[col].dtype == object:
+            df[col] = (df[col].str.rstrip('%').astype(np.float64)/100).astype(np.float32)
+    return df
+
+"""----------------------------------------------------------------"""
+def trackingReadArgs(features):
+    """
+    read_csv arguments: only the player and feature columns, numbers
+    parsed as float32 and percentages kept as text for parsePercentages
+    """
+    dtypes = dict((col, object if isPercent(col) else np.float32) for col in features)
+    dtypes['Player'] = object
+    return {'usecols':['Player'] + list(features), 'dtype':dtypes, 'encoding':'utf-8'}
+
+"""----------------------------------------------------------------"""
+def readTracking(name, features=SPORTVU_FEATURES):
+    """
+    Read a SportVU table: Player plus float32 feature columns
+    """
+    if pq is None or not os.path.exists(tablePath(name)):
+        if os.path.exists(csvPath(name)):
+            df = pd.read_csv(csvPath(name), **trackingReadArgs(features))
+            return parsePercentages(df)[['Player'] + list(features)]
+    df = parsePercentages(readTable(name, columns=['Player'] + list(features)))
+    df[list(features)] = df[list(features)].astype(np.float32)
+    return df
+
+"""----------------------------------------------------------------"""
+def iterTracking(name, features=SPORTVU_FEATURES, chunksize=5000):
+    """
+    Read a SportVU table in chunks of Player plus float32 features
+    """
+    if pq is None or not os.path.exists(tablePath(name)):
+        if os.path.exists(csvPath(name)):
+            reader = pd.read_csv(csvPath(name), chunksize=chunksize, **trackingReadArgs(features))
+            for df in reader:
+                yield parsePercentages(df)[['Player'] + list(features)]
+            return
+    for df in iterTable(name, columns=['Player'] + list(features), chunksize=chunksize):
+        df = parsePercentages(df)
+        df[list(features)] = df[list(features)].astype(np.float32)
+        yield df
+
+"""----------------------------------------------------------------"""
+def matrixPaths(name, directory=MATRIX_DIR):
+    """
+    Locations of a table's saved feature matrix and its description
+    (player names, features and source hash)
+    """
+    return os.path.join(directory, name + '.npy'), os.path.join(directory, name + '.json')
+
+"""----------------------------------------------------------------"""
+def saveMatrix(name, features=SPORTVU_FEATURES, directory=MATRIX_DIR):
+    """
+    Parse a SportVU table and save its feature matrix as .npy; returns
+    (player names, matrix)
+    """
+    df = readTracking(name, features)
+    data = np.ascontiguousarray(df[list(features)].values, dtype=np.float32)
+    players = df.Player.tolist()
+    npyPath, jsonPath = matrixPaths(name, directory)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    np.save(npyPath, data)
+    with open(jsonPath, 'w') as f:
+        json.dump({'source':tableHash(name), 'features':list(features), 'players':players}, f)
+    return players, data
+
+"""----------------------------------------------------------------"""
+def trackingMatrix(name, features=SPORTVU_FEATURES, mmap=True, directory=MATRIX_DIR):
+    """
+    Player names and float32 feature matrix of a SportVU table, from
+    the saved .npy (memory-mapped read-only if mmap) when it matches
+    the table's current contents and features, else parsed and saved
+    """
+    npyPath, jsonPath = matrixPaths(name, directory)
+    if os.path.exists(npyPath) and os.path.exists(jsonPath):
+        with open(jsonPath) as f:
+            saved = json.load(f)
+        if saved['source'] == tableHash(name) and saved['features'] == list(features):
+            return saved['players'], np.load(npyPath, mmap_mode='r' if mmap else None)
+    return saveMatrix(name, features, directory)
@@ -3,34 +3,192 @@
     makePredictions.py
 ----------------------------------------------------------------------
     Build classification and clustering models to identify injury
-    risk and similar players; save results to csv files
+    risk and similar players; save results to tables
+
+    Recursive feature elimination (RFECV) runs its cross-validation
+    folds in parallel, and the selected features are cached (keyed by
+    a hash of the model data and settings) so repeat runs skip
+    selection; the number of clusters can be chosen the same way
+    (parallel, cached silhouette sweep over a range of k)
 ----------------------------------------------------------------------
     Created by Megan Schroeder
-    Last Modified 2014-08-13
+    Last Modified 2026-10-18
 ----------------------------------------------------------------------
 """
 
 
+import os
+import sys
+import json
+import time
+import hashlib
+import multiprocessing
 import numpy as np
 import pandas as pd
+from sklearn.externals.joblib import Parallel, delayed
 from sklearn.preprocessing import scale
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.metrics import silhouette_score
 from sklearn.linear_model import LogisticRegression
 from sklearn.feature_selection import RFECV
 from sklearn.cross_validation import StratifiedKFold
+from storeData import readTable, writeTable, DATA_DIR
+from playerRegistry import PlayerRegistry
+from injuryModel import saveModel, predictInjuryRisk
+from similarPlayers import SimilarPlayerIndex
+from loadTracking import trackingMatrix
+
+
+# Cached feature selections (data hash -> support mask and CV scores)
+SELECTION_CACHE = os.path.join(DATA_DIR, 'checkpoints', 'FeatureSelection.json')
+# Cached cluster sweeps (data hash -> silhouette score for each k)
+CLUSTER_CACHE = os.path.join(DATA_DIR, 'checkpoints', 'ClusterSelection.json')
+# Above this many rows, sweeps use MiniBatchKMeans and a sampled silhouette
+MINIBATCH_ROWS = 10000
 
 
+def readCache(cachePath, key):
+    """
+    Cached result for a key (None if missing or cachePath is None)
+    """
+    if cachePath is None or not os.path.exists(cachePath):
+        return None
+    with open(cachePath) as f:
+        return json.load(f).get(key)
+
+"""----------------------------------------------------------------"""
+def writeCache(cachePath, key, value):
+    """
+    Add a result to a JSON cache file (nothing if cachePath is None)
+    """
+    if cachePath is None:
+        return
+    cache = {}
+    if os.path.exists(cachePath):
+        with open(cachePath) as f:
+            cache = json.load(f)
+    elif not os.path.isdir(os.path.dirname(cachePath)):
+        os.makedirs(os.path.dirname(cachePath))
+    cache[key] = value
+    with open(cachePath, 'w') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+
+"""----------------------------------------------------------------"""
+def parallelJobs(nJobs, name):
+    """
+    Number of joblib processes to use: a daemonic process (e.g. a
+    multiprocessing.Pool worker) cannot start children, so joblib would
+    quietly run one at a time; say so and use 1
+    """
+    if nJobs != 1 and multiprocessing.current_process().daemon:
+        print name + ': running in a daemonic worker process, so it runs in 1 process (not ' + str(nJobs) + ')'
+        return 1
+    return nJobs
+
+"""----------------------------------------------------------------"""
+def selectionHash(X, y, settings):
+    """
+    Hash of the model data (values, column names, labels) and the
+    feature selection settings
+    """
+    sha = hashlib.sha1()
+    sha.update('\n'.join(str(col) for col in X.columns) + '\n')
+    sha.update(np.ascontiguousarray(X.values, dtype=np.float64).tostring())
+    sha.update(np.ascontiguousarray(y, dtype=np.int64).tostring())
+    sha.update(repr(sorted(settings.items())))
+    return sha.hexdigest()
+
+"""----------------------------------------------------------------"""
+def selectFeatures(X, y, nFolds=10, nJobs=-1, cachePath=SELECTION_CACHE):
+    """
+    Recursive feature elimination with stratified cross-validation
+    (RFECV, folds run in parallel); returns (support mask, mean
+    accuracy for each number of features). Results are cached in
+    cachePath (None to skip the cache)
+    X     - dataframe of features
+    y     - class labels
+    nJobs - number of processes (-1 for one per CPU)
+    """
+    estimator = LogisticRegression()
+    settings = {'estimator':repr(estimator), 'nFolds':nFolds, 'step':1, 'scoring':'accuracy'}
+    key = selectionHash(X, y, settings)
+    # Cached selection for the same data and settings
+    cached = readCache(cachePath, key)
+    if cached is not None:
+        return np.array(cached['support'], dtype=bool), np.array(cached['scores'])
+    # Eliminate features (cross-validation folds in parallel)
+    y = np.asarray(y)
+    skf = StratifiedKFold(y, n_folds=nFolds)
+    nJobs = parallelJobs(nJobs, 'selectFeatures')
+    rfecv = RFECV(estimator=estimator, step=1, cv=skf, scoring='accuracy', n_jobs=nJobs)
+    rfecv.fit(np.asarray(X.values, dtype=np.float64), y)
+    support = rfecv.support_
+    scores = rfecv.grid_scores_
+    # Save to cache
+    writeCache(cachePath, key, {'columns':[str(col) for col in X.columns],
+                                'support':support.tolist(), 'scores':scores.tolist()})
+    return support, scores
+
+"""----------------------------------------------------------------"""
+def clusterScore(data, k, sampleSize=2000, seed=0):
+    """
+    Fit k clusters and score them by silhouette (on a random sample of
+    sampleSize rows for larger data); KMeans with 25 inits as in
+    clusterData, or MiniBatchKMeans above MINIBATCH_ROWS rows. Returns
+    (k, score, seconds)
+    """
+    start = time.time()
+    if len(data) > MINIBATCH_ROWS:
+        model = MiniBatchKMeans(n_clusters=k, n_init=3, random_state=seed)
+    else:
+        model = KMeans(n_clusters=k, n_init=25, random_state=seed)
+    labels = model.fit_predict(data)
+    if len(data) > sampleSize:
+        score = silhouette_score(data, labels, sample_size=sampleSize, random_state=seed)
+    else:
+        score = silhouette_score(data, labels)
+    return k, float(score), time.time() - start
+
+"""----------------------------------------------------------------"""
+def selectClusters(data, kRange=range(2, 31), nJobs=-1, sampleSize=2000, cachePath=CLUSTER_CACHE):
+    """
+    Choose the number of clusters with the best silhouette score over
+    kRange, fitting each k in a separate process; returns (best k,
+    dataframe of k, score and seconds). Results are cached in
+    cachePath (None to skip the cache)
+    data - standardized feature matrix
+    """
+    settings = {'kRange':list(kRange), 'sampleSize':sampleSize, 'minibatchRows':MINIBATCH_ROWS}
+    sha = hashlib.sha1()
+    sha.update(np.ascontiguousarray(data, dtype=np.float64).tostring())
+    sha.update(repr(sorted(settings.items())))
+    key = sha.hexdigest()
+    cached = readCache(cachePath, key)
+    if cached is not None:
+        df = pd.DataFrame(cached, columns=['k','Score','Seconds'])
+        # JSON gives the numbers back as floats
+        df['k'] = df.k.astype(int)
+    else:
+        sweepStart = time.time()
+        nJobs = parallelJobs(nJobs, 'selectClusters')
+        results = Parallel(n_jobs=nJobs)(delayed(clusterScore)(data, k, sampleSize) for k in kRange)
+        df = pd.DataFrame(results, columns=['k','Score','Seconds'])
+        print 'Cluster sweep wall time: ' + str(round(time.time() - sweepStart, 1)) + ' s'
+        writeCache(cachePath, key, df.values.tolist())
+    print df.to_string(index=False)
+    return int(df.k[df.Score.idxmax()]), df
+
+"""----------------------------------------------------------------"""
 def classifyData():
     """
     Logistic regression model to predicty injury risk
     """
     # ----------------------------------
-    def prepareModel(csvname):
-        # Read CSV
-        data = pd.read_csv('../../data/'+csvname+'.csv')
+    def prepareModel(tableName):
+        # Read table
+        data = readTable(tableName)
         # Prepare for model
-        X = data.drop(['Player','Season','MissedBin'], axis=1)
+        X = data.drop(['PlayerID','Player','Season','MissedBin'], axis=1)
         y = data['MissedBin'].get_values()
         return X, y
     # ----------------------------------
@@ -42,110 +200,70 @@ def classifyData():
     X_test, y_test = prepareModel('BR_Player_Summary_BuildModel_Test')
     # Build Logistic Regression model
     logreg = LogisticRegression()
-    # Eliminate features
-    skf = StratifiedKFold(y, n_folds=10)
-    rfecv = RFECV(estimator=logreg, step=1, cv=skf, scoring='accuracy')
-    rfecv.fit(X, y)
+    # Eliminate features (cached when the data has not changed)
+    support, scores = selectFeatures(X, y)
     # ----------------------------------
-    # Train model
-    X_train = X_train.ix[:, rfecv.support_]
-    trainfit = logreg.fit(X_train, y_train)
-    # # trainfit.score(X_train, y_train)
-    # Test model
-    X_test = X_test.ix[:, rfecv.support_]
-    # # trainfit.score(X_test, y_test)
+    # Train and test model
+    trainfit = logreg.fit(X_train.ix[:, support], y_train)
+    accuracy = {'train':trainfit.score(X_train.ix[:, support], y_train),
+                'test':trainfit.score(X_test.ix[:, support], y_test)}
     # ----------------------------------
     # Fit model to whole dataset
-    X = X.ix[:, rfecv.support_]
-    modelfit = logreg.fit(X, y)
-    # # modelfit.score(X, y)
+    modelfit = logreg.fit(X.ix[:, support], y)
+    accuracy['all'] = modelfit.score(X.ix[:, support], y)
+    accuracy['cv'] = float(scores.max())
+    # Save model version (scored later without refitting)
+    model = saveModel(modelfit, X.columns, support, selectionHash(X, y, {}), accuracy)
     # ----------------------------------
-    # Predict from model
-    data = pd.read_csv('../../data/BR_Player_Summary_Predict.csv')
-    X_predict = data.drop(['Player','Season'], axis=1)
-    X_predict = X_predict.ix[:, rfecv.support_]
-    # Predict probabilities
-    y_predict = modelfit.predict_proba(X_predict)
-    y_predict_1 = np.round(y_predict[:,1]*100)
-    # New dataframe
-    df = pd.DataFrame({'Player':data.Player, 'Probability':y_predict_1})
-    # Write to CSV
-    df.to_csv('../../data/Predict_InjuryRisk.csv', index=False)
+    # Predict from model and write table
+    predictInjuryRisk(model)
 
 """----------------------------------------------------------------"""
-def clusterData():
-    """
-    K-Means clustering model to identify similar players
-    """
-    # Read CSV
-    df_in = pd.read_csv('../../data/NBA_Player_SportVU_RegularSeason_2014.csv')
-    # Convert percentages from strings to floats
-    colNames = df_in.columns.values.tolist()
-    for col in colNames:
-       if 'ercent' in col:
-           df_in[col] = df_in[col].map(lambda x: float(x[:-1])/100)
-    # Pull out subset of columns
-    df_set = df_in[['Games_Played','Minutes_Per_Game',
-                    'Distance_Traveled_Per_Game_MILES',
-                    'Touches_Per_Game','Points_Per_Game',
-                    'Assists_Per_Game','Passes_Per_Game',
-                    'Steals_Per_Game','Blocks_Per_Game',
-                    'Rebounds_Per_Game','Rebound_Chances_Per_Game',
-                    'Drives_Per_Game','Drive_Points_Per_Game',
-                    'Catch_and_Shoot_Points_Per_Game',
-                    'Pull_Up_Shots_Points_Per_Game',
-                    'Close_Shots_Points_Per_Game',
-                    'Effective_Field_Goal_Percentage']]
-    # Convert to numpy array
-    data_np = df_set.values
+def clusterData(k=18, selectK=False):
+    """
+    K-Means clustering model to group players and nearest-neighbour
+    index to identify similar players
+    k       - number of clusters
+    selectK - choose k by silhouette score instead (see selectClusters)
+    """
+    # SportVU features (float32, memory-mapped after the first read)
+    players, data_np = trackingMatrix('NBA_Player_SportVU_RegularSeason_2014')
+    # Player IDs (SportVU uses NBA.com names)
+    registry = PlayerRegistry()
+    playerIDs = registry.ids(players)
+    # One row per player, so a repeated row is not its own most similar player
+    keep = ~pd.Series(playerIDs).duplicated().values
+    players = [player for player, isKept in zip(players, keep) if isKept]
+    playerIDs = playerIDs[keep]
+    data_np = data_np[keep]
     # Standardize data to zero mean and unit variance
     data = scale(data_np)
-    # Specify number of clusters (based on silhouette score)
-    k = 18
+    # Number of clusters (based on silhouette score)
+    if selectK:
+        k, _ = selectClusters(data)
     # Create KMeans model and fit data
     kmeans = KMeans(n_clusters=k, n_init=25)
     kmeans.fit(data)
-    score = silhouette_score(data, kmeans.labels_)
     labels = kmeans.labels_
-    centroids = kmeans.cluster_centers_
-    # Add cluster labels to dataframe
-    df_set.insert(0,'Cluster',labels)
-    # Add player name
-    df_set.insert(0,'Player',df_in.Player)
-    df = df_set.set_index('Player')
-    # Insert column for similar players
-    df.insert(0,'SimilarPlayers','')
-    # Loop through clusters
-    for i in range(k):
-        # Pull out all players in the cluster
-        players = df.ix[df.Cluster == i, ['Games_Played','Minutes_Per_Game','Points_Per_Game']]
-        # Sort them based on minutes played, points, etc.
-        sortPlayers = players.sort(columns = ['Minutes_Per_Game','Points_Per_Game','Games_Played'], ascending=False)
-        playerList = sortPlayers.index.values.tolist()
-        # Loop through players
-        for player in playerList:
-            # Find 3 nearest neighbors
-            playerInd = playerList.index(player)
-            if playerInd <= 2:
-                df.loc[player,'SimilarPlayers'] = ', '.join(set(playerList[0:4])-set([playerList[playerInd]]))
-            elif playerInd >= len(playerList)-3:
-                df.loc[player,'SimilarPlayers'] = ', '.join(set(playerList[-4:])-set([playerList[playerInd]]))
-            else:
-                df.loc[player,'SimilarPlayers'] = ', '.join(set(playerList[playerInd-2:playerInd+2])-set([playerList[playerInd]]))
-    # Simplify dataframe for saving
-    df_csv = df['SimilarPlayers']
-    df_csv = df_csv.reset_index()
-    df_csv = df_csv.drop_duplicates()
-    # Write to CSV
-    df_csv.to_csv('../../data/Predict_SimilarPlayers.csv', index=False)
+    # Nearest-neighbour index over the same features (saved for lookups)
+    index = SimilarPlayerIndex(data_np, playerIDs, players, k=3)
+    index.save()
+    # Table of similar players and cluster labels
+    df_csv = pd.DataFrame({'PlayerID':playerIDs, 'Player':players,
+                           'SimilarPlayers':index.similarNames(), 'Cluster':labels})
+    df_csv = df_csv[['PlayerID','Player','SimilarPlayers','Cluster']]
+    # Write table
+    writeTable(df_csv, 'Predict_SimilarPlayers')
 
 """----------------------------------------------------------------"""
 def main():
     """
     Main function for running
+    (pass --select-k to choose the number of clusters by silhouette
+     score)
     """
     classifyData()
-    clusterData()
+    clusterData(selectK='--select-k' in sys.argv[1:])
 
 
 """*******************************************************************
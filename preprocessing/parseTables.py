@@ -0,0 +1,119 @@
+"""
+----------------------------------------------------------------------
+    parseTables.py
+----------------------------------------------------------------------
+    Pulls individual tables out of scraped pages by id without
+    parsing the rest of the document
+
+    The table's HTML is located with a string search and only that
+    fragment is handed to lxml, which is much faster than building a
+    BeautifulSoup tree for the whole page
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import re
+import lxml.html
+import pandas as pd
+
+
+def toUnicode(page_source):
+    """
+    Decode a downloaded page (basketball-reference serves UTF-8)
+    """
+    if isinstance(page_source, str):
+        return page_source.decode('utf-8', 'replace')
+    return page_source
+
+"""----------------------------------------------------------------"""
+def findTableHTML(page_source, tableID):
+    """
+    Return the HTML of the table with the given id (None if the page
+    does not have it)
+    """
+    page_source = toUnicode(page_source)
+    match = re.search(u'<table[^>]*\\bid\\s*=\\s*["\']' + re.escape(tableID) + u'["\']', page_source)
+    if match is None:
+        return None
+    end = page_source.find(u'</table>', match.end())
+    if end < 0:
+        return None
+    return page_source[match.start():end + len(u'</table>')]
+
+"""----------------------------------------------------------------"""
+def extractTable(page_source, tableID):
+    """
+    Parse only the table with the given id; returns an lxml element
+    (None if the page does not have the table)
+    """
+    html = findTableHTML(page_source, tableID)
+    if html is None:
+        return None
+    return lxml.html.fragment_fromstring(html)
+
+"""----------------------------------------------------------------"""
+def firstText(cell):
+    """
+    First text node in a cell, like BeautifulSoup's find(text=True)
+    (None if the cell is empty); plain unicode so results can be
+    pickled between processes
+    """
+    texts = cell.xpath('.//text()')
+    if texts:
+        return unicode(texts[0])
+    return None
+
+"""----------------------------------------------------------------"""
+def tableHeader(table, unique=False):
+    """
+    Text of the <th> cells in a table; with unique=True, repeated
+    header rows are ignored
+    """
+    header = []
+    for th in table.iter('th'):
+        text = unicode(th.text_content())
+        if not unique or text not in header:
+            header.append(text)
+    return header
+
+"""----------------------------------------------------------------"""
+def tableRows(table):
+    """
+    Text of the <td> cells for each data row (header rows skipped)
+    """
+    rows = table.findall('.//tr')[1:]  # all rows but the header
+    parsed_table = [[unicode(td.text_content()) for td in row.findall('td')] for row in rows]
+    # remove intermediary header rows
+    return [row for row in parsed_table if len(row) > 0]
+
+"""----------------------------------------------------------------"""
+def tableToDF(table, header):
+    """
+    Drop-in for Scraper's soupTableToDF: game log table to a pandas
+    DataFrame (None if the table is missing or does not match header)
+    """
+    if table is None:
+        return None
+    try:
+        return pd.DataFrame(tableRows(table), columns=header)
+    except:
+        return None
+
+"""----------------------------------------------------------------"""
+def tableAndHeaderToDF(table, rowRegex, name):
+    """
+    Drop-in for Scraper's soupTableAndHeaderToDF: season summary table
+    to a pandas DataFrame, keeping rows whose id matches rowRegex
+    """
+    if table is None:
+        return None
+    header = [re.sub('%', 'pct', text) for text in tableHeader(table)]
+    rowPattern = re.compile(rowRegex)
+    allrows = [tr for tr in table.iter('tr') if rowPattern.search(tr.get('id', ''))]
+    parsed_table = [[unicode(td.text_content()) for td in row.findall('td')] for row in allrows]
+    df = pd.io.parsers.TextParser(parsed_table, names=header, parse_dates=True).get_chunk()
+    df['Season'] = df['Season'].map(lambda x: x[:7])
+    df.insert(0, u'Player', name)
+    return df
@@ -0,0 +1,264 @@
+"""
+----------------------------------------------------------------------
+    playerRegistry.py
+----------------------------------------------------------------------
+    Assigns each player a stable integer ID so tables can be joined
+    on numbers instead of name strings
+
+    NBA.com and basketball-reference spell some names differently
+    (accents, punctuation, nicknames); names are reduced to a matching
+    key first so both sites' spellings get the same ID. Generational
+    suffixes stay in the key (Tim Hardaway and Tim Hardaway Jr. are
+    different players). Where a table has basketball-reference player
+    URLs, their slugs (e.g. 'bareajo01') tell apart players with the
+    same name. IDs are kept in the Player_Registry table and never
+    reassigned
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import re
+import fcntl
+import contextlib
+import unicodedata
+import numpy as np
+import pandas as pd
+from storeData import readTable, writeTable, tableExists, DATA_DIR
+
+
+# Generational suffixes, written one way in matching keys
+SUFFIXES = {'jr':'jr', 'junior':'jr', 'sr':'sr', 'senior':'sr', 'ii':'ii', 'iii':'iii', 'iv':'iv'}
+# Names spelled differently on the two sites (alias: name)
+ALIASES = {
+    u'Nene Hilario': u'Nene',
+    u'Jose Juan Barea': u'J.J. Barea',
+    u'Luc Richard Mbah a Moute': u'Luc Mbah a Moute',
+}
+
+
+def normalizeName(name):
+    """
+    Matching key for a player name: accents, punctuation and case
+    removed, suffixes kept in one spelling (e.g. u'J.J. Barea' ->
+    'jjbarea', u'Tim Hardaway, Jr.' -> 'timhardawayjr')
+    """
+    name = unicodedata.normalize('NFKD', unicode(name)).encode('ascii', 'ignore').lower()
+    name = re.sub('[^a-z ]', '', name)
+    return ''.join(SUFFIXES.get(word, word) for word in name.split())
+
+
+# Matching keys for aliases
+ALIAS_KEYS = dict((normalizeName(alias), normalizeName(name)) for alias, name in ALIASES.items())
+
+"""----------------------------------------------------------------"""
+def urlSlug(url):
+    """
+    Player slug of a basketball-reference URL (e.g. 'bareajo01' for
+    .../players/b/bareajo01.html or .../players/b/bareajo01/gamelog/2014/);
+    None if the URL is not a player page
+    """
+    if not isinstance(url, basestring):
+        return None
+    match = re.search(r'/players/[a-z]/([a-z0-9.\-]+?)(?:\.html|/)', url)
+    return match.group(1) if match else None
+
+
+class PlayerRegistry:
+    """
+    A class to look up (and assign) player IDs. New players are given
+    the next free ID and written to the table straight away, under a
+    file lock, so pipeline steps running in separate processes never
+    hand out the same ID twice
+    """
+
+    def __init__(self, table='Player_Registry'):
+        """
+        table - name of the stored registry table
+        """
+        self.table = table
+        self.lockPath = os.path.join(DATA_DIR, table + '.lock')
+        # Matching key -> ID, ID -> display name
+        self.keyIDs = {}
+        self.names = {}
+        self.nextID = 1
+        with self.locked():
+            self.load()
+
+    """------------------------------------------------------------"""
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Hold the registry's file lock (blocks until it is free)
+        """
+        with open(self.lockPath, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    """------------------------------------------------------------"""
+    def load(self):
+        """
+        Read the stored registry (call with the lock held)
+        """
+        if tableExists(self.table):
+            df = readTable(self.table)
+            self.keyIDs = dict(zip(df.Key, df.PlayerID))
+            self.names = dict(zip(df.PlayerID, df.Player))
+            self.nextID = int(df.PlayerID.max()) + 1 if len(df) else 1
+
+    """------------------------------------------------------------"""
+    def save(self):
+        """
+        Write the registry table (call with the lock held)
+        """
+        keys = sorted(self.keyIDs.items(), key=lambda item: item[1])
+        df = pd.DataFrame({'PlayerID':[playerID for key, playerID in keys],
+                           'Key':[key for key, playerID in keys],
+                           'Player':[self.names[playerID] for key, playerID in keys]})
+        writeTable(df[['PlayerID','Key','Player']], self.table)
+
+    """------------------------------------------------------------"""
+    def key(self, name):
+        """
+        Matching key for a name (aliases map to the same key)
+        """
+        key = normalizeName(name)
+        return ALIAS_KEYS.get(key, key)
+
+    """------------------------------------------------------------"""
+    def nameKeys(self, names):
+        """
+        Matching key for each of a set of names from one source;
+        returns {name: key}. Different names that reduce to the same
+        key (e.g. u'J.J. Barea' and u'JJ Barea') could be two players,
+        so they are reported and each gets a key of its own: the name
+        already registered under the key (or the first in order) keeps
+        it, the others are keyed on their exact spelling. Aliases of
+        the same player still share a key
+        """
+        nameKeys = dict((name, self.key(name)) for name in names)
+        groups = {}
+        for name, key in nameKeys.items():
+            groups.setdefault((key, normalizeName(name)), []).append(name)
+        for (key, _), group in groups.items():
+            if len(group) < 2:
+                continue
+            registered = self.names.get(self.keyIDs.get(key))
+            keeper = registered if registered in group else sorted(group)[0]
+            print 'Names with the same key get separate player IDs: ' + u' / '.join(sorted(group)).encode('utf-8')
+            for name in group:
+                if name != keeper:
+                    nameKeys[name] = u'=' + name
+        return nameKeys
+
+    """------------------------------------------------------------"""
+    def slugIDs(self):
+        """
+        IDs that already have a basketball-reference URL slug
+        """
+        return set(playerID for key, playerID in self.keyIDs.items()
+                   if isinstance(key, basestring) and key.startswith('br:'))
+
+    """------------------------------------------------------------"""
+    def register(self, name, key, slug=None, withSlug=None, shared=False):
+        """
+        Add a player to the registry (call with the lock held); a slug
+        is attached to the player already known by the name key, unless
+        that player has a slug of their own or several slugs share the
+        name (different players with the same name), in which case a
+        new ID is assigned
+        withSlug - IDs that have a slug (from slugIDs, kept up to date)
+        shared   - whether other slugs being registered have this name
+        """
+        if slug is None:
+            if key not in self.keyIDs:
+                self.keyIDs[key] = self.nextID
+                self.names[self.nextID] = name
+                self.nextID += 1
+            return
+        slugKey = 'br:' + slug
+        if slugKey in self.keyIDs:
+            return
+        if withSlug is None:
+            withSlug = self.slugIDs()
+        if key in self.keyIDs and self.keyIDs[key] not in withSlug and not shared:
+            self.keyIDs[slugKey] = self.keyIDs[key]
+            withSlug.add(self.keyIDs[key])
+            return
+        if key in self.keyIDs:
+            print 'Different players named ' + name.encode('utf-8') + ' (lookups by name use ID ' + \
+                  str(self.keyIDs[key]) + ')'
+        else:
+            self.keyIDs[key] = self.nextID
+        self.keyIDs[slugKey] = self.nextID
+        self.names[self.nextID] = name
+        withSlug.add(self.nextID)
+        self.nextID += 1
+
+    """------------------------------------------------------------"""
+    def ids(self, names, slugs=None):
+        """
+        IDs for a sequence of names from one source (each distinct
+        name is only looked up once), registering new players; returns
+        an int32 array
+        slugs - basketball-reference URL slug for each name (e.g.
+                'bareajo01', see urlSlug), used instead of the name
+                where given
+        """
+        names = pd.Series(names)
+        if names.isnull().any():
+            raise ValueError('Missing player names')
+        if slugs is None:
+            slugs = [None]*len(names)
+        slugs = [slug if isinstance(slug, basestring) and slug else None for slug in slugs]
+        players = sorted(set(zip(names.values, slugs)))
+        nameKeys = self.nameKeys(set(name for name, slug in players))
+        # Number of slugs for each name key
+        keySlugs = pd.Series([nameKeys[name] for name, slug in players if slug is not None]).value_counts()
+        # ----------------
+        def lookup(name, slug):
+            return self.keyIDs.get('br:' + slug if slug is not None else nameKeys[name])
+        # ----------------
+        if any(lookup(name, slug) is None for name, slug in players):
+            with self.locked():
+                # Pick up players added by other processes first
+                self.load()
+                withSlug = self.slugIDs()
+                for name, slug in players:
+                    self.register(name, nameKeys[name], slug, withSlug, keySlugs.get(nameKeys[name], 0) > 1)
+                self.save()
+        idMap = dict(((name, slug), lookup(name, slug)) for name, slug in players)
+        return np.array([idMap[player] for player in zip(names.values, slugs)], dtype=np.int32)
+
+    """------------------------------------------------------------"""
+    def getID(self, name):
+        """
+        ID for a single name, registering it if needed
+        """
+        return int(self.ids([name])[0])
+
+    """------------------------------------------------------------"""
+    def addIDs(self, df, column='Player', keepName=True, urlColumn=None):
+        """
+        Insert a PlayerID column at the front of a dataframe; with
+        keepName=False the name column is dropped
+        urlColumn - column of basketball-reference player URLs (if the
+                    table has one), whose slugs identify players
+        """
+        slugs = df[urlColumn].map(urlSlug).values if urlColumn is not None else None
+        df.insert(0, u'PlayerID', self.ids(df[column].values, slugs))
+        if not keepName:
+            df = df.drop(column, axis=1)
+        return df
+
+    """------------------------------------------------------------"""
+    def playerNames(self, playerIDs):
+        """
+        Display names for a sequence of IDs
+        """
+        return [self.names.get(playerID) for playerID in playerIDs]
@@ -5,135 +5,175 @@
     Prepare data for model implementation
 ----------------------------------------------------------------------
     Created by Megan Schroeder
-    Last Modified 2014-08-08
+    Last Modified 2026-10-18
 ----------------------------------------------------------------------
 """
 
-
 import re
 import numpy as np
 import pandas as pd
 from sklearn.cross_validation import train_test_split
+from storeData import readTable, writeTable, tableExists, memoryUsage, printMemory
+from playerRegistry import PlayerRegistry
+
+
+# Regular season games per team (1968 on); lockout seasons and the
+# shortened 2021 schedule differ from 82. Years not listed (e.g. 2020,
+# when teams played different numbers of games) are taken from the
+# game logs, see seasonGames
+SEASON_GAMES = dict((year, 82) for year in range(1968, 2027) if year != 2020)
+SEASON_GAMES.update({1999:50, 2012:66, 2021:72})
+# First season whose game logs separate Inactive from Did Not Play
+INACTIVE_SEASON = 2014
+
 
-def getSeasonSummary_BR():
+def seasonGames(years, df_gl=None):
     """
-    Separate by year, calculate number of games missed
+    Regular season length for each year (array-like of years), from
+    SEASON_GAMES; for years not in it, the most games any team played
+    that season in df_gl (game logs with Year, Tm and Date), else 82
     """
-    # Read CSV to get column names
-    csvFile = open('../../data/BR_Player_StatsSummary_RegularSeason_PerGame.csv')
-    csvList = csvFile.readlines()
-    csvFile.close()
-    # Update header to regular season and playoffs
-    header = csvList[0].strip().split(',')
-    pgHeader = header[0:7] + ['PerGame' + col for col in header[7:]]
-    totHeader = header[0:7] + ['Tot' + col for col in header[7:]]
-    # Demographics
-    df_demo = pd.read_csv('../../data/BR_Player_Demographics__RAW.csv', parse_dates=['BirthDate'])
-    df_demo = df_demo.drop(['URL','FromYear','ToYear','Position','BirthDate'], axis=1)
-    # Open game log file
-    df_gl = pd.read_csv('../../data/BR_Player_GameLogs_RegularSeason.csv', parse_dates=['Date'])
-    # Read 'Per Game' season summary file
-    df_pg = pd.read_csv('../../data/BR_Player_StatsSummary_RegularSeason_PerGame.csv', skiprows=1, names=pgHeader)
-    # Read 'Total' season summary file
-    df_tot = pd.read_csv('../../data/BR_Player_StatsSummary_RegularSeason_Total.csv', skiprows=1, names=totHeader)
-    # -----------
-    # 2014
-    # Calculate number of inactive games
-    df2014_sum = df_gl[df_gl.Year == 2014]
-    df2014_sum = df2014_sum.groupby(['Player','Year'])['Inactive','DidNotPlay'].sum()
-    df2014_sum = df2014_sum.reset_index()
-    df2014_sum = df2014_sum.drop(['Year','DidNotPlay'], axis=1)
-    df2014_sum = df2014_sum.rename(columns = {'Inactive':'GamesMissed_2014'})
-    # Total
-    df2014_tot = df_tot[df_tot.Season == 2014]
-    df2014_tot = df2014_tot.drop('Season' , axis=1)
-    # Per Game
-    df2014_pg = df_pg[df_pg.Season == 2014]
-    df2014_pg = df2014_pg.drop(['Season','Age','Tm','Pos','G','GS'], axis=1)
-    # Merge dataframes
-    df2014_merge = pd.merge(df_demo, df2014_tot, on='Player', how='inner')
-    df2014_merge = pd.merge(df2014_merge, df2014_pg, on='Player', how='inner')
-    df2014_merge = pd.merge(df2014_merge, df2014_sum, on='Player', how='inner')
+    fromLogs = {}
+    missing = [year for year in set(years) if year not in SEASON_GAMES]
+    if missing and df_gl is not None:
+        df = df_gl[df_gl.Year.isin(missing)]
+        fromLogs = df.groupby(['Year','Tm'])['Date'].nunique().groupby(level='Year').max().to_dict()
+    return np.array([SEASON_GAMES.get(year, fromLogs.get(year, 82)) for year in years])
+
+"""----------------------------------------------------------------"""
+def gamesMissed(df_gl):
+    """
+    Games missed per player and season, in one pass over the game logs:
+     - from INACTIVE_SEASON on, games the player was listed Inactive
+     - earlier seasons don't distinguish Did Not Play, Inactive and
+       Suspended, so games not played are taken to be games missed
+       due to injury (season length minus games played)
+    Returns a dataframe with PlayerID, Year and GamesMissed
+    """
+    df = df_gl.groupby(['PlayerID','Year']).agg({'G':'count', 'Inactive':'sum'})
+    df = df.reset_index()
+    df['GamesMissed'] = seasonGames(df['Year'].values, df_gl) - df['G']
+    useInactive = (df['Year'] >= INACTIVE_SEASON).values
+    df.ix[useInactive, 'GamesMissed'] = df.ix[useInactive, 'Inactive']
+    return df[['PlayerID','Year','GamesMissed']]
+
+"""----------------------------------------------------------------"""
+def seasonSummary(df_gl, df_pg, df_tot, df_demo, firstYear=None, lastYear=None):
+    """
+    Season summaries for every year at once: demographics, season
+    totals and per game stats, games missed this season and (for all
+    but the last season) next season
+     - Only keep players averaging at least 15 minutes
+     - Next season's games missed only counts if the player also
+       qualifies next season; other rows are dropped
+    Tables are joined on PlayerID; names come from df_demo
+    """
+    # Limit years
+    if firstYear is None:
+        firstYear = df_gl.Year.min()
+    if lastYear is None:
+        lastYear = df_gl.Year.max()
+    df_gl = df_gl[(df_gl.Year >= firstYear) & (df_gl.Year <= lastYear)]
+    df_tot = df_tot[(df_tot.Season >= firstYear) & (df_tot.Season <= lastYear)]
+    df_pg = df_pg[(df_pg.Season >= firstYear) & (df_pg.Season <= lastYear)]
+    # Games missed for every player and season
+    df_sum = gamesMissed(df_gl)
+    df_sum = df_sum.rename(columns = {'Year':'Season', 'GamesMissed':'GamesMissedCur'})
+    # Merge dataframes (on player ID and season)
+    df_pg = df_pg.drop([col for col in ['Player','Age','Tm','Pos','G','GS'] if col in df_pg.columns], axis=1)
+    df_tot = df_tot.drop([col for col in ['Player'] if col in df_tot.columns], axis=1)
+    # One demographics row per player: a repeated ID would copy another
+    # player's height/weight onto these rows, so such players are dropped
+    df_demo = df_demo.drop_duplicates()
+    repeated = df_demo.PlayerID[df_demo.PlayerID.duplicated()].unique()
+    if len(repeated) > 0:
+        names = df_demo.Player[df_demo.PlayerID.isin(repeated)].unique()
+        print 'Dropping players with conflicting demographics: ' + ', '.join(names)
+        df_demo = df_demo[~df_demo.PlayerID.isin(repeated)]
+    df_merge = pd.merge(df_demo, df_tot, on='PlayerID', how='inner')
+    df_merge = pd.merge(df_merge, df_pg, on=['PlayerID','Season'], how='inner')
+    df_merge = pd.merge(df_merge, df_sum, on=['PlayerID','Season'], how='inner')
     # Only consider players who average more than 15 minutes
-    df2014_merge = df2014_merge[df2014_merge.PerGameMP >= 15]
+    df_merge = df_merge[df_merge.PerGameMP >= 15]
     # Clean up random duplicates
-    df2014 = df2014_merge[~df2014_merge.duplicated(subset='Player')]
-    # Rename columns
-    df2014_write = df2014.rename(columns = {'GamesMissed_2014':'GamesMissedCur'})
-    # Save to CSV
-    df2014_write.to_csv('../../data/BR_Player_Summary_RegularSeason_2014.csv', index=False)
-    # ----------------------------------------------------------------
-    def getYearDS(year, df_gl, df_pg, df_tot, df_demo):
-        """
-        Calculate previous year files based on assumptions:
-         - Games not played were games missed due to injury
-           - 2014, 2013, 2011, 2010 -- subtract from 82 regular season games
-           - 2012 -- subtract from 66 regular season games (lockout season)
-         - (prior to 2013-14 season, don't have distinction between
-            Did Not Play, Inactive, Suspended)
-         - Only keep for players averaging more than 15 minutes
-        """
-        dfyear_sum = df_gl[df_gl.Year == year]
-        dfyear_sum = dfyear_sum.groupby(['Player','Year'])['G','GS'].count()
-        dfyear_sum = dfyear_sum.reset_index()
-        dfyear_sum = dfyear_sum.drop(['Year','GS'], axis=1)
-        if year != 2012:
-            dfyear_sum['GamesMissed_'+str(year)] = 82 - dfyear_sum['G']
-        else:
-            dfyear_sum['GamesMissed_'+str(year)] = 66 - dfyear_sum['G']
-        dfyear_sum = dfyear_sum.drop('G', axis=1)
-        dfyear_pg = df_pg[df_pg.Season == year]
-        dfyear_pg = dfyear_pg.drop(['Season','Age','Tm','Pos','G','GS'], axis=1)
-        dfyear_tot = df_tot[df_tot.Season == year]
-        dfyear_tot = dfyear_tot.drop('Season', axis=1)
-        df_merge = pd.merge(df_demo, dfyear_tot, on='Player', how='inner')
-        df_merge = pd.merge(df_merge, dfyear_pg, on='Player', how='inner')
-        df_merge = pd.merge(df_merge, dfyear_sum, on='Player', how='inner')
-        df_merge = df_merge[df_merge.PerGameMP >= 15]
-        df_dedup = df_merge[~df_merge.duplicated(subset='Player')]
-        return df_dedup
-    # ----------------------------------------------------------------
-    # 2013
-    df2013 = getYearDS(2013, df_gl, df_pg, df_tot, df_demo)
-    df2013_write = pd.merge(df2013, df2014[['Player','GamesMissed_2014']], on='Player')
-    df2013_write = df2013_write.rename(columns = {'GamesMissed_2013':'GamesMissedCur', 'GamesMissed_2014':'GamesMissedNext'})
-    df2013_write.to_csv('../../data/BR_Player_Summary_RegularSeason_2013.csv', index=False)
-    # 2012
-    df2012 = getYearDS(2012, df_gl, df_pg, df_tot, df_demo)
-    df2012_write = pd.merge(df2012, df2013[['Player','GamesMissed_2013']], on='Player')
-    df2012_write = df2012_write.rename(columns = {'GamesMissed_2012':'GamesMissedCur', 'GamesMissed_2013':'GamesMissedNext'})
-    df2012_write.to_csv('../../data/BR_Player_Summary_RegularSeason_2012.csv', index=False)
-    # 2011
-    df2011 = getYearDS(2011, df_gl, df_pg, df_tot, df_demo)
-    df2011_write = pd.merge(df2011, df2012[['Player','GamesMissed_2012']], on='Player')
-    df2011_write = df2011_write.rename(columns = {'GamesMissed_2011':'GamesMissedCur', 'GamesMissed_2012':'GamesMissedNext'})
-    df2011_write.to_csv('../../data/BR_Player_Summary_RegularSeason_2011.csv', index=False)
-    # 2010
-    df2010 = getYearDS(2010, df_gl, df_pg, df_tot, df_demo)
-    df2010_write = pd.merge(df2010, df2011[['Player','GamesMissed_2011']], on='Player')
-    df2010_write = df2010_write.rename(columns = {'GamesMissed_2010':'GamesMissedCur', 'GamesMissed_2011':'GamesMissedNext'})
-    df2010_write.to_csv('../../data/BR_Player_Summary_RegularSeason_2010.csv', index=False)
+    df = df_merge[~df_merge.duplicated(subset=['PlayerID','Season'])]
+    # Next season's games missed (next row for the same player, if it is
+    # the following season)
+    df = df.sort(columns=['PlayerID','Season'])
+    nextSeason = df.groupby('PlayerID')['Season'].shift(-1)
+    nextMissed = df.groupby('PlayerID')['GamesMissedCur'].shift(-1)
+    df['GamesMissedNext'] = nextMissed.where(nextSeason == df['Season'] + 1)
+    df = df[df.GamesMissedNext.notnull() | (df.Season == lastYear)]
+    # Season as first column, latest season first
+    df = df.rename(columns = {'Season':'Year'})
+    df = df[['Year'] + [col for col in df.columns if col != 'Year']]
+    df = df.sort(columns=['Year','Player'], ascending=[False, True])
+    return df.reset_index(drop=True)
+
+"""----------------------------------------------------------------"""
+def getSeasonSummary_BR(firstYear=None, lastYear=None):
+    """
+    Separate by year, calculate number of games missed (all seasons
+    in the game logs unless limited by firstYear/lastYear)
+    """
+    # Demographics
+    df_demo = readTable('BR_Player_Demographics__RAW')
+    registry = PlayerRegistry()
+    # Player page URLs tell apart players with the same name
+    df_demo = registry.addIDs(df_demo, urlColumn='URL')
+    df_demo = df_demo.drop(['URL','FromYear','ToYear','Position','BirthDate'], axis=1)
+    # Game logs (only the columns used here)
+    df_gl = readTable('BR_Player_GameLogs_RegularSeason',
+                      columns=['PlayerID','Year','Tm','Date','G','GS','Inactive','DidNotPlay'])
+    # Read 'Per Game' season summary table
+    df_pg = readTable('BR_Player_StatsSummary_RegularSeason_PerGame')
+    # Read 'Total' season summary table
+    df_tot = readTable('BR_Player_StatsSummary_RegularSeason_Total')
+    # Memory used with default vs. compact types
+    printMemory('Game logs', *memoryUsage(df_gl, 'BR_Player_GameLogs_RegularSeason'))
+    printMemory('Per game stats', *memoryUsage(df_pg, 'BR_Player_StatsSummary_RegularSeason_PerGame'))
+    printMemory('Total stats', *memoryUsage(df_tot, 'BR_Player_StatsSummary_RegularSeason_Total'))
+    # Update header to regular season and playoffs
+    basicCols = ['PlayerID','Player','Season','Age','Tm','Pos','G','GS']
+    df_pg = df_pg.rename(columns = dict((col, 'PerGame' + col) for col in df_pg.columns if col not in basicCols))
+    df_tot = df_tot.rename(columns = dict((col, 'Tot' + col) for col in df_tot.columns if col not in basicCols))
+    # Summaries for all seasons
+    summary = seasonSummary(df_gl, df_pg, df_tot, df_demo, firstYear, lastYear)
+    # Write table (split by year)
+    writeTable(summary, 'BR_Player_Summary_RegularSeason')
 
 """----------------------------------------------------------------"""
 def getClassificationData():
     """
-    Prepare data for classification algorithm
+    Prepare data for classification algorithm; the latest season is
+    used for prediction and the ones before it to build the model
     """
+    # All season summaries
+    summary = readTable('BR_Player_Summary_RegularSeason')
+    lastYear = int(summary.Year.max())
+    # Workload features (buildFeatures), joined on player ID and season
+    workCols = []
+    if tableExists('BR_Player_Workload'):
+        workload = readTable('BR_Player_Workload').rename(columns = {'Season':'Year'})
+        workCols = [col for col in workload.columns if col not in ['PlayerID','Year']]
+        summary = pd.merge(summary, workload, on=['PlayerID','Year'], how='left')
+        summary[workCols] = summary[workCols].fillna(0)
+    # --------------
     def getYearDF(year):
         """
         Update individual season dataframes
         """
         # Raw data
-        df_in = pd.read_csv('../../data/BR_Player_Summary_RegularSeason_'+year+'.csv')
+        df_in = summary[summary.Year == year].drop('Year', axis=1)
         colNames = df_in.columns.values.tolist()
         # Convert GamesMissed into binary classification - 10% of regular season
         df_in.insert(0, u'MissedBin', 0)
         df_in.MissedBin[df_in.GamesMissedNext >= 8] = 1
         # Basic data to keep
-        basicCols = ['Player','MissedBin','Height','Weight','Age','G','GS']
+        basicCols = ['PlayerID','Player','MissedBin','Height','Weight','Age','G','GS']
         # Disregard percentage-based columns (redundant)
         otherCols = [colName for colName in colNames if re.match('^(PerGame|Tot).*[^pct]$', colName)]
-        df = df_in.ix[:, (basicCols + otherCols)]
+        df = df_in.ix[:, (basicCols + otherCols + workCols)]
         # Rename columns
         df = df.rename(columns = {'G':'GamesPlayed','GS':'GamesStarted'})
         # Add season as column
@@ -141,39 +181,36 @@ def getClassificationData():
         # Return
         return df
     # --------------
-    # Get seasons prior to 2013-14 season
-    df2013 = getYearDF('2013')
-    df2012 = getYearDF('2012')
-    df2011 = getYearDF('2011')
-    df2010 = getYearDF('2010')
+    # Get seasons prior to the latest season (latest first)
+    years = sorted(summary.Year.unique(), reverse=True)
     # Concatenate
-    buildmodel = pd.concat([df2013, df2012, df2011, df2010])
-    # Write to CSV
-    buildmodel.to_csv('../../data/BR_Player_Summary_BuildModel.csv', index=False)
+    buildmodel = pd.concat([getYearDF(year) for year in years if year != lastYear])
+    # Write table
+    writeTable(buildmodel, 'BR_Player_Summary_BuildModel')
     # ----------------------------------
     # Split into train/test (80/20) sets
     train, test = train_test_split(buildmodel, test_size=0.2, random_state=42)
     # Convert to dataframe
     train_df = pd.DataFrame(train, columns=buildmodel.columns)
     test_df = pd.DataFrame(test, columns=buildmodel.columns)
-    # Write to CSV
-    train_df.to_csv('../../data/BR_Player_Summary_BuildModel_Train.csv', index=False)
-    test_df.to_csv('../../data/BR_Player_Summary_BuildModel_Test.csv', index=False)
+    # Write tables
+    writeTable(train_df, 'BR_Player_Summary_BuildModel_Train')
+    writeTable(test_df, 'BR_Player_Summary_BuildModel_Test')
     # ----------------------------------
     # Prepare for prediction
-    df_in = pd.read_csv('../../data/BR_Player_Summary_RegularSeason_2014.csv')
+    df_in = summary[summary.Year == lastYear].drop('Year', axis=1)
     colNames = df_in.columns.values.tolist()
     # Basic data to keep
-    basicCols = ['Player','Height','Weight','Age','G','GS']
+    basicCols = ['PlayerID','Player','Height','Weight','Age','G','GS']
     # Disregard percentage-based columns (redundant)
     otherCols = [colName for colName in colNames if re.match('^(PerGame|Tot).*[^pct]$', colName)]
-    predict = df_in.ix[:, (basicCols + otherCols)]
+    predict = df_in.ix[:, (basicCols + otherCols + workCols)]
     # Rename columns
     predict = predict.rename(columns = {'G':'GamesPlayed','GS':'GamesStarted'})
     # Add season as column
-    predict.insert(1, u'Season', 2014)
-    # Write to CSV
-    predict.to_csv('../../data/BR_Player_Summary_Predict.csv', index=False)
+    predict.insert(1, u'Season', lastYear)
+    # Write table
+    writeTable(predict, 'BR_Player_Summary_Predict')
 
 """----------------------------------------------------------------"""
 def main():
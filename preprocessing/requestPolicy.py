@@ -0,0 +1,233 @@
+"""
+----------------------------------------------------------------------
+    requestPolicy.py
+----------------------------------------------------------------------
+    Rules for handling failed requests: which errors are worth
+    retrying, how long to back off, when to slow down a host that is
+    throttling us, and a queue of failures to replay later
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import json
+import time
+import random
+import socket
+import httplib
+import urllib2
+import threading
+import pandas as pd
+
+
+# HTTP status codes worth retrying (throttling and server errors)
+RETRYABLE_CODES = set([408, 429, 500, 502, 503, 504])
+# HTTP status codes that mean the host wants us to slow down
+THROTTLE_CODES = set([429, 503])
+
+
+def classifyError(error):
+    """
+    Classify a request error as 'retryable' (timeouts, dropped
+    connections, throttling, server errors) or 'permanent' (missing
+    pages, bad requests, anything unexpected)
+    """
+    if isinstance(error, urllib2.HTTPError):
+        if error.code in RETRYABLE_CODES:
+            return 'retryable'
+        return 'permanent'
+    if isinstance(error, (urllib2.URLError, socket.timeout, socket.error, httplib.HTTPException)):
+        return 'retryable'
+    return 'permanent'
+
+"""----------------------------------------------------------------"""
+def isThrottled(error):
+    """
+    Check whether an error means the host is throttling requests
+    """
+    return isinstance(error, urllib2.HTTPError) and error.code in THROTTLE_CODES
+
+"""----------------------------------------------------------------"""
+def retryAfter(error):
+    """
+    Seconds requested by the server's Retry-After header (None if
+    absent or not a number of seconds)
+    """
+    if not isinstance(error, urllib2.HTTPError) or error.hdrs is None:
+        return None
+    try:
+        return float(error.hdrs.getheader('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestPolicy:
+    """
+    Exponential backoff with full jitter: the wait before retry n is
+    drawn uniformly between 0 and min(maxDelay, baseDelay*2^n)
+    """
+
+    def __init__(self, maxRetries=4, baseDelay=1.0, maxDelay=60.0):
+        """
+        maxRetries - retries after the first attempt (0 to never retry)
+        baseDelay  - backoff cap (seconds) for the first retry
+        maxDelay   - largest backoff cap (seconds)
+        """
+        self.maxRetries = maxRetries
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+
+    """------------------------------------------------------------"""
+    def shouldRetry(self, error, attempt):
+        """
+        Check whether to retry after a failed attempt (0 = first try)
+        """
+        return attempt < self.maxRetries and classifyError(error) == 'retryable'
+
+    """------------------------------------------------------------"""
+    def delay(self, error, attempt):
+        """
+        Seconds to wait before retrying (at least what the server asked)
+        """
+        wait = random.uniform(0, min(self.maxDelay, self.baseDelay*2**attempt))
+        requested = retryAfter(error)
+        if requested is not None:
+            wait = max(wait, min(requested, self.maxDelay))
+        return wait
+
+
+class CircuitBreaker:
+    """
+    A class to slow down all requests to a host when it starts failing.
+    After failureThreshold consecutive failures the breaker opens and
+    every request to the host waits out a cooldown (doubling while the
+    host keeps failing). Throttling responses also halve the host's
+    request rate, which recovers gradually as requests succeed
+    """
+
+    def __init__(self, bucket, failureThreshold=5, cooldown=30.0, maxCooldown=600.0, minRate=0.05):
+        """
+        bucket           - TokenBucket for the host (rate is adjusted)
+        failureThreshold - consecutive failures before opening
+        cooldown         - first wait (seconds) once open
+        maxCooldown      - largest wait (seconds)
+        minRate          - lowest request rate throttling can lead to
+        """
+        self.bucket = bucket
+        self.baseRate = bucket.rate
+        self.failureThreshold = failureThreshold
+        self.baseCooldown = cooldown
+        self.cooldown = cooldown
+        self.maxCooldown = maxCooldown
+        self.minRate = minRate
+        self.failures = 0
+        self.openUntil = 0.0
+        self.lock = threading.Lock()
+
+    """------------------------------------------------------------"""
+    def wait(self):
+        """
+        Block while the breaker is open
+        """
+        while True:
+            with self.lock:
+                remaining = self.openUntil - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    """------------------------------------------------------------"""
+    def recordSuccess(self):
+        """
+        Close the breaker and let the request rate recover
+        """
+        with self.lock:
+            self.failures = 0
+            self.cooldown = self.baseCooldown
+            self.bucket.rate = min(self.baseRate, self.bucket.rate*1.1)
+
+    """------------------------------------------------------------"""
+    def recordFailure(self, throttled=False):
+        """
+        Count a retryable failure; open the breaker if there have been
+        too many in a row
+        """
+        with self.lock:
+            self.failures += 1
+            if throttled:
+                self.bucket.rate = max(self.minRate, self.bucket.rate/2.0)
+            if self.failures >= self.failureThreshold:
+                print 'Circuit breaker open: pausing ' + str(int(self.cooldown)) + ' seconds'
+                self.openUntil = time.time() + self.cooldown
+                self.cooldown = min(self.maxCooldown, self.cooldown*2)
+                self.failures = 0
+
+
+class RetryQueue:
+    """
+    A class to record failed requests (and the scraping job they
+    belong to) in a CSV file so they can be replayed later on their own
+    """
+
+    columns = ['Job', 'URL', 'Args', 'Kind', 'Error', 'Time']
+
+    def __init__(self, path='../../data/checkpoints/RetryQueue.csv'):
+        """
+        path - location of the queue file
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+    """------------------------------------------------------------"""
+    def add(self, job, url, args, error, kind=None):
+        """
+        Record a failure; args are the task arguments (JSON encoded)
+        """
+        if kind is None:
+            kind = classifyError(error)
+        row = pd.DataFrame([[job, url, json.dumps(list(args)), kind, unicode(repr(error)), time.time()]],
+                           columns=self.columns)
+        with self.lock:
+            row.to_csv(self.path, mode='a', header=not os.path.exists(self.path), index=False, encoding='utf-8')
+
+    """------------------------------------------------------------"""
+    def entries(self, job=None, kinds=('retryable',)):
+        """
+        Queued failures (latest entry per job and URL) as a dataframe;
+        only failures of the given kinds ('retryable', 'permanent' or
+        'parse') are returned
+        """
+        with self.lock:
+            if not os.path.exists(self.path):
+                return pd.DataFrame(columns=self.columns)
+            df = pd.read_csv(self.path, encoding='utf-8')
+        df = df.drop_duplicates(subset=['Job','URL'], keep='last')
+        if job is not None:
+            df = df[df.Job == job]
+        return df[df.Kind.isin(list(kinds))]
+
+    """------------------------------------------------------------"""
+    def tasks(self, job, kinds=('retryable',)):
+        """
+        Queued failures for a job as (url, args) tasks
+        """
+        df = self.entries(job, kinds)
+        return [(url, tuple(json.loads(args))) for url, args in zip(df.URL, df.Args)]
+
+    """------------------------------------------------------------"""
+    def resolve(self, job, urls):
+        """
+        Remove entries for URLs of a job that have now succeeded
+        """
+        urls = set(urls)
+        with self.lock:
+            if not urls or not os.path.exists(self.path):
+                return
+            df = pd.read_csv(self.path, encoding='utf-8')
+            resolved = (df.Job == job) & df.URL.isin(urls)
+            if resolved.any():
+                df[~resolved].to_csv(self.path, index=False, encoding='utf-8')
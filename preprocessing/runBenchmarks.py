@@ -0,0 +1,791 @@
+"""
+----------------------------------------------------------------------
+    runBenchmarks.py
+----------------------------------------------------------------------
+    Timing comparisons between the original and optimized versions of
+    pipeline steps; each benchmark prints and returns a dataframe
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import re
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from parseTables import extractTable, tableRows
+from cleanData import transformGameLogs_BR, dropTradedDuplicates
+from storeData import memoryUsage
+from prepareData import seasonSummary
+from buildFeatures import rollingWorkload, MINUTE_WINDOWS
+from makePredictions import selectFeatures, selectClusters
+from sklearn.cluster import KMeans
+from sklearn.metrics import silhouette_score
+from injuryModel import saveModel, loadModel, scoreRows
+from similarPlayers import SimilarPlayerIndex, loadIndex
+from clusterTracking import StreamingClusters
+from loadTracking import SPORTVU_FEATURES, trackingReadArgs, parsePercentages
+from backtestModel import runBacktest
+from sklearn.linear_model import LogisticRegression
+from sklearn.feature_selection import RFECV
+from sklearn.cross_validation import StratifiedKFold
+
+
+def timeIt(func, repeat=3):
+    """
+    Best wall-clock time (seconds) over several runs of func;
+    returns (seconds, result of the last run)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        result = func()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+"""----------------------------------------------------------------"""
+def benchmarkTableParsers(pageDir='../../data/pages', repeat=3):
+    """
+    Table extraction on saved pages: BeautifulSoup over the whole page
+    (original scraper) vs. targeted lxml extraction (parseTables)
+    """
+    tableIDs = ['pgl_basic', 'pgl_basic_playoffs', 'totals', 'per_game',
+                'playoffs_totals', 'playoffs_per_game', 'players']
+    # Read saved pages
+    pages = []
+    for root, dirs, files in os.walk(pageDir):
+        for fileName in files:
+            if fileName.endswith('.html'):
+                with open(os.path.join(root, fileName)) as f:
+                    pages.append(f.read())
+    if not pages:
+        print 'No saved pages found in ' + pageDir
+        return None
+    # ----------------
+    def soupPath():
+        parsed = []
+        for page_source in pages:
+            soup = BeautifulSoup(page_source)
+            for tableID in tableIDs:
+                table = soup.find('table', attrs={'id': tableID})
+                if table is None:
+                    continue
+                rows = table.findAll('tr')[1:]
+                rows = [r for r in rows if len(r.findAll('td')) > 0]
+                parsed.append([[col.getText() for col in row.findAll('td')] for row in rows])
+        return parsed
+    # ----------------
+    def lxmlPath():
+        parsed = []
+        for page_source in pages:
+            for tableID in tableIDs:
+                table = extractTable(page_source, tableID)
+                if table is None:
+                    continue
+                parsed.append(tableRows(table))
+        return parsed
+    # ----------------
+    soupTime, soupRows = timeIt(soupPath, repeat)
+    lxmlTime, lxmlRows = timeIt(lxmlPath, repeat)
+    if soupRows != lxmlRows:
+        print 'WARNING: parsers returned different rows'
+    df = pd.DataFrame({'Method':['BeautifulSoup (full page)', 'lxml (target tables)'],
+                       'Seconds':[soupTime, lxmlTime],
+                       'PagesPerSecond':[len(pages)/soupTime, len(pages)/lxmlTime],
+                       'Speedup':[1.0, soupTime/lxmlTime]})
+    df = df[['Method','Seconds','PagesPerSecond','Speedup']]
+    print 'Table parsers (' + str(len(pages)) + ' pages)'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def syntheticGameLogs(nRows, seed=0):
+    """
+    Random raw game logs (same columns and formats as
+    BR_Player_GameLogs__RAW.csv) for timing the cleaning steps
+    """
+    rng = np.random.RandomState(seed)
+    nPlayers = max(1, nRows // 400)
+    players = np.array(['Player %d' % i for i in range(nPlayers)], dtype=object)
+    teams = np.array(['ATL','BOS','BRK','CHI','CLE','DAL','DEN','DET','GSW','HOU',
+                      'IND','LAC','LAL','MEM','MIA','MIL','MIN','NOP','NYK','OKC',
+                      'ORL','PHI','PHO','POR','SAC','SAS','TOR','UTA','WAS','CHA'], dtype=object)
+    # Game status: played, inactive or did not play
+    status = rng.choice(3, nRows, p=[0.85, 0.1, 0.05])
+    played = status == 0
+    minutes = rng.randint(0, 48, nRows)
+    seconds = rng.randint(0, 60, nRows)
+    mp = np.array(['%d:%02d' % (m, sec) for m, sec in zip(minutes, seconds)], dtype=object)
+    mp[~played] = np.nan
+    gs = rng.randint(0, 2, nRows).astype(object)
+    gs[status == 1] = np.nan
+    gs[status == 2] = np.nan
+    ptDif = rng.randint(-30, 31, nRows)
+    ptDif[ptDif == 0] = 1
+    winLoss = np.array(['%s (%+d)' % ('W' if d > 0 else 'L', d) for d in ptDif], dtype=object)
+    homeAway = np.where(rng.rand(nRows) < 0.5, 'Away', np.nan).astype(object)
+    homeAway[homeAway == 'nan'] = np.nan
+    df = pd.DataFrame({
+        'Player': players[rng.randint(0, nPlayers, nRows)],
+        'Year': rng.randint(2010, 2015, nRows),
+        'Season': np.where(rng.rand(nRows) < 0.9, 'Regular', 'Playoffs'),
+        'Rk': rng.randint(1, 83, nRows),
+        'G': rng.randint(1, 83, nRows).astype(float),
+        'Date': pd.Timestamp('2013-11-01') + pd.to_timedelta(rng.randint(0, 160, nRows), unit='D'),
+        'Inactive': status == 1,
+        'DidNotPlay': status == 2,
+        'Age': np.array(['%d-%03d' % (y, d) for y, d in zip(rng.randint(19, 40, nRows), rng.randint(0, 365, nRows))], dtype=object),
+        'Tm': teams[rng.randint(0, len(teams), nRows)],
+        'HomeAway': homeAway,
+        'Opp': teams[rng.randint(0, len(teams), nRows)],
+        'WinLoss': winLoss,
+        'GS': gs,
+        'MP': mp})
+    # Counting stats
+    statCols = ['FG','FGA','FG%','3P','3PA','3P%','FT','FTA','FT%','ORB','DRB','TRB',
+                'AST','STL','BLK','TOV','PF','PTS','GmSc','+/-']
+    for col in statCols:
+        values = rng.randint(0, 15, nRows).astype(float)
+        values[~played] = np.nan
+        df[col] = values
+    columns = ['Player','Year','Season','Rk','G','Date','Inactive','DidNotPlay','Age','Tm',
+               'HomeAway','Opp','WinLoss','GS','MP'] + statCols
+    return df[columns]
+
+"""----------------------------------------------------------------"""
+def legacyCleanGameLogs(df):
+    """
+    Original cleanGameLogs_BR transform (per-row map/regex), kept to
+    check and time the vectorized version
+    """
+    df['MP'].fillna('999:0', inplace=True)
+    df['MP'] = df['MP'].map(lambda x: np.round(np.float(int(x.split(':')[0]) + np.float(x.split(':')[1])/60.0), decimals=2))
+    df.MP[df.MP == 999] = np.nan
+    df['Age'] = df['Age'].map(lambda x: np.round(np.float(int(x.split('-')[0]) + np.float(x.split('-')[1])/365.0), decimals=3))
+    df.insert(10, u'Home', True)
+    df.Home[df.HomeAway == u'Away'] = False
+    df.insert(12, u'Win', True)
+    df.Win = df.WinLoss.map(lambda x: re.findall('^([WL])', x)[0])
+    df.Win[df.Win == u'W'] = True
+    df.Win[df.Win == u'L'] = False
+    df.Win = df.Win.astype(np.bool)
+    df.insert(13, u'PtDif', 0)
+    df.PtDif = df.WinLoss.map(lambda x: np.int(re.findall('[+-]\d+', x)[0]))
+    df = df.drop(['HomeAway', 'WinLoss', 'FG%', '3P%', 'FT%', 'GmSc', '+/-'], axis=1)
+    reg_df = df[df.Season == u'Regular']
+    reg_df = reg_df.drop('Season', axis=1)
+    return reg_df
+
+"""----------------------------------------------------------------"""
+def benchmarkCleanGameLogs(baseRows=50000, scales=(1, 10, 100), repeat=1):
+    """
+    Game log cleaning on synthetic data at multiples of today's size:
+    per-row map/regex (original) vs. vectorized transformGameLogs_BR
+    """
+    results = []
+    for scale in scales:
+        raw = syntheticGameLogs(baseRows*scale)
+        legacyTime, legacy = timeIt(lambda: legacyCleanGameLogs(raw.copy()), repeat)
+        vectorTime, vector = timeIt(lambda: transformGameLogs_BR(raw.copy()), repeat)
+        results.append([scale, len(raw), legacyTime, vectorTime, legacyTime/vectorTime, legacy.equals(vector)])
+    df = pd.DataFrame(results, columns=['Scale','Rows','LegacySeconds','VectorizedSeconds','Speedup','SameOutput'])
+    print 'Game log cleaning'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def syntheticStatsSummary(nPlayers=4000, firstSeason=1950, lastSeason=2014, seed=0):
+    """
+    Random season summaries ordered like basketball-reference (a
+    traded player's TOT row comes before his per-team rows)
+    """
+    rng = np.random.RandomState(seed)
+    rows = []
+    for player in range(nPlayers):
+        start = rng.randint(firstSeason, lastSeason + 1)
+        for season in range(start, min(lastSeason, start + rng.randint(1, 16)) + 1):
+            nTeams = rng.choice([1, 2, 3], p=[0.85, 0.12, 0.03])
+            if nTeams > 1:
+                rows.append(['Player %d' % player, season, 'TOT'])
+            for team in rng.choice(30, nTeams, replace=False):
+                rows.append(['Player %d' % player, season, 'T%02d' % team])
+    df = pd.DataFrame(rows, columns=['Player','Season','Tm'])
+    df['PTS'] = rng.randint(0, 2500, len(df))
+    return df
+
+"""----------------------------------------------------------------"""
+def legacyDropTradedDuplicates(df):
+    """
+    Original cleanStatsSummary_BR loop (one df.drop per per-team row),
+    kept to check and time dropTradedDuplicates
+    """
+    playerSeasonInd = df.ix[df['Tm'].str.contains('TOT'), ['Player','Season']]
+    for indx in playerSeasonInd.index[::-1]:
+        dropPlayer = playerSeasonInd.ix[indx, 'Player']
+        dropSeason = playerSeasonInd.ix[indx, 'Season']
+        for i in range(3,0,-1):
+            if indx+i in df.index and df.ix[indx+i, 'Player'] == dropPlayer and df.ix[indx+i, 'Season'] == dropSeason:
+                df = df.drop(indx+i)
+    return df
+
+"""----------------------------------------------------------------"""
+def benchmarkTradedDuplicates(nPlayers=4000, repeat=1):
+    """
+    Traded-player cleanup on a synthetic 1950-2014 stats history:
+    row-by-row drop loop (original) vs. set-based dropTradedDuplicates
+    """
+    raw = syntheticStatsSummary(nPlayers)
+    legacyTime, legacy = timeIt(lambda: legacyDropTradedDuplicates(raw.copy()), repeat)
+    setTime, setBased = timeIt(lambda: dropTradedDuplicates(raw.copy()), repeat)
+    df = pd.DataFrame([[len(raw), legacyTime, setTime, legacyTime/setTime, legacy.equals(setBased)]],
+                      columns=['Rows','LegacySeconds','SetBasedSeconds','Speedup','SameOutput'])
+    print 'Traded player cleanup'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def benchmarkCompactDtypes(baseRows=50000, scales=(1, 10)):
+    """
+    Memory of cleaned synthetic game logs with default types vs. the
+    compact schema in storeData
+    """
+    results = []
+    for scale in scales:
+        reg_df = transformGameLogs_BR(syntheticGameLogs(baseRows*scale))
+        # Cleaned logs keep the player ID only (as PlayerRegistry.addIDs
+        # with keepName=False)
+        reg_df.insert(0, 'PlayerID', pd.factorize(reg_df.Player)[0] + 1)
+        reg_df = reg_df.drop('Player', axis=1)
+        default, compact = memoryUsage(reg_df, 'BR_Player_GameLogs_RegularSeason')
+        results.append([scale, len(reg_df), default/1e6, compact/1e6, float(compact)/default])
+    df = pd.DataFrame(results, columns=['Scale','Rows','DefaultMB','CompactMB','Fraction'])
+    print 'Game log memory'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def syntheticSeasonData(nPlayers=2000, firstYear=2010, lastYear=2014, seed=0):
+    """
+    Random game logs, season stats (columns already prefixed with
+    PerGame/Tot) and demographics, with player names and IDs, for
+    timing the season summaries; returns (df_gl, df_pg, df_tot, df_demo)
+    """
+    rng = np.random.RandomState(seed)
+    players = np.array(['Player %d' % i for i in range(nPlayers)], dtype=object)
+    # Player seasons (most players play most years)
+    playerInd, years = np.meshgrid(np.arange(nPlayers), np.arange(firstYear, lastYear + 1))
+    keep = rng.rand(playerInd.size) < 0.8
+    playerInd = playerInd.ravel()[keep]
+    years = years.ravel()[keep]
+    nSeasons = len(years)
+    # Game logs: one row per team game, G missing for games missed
+    nGames = np.array([82 if year != 2012 else 66 for year in years])
+    rowSeason = np.repeat(np.arange(nSeasons), nGames)
+    rowGame = np.arange(len(rowSeason)) - np.repeat(np.cumsum(nGames) - nGames, nGames)
+    openingDays = np.array([np.datetime64('%d-10-28' % (year - 1)) for year in years])
+    status = rng.choice(3, len(rowSeason), p=[0.85, 0.1, 0.05])
+    df_gl = pd.DataFrame({'PlayerID':playerInd[rowSeason] + 1,
+                          'Player':players[playerInd[rowSeason]],
+                          'Year':years[rowSeason],
+                          'Tm':'ATL',
+                          'Date':openingDays[rowSeason] + rowGame.astype('timedelta64[D]'),
+                          'G':np.where(status == 0, 1.0, np.nan),
+                          'GS':np.where(status == 0, rng.randint(0, 2, len(rowSeason)), np.nan),
+                          'Inactive':status == 1,
+                          'DidNotPlay':status == 2})
+    df_gl = df_gl[['PlayerID','Player','Year','Tm','Date','G','GS','Inactive','DidNotPlay']]
+    # Season stats
+    basic = pd.DataFrame({'PlayerID':playerInd + 1, 'Player':players[playerInd], 'Season':years,
+                          'Age':rng.randint(19, 40, nSeasons).astype(float),
+                          'Tm':'ATL', 'Pos':rng.randint(1, 6, nSeasons),
+                          'G':rng.randint(1, 83, nSeasons).astype(float),
+                          'GS':rng.randint(0, 83, nSeasons).astype(float)})
+    basic = basic[['PlayerID','Player','Season','Age','Tm','Pos','G','GS']]
+    df_pg = basic.copy()
+    df_tot = basic.copy()
+    for col in ['MP','PTS','TRB','AST']:
+        df_pg['PerGame' + col] = rng.uniform(0, 40, nSeasons)
+        df_tot['Tot' + col] = df_pg['PerGame' + col]*df_tot['G']
+    # Demographics
+    df_demo = pd.DataFrame({'PlayerID':np.arange(nPlayers) + 1, 'Player':players,
+                            'Height':rng.randint(70, 88, nPlayers),
+                            'Weight':rng.randint(160, 300, nPlayers)})
+    df_demo = df_demo[['PlayerID','Player','Height','Weight']]
+    return df_gl, df_pg, df_tot, df_demo
+
+"""----------------------------------------------------------------"""
+def legacySeasonSummary(df_gl, df_pg, df_tot, df_demo):
+    """
+    Original getSeasonSummary_BR (2014 from Inactive games, then a
+    rescan of the game logs and stats tables for each earlier year),
+    kept to check and time prepareData.seasonSummary
+    """
+    df2014_sum = df_gl[df_gl.Year == 2014]
+    df2014_sum = df2014_sum.groupby(['Player','Year'])['Inactive','DidNotPlay'].sum()
+    df2014_sum = df2014_sum.reset_index()
+    df2014_sum = df2014_sum.drop(['Year','DidNotPlay'], axis=1)
+    df2014_sum = df2014_sum.rename(columns = {'Inactive':'GamesMissed_2014'})
+    df2014_tot = df_tot[df_tot.Season == 2014]
+    df2014_tot = df2014_tot.drop('Season' , axis=1)
+    df2014_pg = df_pg[df_pg.Season == 2014]
+    df2014_pg = df2014_pg.drop(['Season','Age','Tm','Pos','G','GS'], axis=1)
+    df2014_merge = pd.merge(df_demo, df2014_tot, on='Player', how='inner')
+    df2014_merge = pd.merge(df2014_merge, df2014_pg, on='Player', how='inner')
+    df2014_merge = pd.merge(df2014_merge, df2014_sum, on='Player', how='inner')
+    df2014_merge = df2014_merge[df2014_merge.PerGameMP >= 15]
+    df2014 = df2014_merge[~df2014_merge.duplicated(subset='Player')]
+    df2014_write = df2014.rename(columns = {'GamesMissed_2014':'GamesMissedCur'})
+    df2014_write.insert(0, u'Year', 2014)
+    # ----------------
+    def getYearDS(year):
+        dfyear_sum = df_gl[df_gl.Year == year]
+        dfyear_sum = dfyear_sum.groupby(['Player','Year'])['G','GS'].count()
+        dfyear_sum = dfyear_sum.reset_index()
+        dfyear_sum = dfyear_sum.drop(['Year','GS'], axis=1)
+        if year != 2012:
+            dfyear_sum['GamesMissed_'+str(year)] = 82 - dfyear_sum['G']
+        else:
+            dfyear_sum['GamesMissed_'+str(year)] = 66 - dfyear_sum['G']
+        dfyear_sum = dfyear_sum.drop('G', axis=1)
+        dfyear_pg = df_pg[df_pg.Season == year]
+        dfyear_pg = dfyear_pg.drop(['Season','Age','Tm','Pos','G','GS'], axis=1)
+        dfyear_tot = df_tot[df_tot.Season == year]
+        dfyear_tot = dfyear_tot.drop('Season', axis=1)
+        df_merge = pd.merge(df_demo, dfyear_tot, on='Player', how='inner')
+        df_merge = pd.merge(df_merge, dfyear_pg, on='Player', how='inner')
+        df_merge = pd.merge(df_merge, dfyear_sum, on='Player', how='inner')
+        df_merge = df_merge[df_merge.PerGameMP >= 15]
+        return df_merge[~df_merge.duplicated(subset='Player')]
+    # ----------------
+    writes = [df2014_write]
+    nextDF = df2014
+    for year in [2013, 2012, 2011, 2010]:
+        dfyear = getYearDS(year)
+        nextCol = 'GamesMissed_' + str(year + 1)
+        dfyear_write = pd.merge(dfyear, nextDF[['Player', nextCol]], on='Player')
+        dfyear_write = dfyear_write.rename(columns = {'GamesMissed_'+str(year):'GamesMissedCur', nextCol:'GamesMissedNext'})
+        dfyear_write.insert(0, u'Year', year)
+        writes.append(dfyear_write)
+        nextDF = dfyear
+    summary = pd.concat(writes)
+    return summary[writes[1].columns]
+
+"""----------------------------------------------------------------"""
+def sameSummary(a, b):
+    """
+    Check that two season summaries have the same rows (in any order)
+    """
+    a = a.sort(columns=['Year','Player']).reset_index(drop=True)
+    b = b.sort(columns=['Year','Player']).reset_index(drop=True)
+    if a.shape != b.shape or set(a.columns) != set(b.columns):
+        return False
+    b = b[a.columns]
+    for col in a.columns:
+        if a[col].dtype.kind in 'biuf':
+            if not np.allclose(a[col].fillna(-1).astype(float), b[col].fillna(-1).astype(float)):
+                return False
+        elif not (a[col].values == b[col].values).all():
+            return False
+    return True
+
+"""----------------------------------------------------------------"""
+def benchmarkSeasonSummary(nPlayers=2000, repeat=1):
+    """
+    Season summaries for 2010-2014 on synthetic data: per-year loop
+    on player names (original) vs. single pass on player IDs
+    (prepareData.seasonSummary)
+    """
+    df_gl, df_pg, df_tot, df_demo = syntheticSeasonData(nPlayers)
+    # The original joins on names only
+    nameTables = [df.drop('PlayerID', axis=1) for df in [df_gl, df_pg, df_tot]]
+    legacyTime, legacy = timeIt(lambda: legacySeasonSummary(*(nameTables + [df_demo])), repeat)
+    passTime, singlePass = timeIt(lambda: seasonSummary(df_gl, df_pg, df_tot, df_demo), repeat)
+    df = pd.DataFrame([[len(df_gl), legacyTime, passTime, legacyTime/passTime, sameSummary(legacy, singlePass)]],
+                      columns=['GameLogRows','LegacySeconds','SinglePassSeconds','Speedup','SameOutput'])
+    print 'Season summaries'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def syntheticWorkloadLogs(nPlayers=450, firstYear=2005, lastYear=2014, seed=0):
+    """
+    Random regular season game logs (PlayerID, Year, Date, G, MP) with
+    82 games per season, one to three days apart
+    """
+    rng = np.random.RandomState(seed)
+    frames = []
+    for year in range(firstYear, lastYear + 1):
+        # Each player's team schedule for the season
+        gaps = rng.randint(1, 4, (nPlayers, 82))
+        days = np.cumsum(gaps, axis=1)
+        dates = pd.Timestamp(str(year - 1) + '-10-28') + pd.to_timedelta(days.ravel(), unit='D')
+        played = rng.rand(nPlayers*82) < 0.85
+        frames.append(pd.DataFrame({'PlayerID':np.repeat(np.arange(1, nPlayers + 1), 82),
+                                    'Year':year,
+                                    'Date':dates,
+                                    'G':np.where(played, 1.0, np.nan),
+                                    'MP':np.where(played, rng.uniform(5, 45, nPlayers*82), np.nan)}))
+    df = pd.concat(frames, ignore_index=True)
+    return df[['PlayerID','Year','Date','G','MP']]
+
+"""----------------------------------------------------------------"""
+def loopWorkload(df_gl):
+    """
+    Per-player Python loop over games (scanning back through each
+    window), kept to check and time buildFeatures.rollingWorkload
+    """
+    rows = []
+    played = df_gl[df_gl.G.notnull()]
+    for playerID, games in played.groupby('PlayerID'):
+        games = games.sort(columns='Date')
+        dates = games.Date.tolist()
+        years = games.Year.tolist()
+        minutes = games.MP.fillna(0).tolist()
+        for i in range(len(dates)):
+            row = [playerID, years[i], dates[i], minutes[i]]
+            for days in MINUTE_WINDOWS:
+                total = 0.0
+                j = i
+                while j >= 0 and (dates[i] - dates[j]).days < days:
+                    total += minutes[j]
+                    j -= 1
+                row.append(total)
+            row.append(i > 0 and (dates[i] - dates[i-1]).days == 1)
+            j = i
+            while j >= 0 and (dates[i] - dates[j]).days < 5:
+                j -= 1
+            row.append(i - j)
+            rows.append(row)
+    columns = ['PlayerID','Year','Date','MP'] + ['Minutes' + str(days) + 'd' for days in MINUTE_WINDOWS]
+    return pd.DataFrame(rows, columns=columns + ['BackToBack','Games5Nights'])
+
+"""----------------------------------------------------------------"""
+def benchmarkWorkload(nPlayers=450, loopPlayers=50, repeat=1):
+    """
+    Rolling workload features on ten synthetic seasons: per-player
+    loop (on loopPlayers players) vs. vectorized rollingWorkload (on
+    the same players and on all nPlayers)
+    """
+    df_gl = syntheticWorkloadLogs(nPlayers)
+    subset = df_gl[df_gl.PlayerID <= loopPlayers]
+    loopTime, loop = timeIt(lambda: loopWorkload(subset), repeat)
+    vectorTime, vector = timeIt(lambda: rollingWorkload(subset), repeat)
+    fullTime, _ = timeIt(lambda: rollingWorkload(df_gl), repeat)
+    featureCols = ['Minutes' + str(days) + 'd' for days in MINUTE_WINDOWS] + ['BackToBack','Games5Nights']
+    same = (len(loop) == len(vector) and
+            np.allclose(loop[featureCols].values.astype(float), vector[featureCols].values.astype(float), atol=1e-3))
+    df = pd.DataFrame([['Per-player loop', loopPlayers, len(subset), loopTime, same],
+                       ['Vectorized', loopPlayers, len(subset), vectorTime, same],
+                       ['Vectorized', nPlayers, len(df_gl), fullTime, None]],
+                      columns=['Method','Players','Rows','Seconds','SameOutput'])
+    print 'Rolling workload features (10 seasons)'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def syntheticModelData(nRows=2000, nFeatures=30, seed=0):
+    """
+    Random model data: features (a few of them informative) and
+    binary labels
+    """
+    rng = np.random.RandomState(seed)
+    X = pd.DataFrame(rng.randn(nRows, nFeatures), columns=['F' + str(i) for i in range(nFeatures)])
+    weights = np.zeros(nFeatures)
+    weights[:5] = rng.uniform(0.5, 2, 5)
+    y = (X.values.dot(weights) + rng.randn(nRows) > 0).astype(int)
+    return X, y
+
+"""----------------------------------------------------------------"""
+def benchmarkFeatureSelection(nRows=2000, nFeatures=30, repeat=1):
+    """
+    Recursive feature elimination with 10-fold CV: RFECV (original,
+    single process) vs. makePredictions.selectFeatures with one
+    process, one per CPU, and from its cache
+    """
+    X, y = syntheticModelData(nRows, nFeatures)
+    # ----------------
+    def legacy():
+        rfecv = RFECV(estimator=LogisticRegression(), step=1, cv=StratifiedKFold(y, n_folds=10), scoring='accuracy')
+        rfecv.fit(X, y)
+        return rfecv.support_
+    # ----------------
+    legacyTime, legacySupport = timeIt(legacy, repeat)
+    serialTime, (serial, _) = timeIt(lambda: selectFeatures(X, y, nJobs=1, cachePath=None), repeat)
+    parallelTime, (parallel, _) = timeIt(lambda: selectFeatures(X, y, nJobs=-1, cachePath=None), repeat)
+    cachePath = os.path.join(tempfile.mkdtemp(), 'FeatureSelection.json')
+    selectFeatures(X, y, cachePath=cachePath)
+    cachedTime, (cached, _) = timeIt(lambda: selectFeatures(X, y, cachePath=cachePath), repeat)
+    df = pd.DataFrame([['RFECV', legacyTime, True],
+                       ['Folds in 1 process', serialTime, (serial == legacySupport).all()],
+                       ['Folds in parallel', parallelTime, (parallel == legacySupport).all()],
+                       ['Cached', cachedTime, (cached == legacySupport).all()]],
+                      columns=['Method','Seconds','SameSupport'])
+    df['Speedup'] = legacyTime/df.Seconds
+    print 'Feature selection (' + str(nRows) + ' rows, ' + str(nFeatures) + ' features)'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def benchmarkModelScoring(nRows=2000, nFeatures=30, repeat=10):
+    """
+    Scoring one new player: refitting the model (feature selection and
+    logistic regression, as classifyData did) vs. loading a saved model
+    version and scoring with injuryModel.scoreRows
+    """
+    X, y = syntheticModelData(nRows, nFeatures)
+    player = X.iloc[:1]
+    # ----------------
+    def refit():
+        support, _ = selectFeatures(X, y, nJobs=1, cachePath=None)
+        logreg = LogisticRegression().fit(X.ix[:, support], y)
+        return np.round(logreg.predict_proba(player.ix[:, support])[:,1]*100), logreg, support
+    # ----------------
+    refitTime, (refitted, logreg, support) = timeIt(refit, 1)
+    directory = tempfile.mkdtemp()
+    saveModel(logreg, X.columns, support, directory=directory)
+    loadTime, scored = timeIt(lambda: scoreRows(player, loadModel(directory=directory)), repeat)
+    df = pd.DataFrame([['Refit model', refitTime*1000, True],
+                       ['Load saved model', loadTime*1000, np.array_equal(refitted, scored)]],
+                      columns=['Method','Milliseconds','SameProbability'])
+    print 'Scoring one player'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def legacySimilarPlayers(df, k=18):
+    """
+    Original clusterData lookup: players in each cluster sorted by
+    minutes, points and games, similar players taken from the list
+    around each player (df has Player as index and a Cluster column)
+    """
+    df = df.copy()
+    df.insert(0,'SimilarPlayers','')
+    for i in range(k):
+        players = df.ix[df.Cluster == i, ['Games_Played','Minutes_Per_Game','Points_Per_Game']]
+        sortPlayers = players.sort(columns = ['Minutes_Per_Game','Points_Per_Game','Games_Played'], ascending=False)
+        playerList = sortPlayers.index.values.tolist()
+        for player in playerList:
+            playerInd = playerList.index(player)
+            if playerInd <= 2:
+                df.loc[player,'SimilarPlayers'] = ', '.join(set(playerList[0:4])-set([playerList[playerInd]]))
+            elif playerInd >= len(playerList)-3:
+                df.loc[player,'SimilarPlayers'] = ', '.join(set(playerList[-4:])-set([playerList[playerInd]]))
+            else:
+                df.loc[player,'SimilarPlayers'] = ', '.join(set(playerList[playerInd-2:playerInd+2])-set([playerList[playerInd]]))
+    return df['SimilarPlayers']
+
+"""----------------------------------------------------------------"""
+def benchmarkSimilarPlayers(nPlayers=5000, nFeatures=17, repeat=1):
+    """
+    Similar players for every player: original per-cluster list lookup
+    vs. building a SimilarPlayerIndex (one batched query), plus a
+    single-player lookup from the saved index
+    """
+    rng = np.random.RandomState(0)
+    features = ['Games_Played','Minutes_Per_Game','Points_Per_Game'] + ['F' + str(i) for i in range(nFeatures - 3)]
+    data = rng.rand(nPlayers, nFeatures)
+    names = ['Player ' + str(i) for i in range(nPlayers)]
+    df = pd.DataFrame(data, columns=features, index=names)
+    df['Cluster'] = rng.randint(0, 18, nPlayers)
+    legacyTime, _ = timeIt(lambda: legacySimilarPlayers(df), repeat)
+    indexTime, index = timeIt(lambda: SimilarPlayerIndex(data, np.arange(nPlayers), names), repeat)
+    path = os.path.join(tempfile.mkdtemp(), 'SimilarPlayers.pkl')
+    index.save(path)
+    loaded = loadIndex(path)
+    lookupTime, _ = timeIt(lambda: loaded.similarTo(nPlayers/2), 1000)
+    # Check against a brute-force search
+    standardized = loaded.standardize(data[:100])
+    distances = ((standardized[:, np.newaxis, :] - loaded.standardize(data)[np.newaxis, :, :])**2).sum(axis=2)
+    distances[np.arange(100), np.arange(100)] = np.inf
+    same = np.array_equal(np.argsort(distances, axis=1)[:, :3], loaded.neighbours[:100])
+    df = pd.DataFrame([['Per-cluster list (all players)', legacyTime*1000, None],
+                       ['Build index + batch query (all players)', indexTime*1000, same],
+                       ['Saved index lookup (one player)', lookupTime*1000, same]],
+                      columns=['Method','Milliseconds','SameAsBruteForce'])
+    print 'Similar players (' + str(nPlayers) + ' players)'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def legacyClusterSweep(data, kRange):
+    """
+    Silhouette score for each k, one after another, with KMeans (25
+    inits) and the full silhouette
+    """
+    scores = []
+    for k in kRange:
+        kmeans = KMeans(n_clusters=k, n_init=25, random_state=0)
+        kmeans.fit(data)
+        scores.append(silhouette_score(data, kmeans.labels_))
+    return int(list(kRange)[np.argmax(scores)])
+
+"""----------------------------------------------------------------"""
+def benchmarkClusterSweep(sizes=(500, 5000), kRange=range(2, 21)):
+    """
+    Choosing the number of clusters on random standardized data: serial
+    sweep (KMeans + full silhouette) vs. makePredictions.selectClusters
+    (in parallel, then from its cache)
+    """
+    rng = np.random.RandomState(0)
+    rows = []
+    for nRows in sizes:
+        data = rng.randn(nRows, 17)
+        legacyTime, legacyK = timeIt(lambda: legacyClusterSweep(data, kRange), 1)
+        parallelTime, (parallelK, _) = timeIt(lambda: selectClusters(data, kRange, cachePath=None), 1)
+        cachePath = os.path.join(tempfile.mkdtemp(), 'ClusterSelection.json')
+        selectClusters(data, kRange, cachePath=cachePath)
+        cachedTime, _ = timeIt(lambda: selectClusters(data, kRange, cachePath=cachePath), 1)
+        rows.append([nRows, legacyTime, parallelTime, cachedTime, legacyK, parallelK])
+    df = pd.DataFrame(rows, columns=['Rows','SerialSeconds','ParallelSeconds','CachedSeconds','SerialK','ParallelK'])
+    print 'Cluster sweep (k = ' + str(min(kRange)) + '-' + str(max(kRange)) + ')'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def benchmarkStreamingClusters(sizes=(20000, 200000), chunksize=5000, k=18):
+    """
+    Clustering random player-season rows: full-batch KMeans (25 inits,
+    whole matrix in memory) vs. StreamingClusters fed chunksize rows
+    at a time. Inertia is the within-cluster sum of squares of the
+    standardized rows (lower is better)
+    """
+    rng = np.random.RandomState(0)
+    rows = []
+    for nRows in sizes:
+        centres = rng.randn(k, 17)*3
+        data = centres[rng.randint(0, k, nRows)] + rng.randn(nRows, 17)
+        chunks = [data[i:i+chunksize] for i in range(0, nRows, chunksize)]
+        # ----------------
+        def streaming():
+            clusters = StreamingClusters(k)
+            for chunk in chunks:
+                clusters.updateScale(chunk)
+            clusters.finishScale()
+            for _ in range(3):
+                for chunk in chunks:
+                    clusters.partialFit(chunk)
+            return clusters
+        # ----------------
+        streamTime, clusters = timeIt(streaming, 1)
+        standardized = clusters.standardize(data)
+        batchTime, kmeans = timeIt(lambda: KMeans(n_clusters=k, n_init=25, random_state=0).fit(standardized), 1)
+        streamInertia = ((standardized - clusters.model.cluster_centers_[clusters.predict(data)])**2).sum()
+        rows.append([nRows, batchTime, streamTime, nRows, chunksize, kmeans.inertia_, streamInertia])
+    df = pd.DataFrame(rows, columns=['Rows','BatchSeconds','StreamingSeconds','BatchRowsInMemory',
+                                     'StreamingRowsInMemory','BatchInertia','StreamingInertia'])
+    print 'Streaming clusters (k = ' + str(k) + ')'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def syntheticTracking(nRows, nExtra=40, seed=0):
+    """
+    Random SportVU-like table: player names, the SPORTVU_FEATURES
+    columns and extra numeric and percentage columns not used by the
+    models (percentages as strings, e.g. '45.2%')
+    """
+    rng = np.random.RandomState(seed)
+    df = pd.DataFrame({'Player':['Player ' + str(i) for i in range(nRows)]})
+    extra = ['Extra_' + str(i) for i in range(nExtra/2)] + ['Extra_Percent_' + str(i) for i in range(nExtra/2)]
+    for col in SPORTVU_FEATURES + extra:
+        if 'ercent' in col:
+            df[col] = [str(x) + '%' for x in np.round(rng.uniform(0, 100, nRows), 1)]
+        else:
+            df[col] = np.round(rng.uniform(0, 40, nRows), 1)
+    return df
+
+"""----------------------------------------------------------------"""
+def legacyReadTracking(path):
+    """
+    Original clusterData parsing: read every column, convert each
+    percentage value with a Python function, then pick the features
+    """
+    df_in = pd.read_csv(path)
+    for col in df_in.columns.values.tolist():
+        if 'ercent' in col:
+            df_in[col] = df_in[col].map(lambda x: float(x[:-1])/100)
+    return df_in[SPORTVU_FEATURES].values
+
+"""----------------------------------------------------------------"""
+def benchmarkTrackingLoad(sizes=(500, 50000, 500000), repeat=3):
+    """
+    Reading the SportVU feature matrix: original parsing vs. typed
+    read (loadTracking.trackingReadArgs + parsePercentages) vs.
+    opening the saved .npy memory-mapped
+    """
+    directory = tempfile.mkdtemp()
+    rows = []
+    for nRows in sizes:
+        path = os.path.join(directory, 'tracking.csv')
+        syntheticTracking(nRows).to_csv(path, index=False)
+        legacyTime, legacy = timeIt(lambda: legacyReadTracking(path), repeat)
+        # ----------------
+        def typed():
+            df = parsePercentages(pd.read_csv(path, **trackingReadArgs(SPORTVU_FEATURES)))
+            return np.ascontiguousarray(df[SPORTVU_FEATURES].values, dtype=np.float32)
+        # ----------------
+        typedTime, data = timeIt(typed, repeat)
+        npyPath = os.path.join(directory, 'tracking.npy')
+        np.save(npyPath, data)
+        mmapTime, mapped = timeIt(lambda: np.load(npyPath, mmap_mode='r'), repeat)
+        same = np.allclose(legacy, data, atol=1e-4) and np.array_equal(data, mapped)
+        rows.append([nRows, legacyTime, typedTime, mmapTime, legacy.nbytes, data.nbytes, same])
+    df = pd.DataFrame(rows, columns=['Rows','LegacySeconds','TypedSeconds','MmapSeconds',
+                                     'LegacyBytes','Float32Bytes','SameOutput'])
+    print 'SportVU feature matrix'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def benchmarkBacktest(nSeasons=20, rowsPerSeason=5000, nFeatures=40):
+    """
+    Walk-forward backtest on random seasons of model data: seasons
+    scored one after another vs. in parallel (shared memory-mapped
+    arrays)
+    """
+    X, y = syntheticModelData(nSeasons*rowsPerSeason, nFeatures)
+    seasons = np.repeat(np.arange(2014 - nSeasons, 2014), rowsPerSeason).astype(np.int16)
+    directory = tempfile.mkdtemp()
+    serialTime, serial = timeIt(lambda: runBacktest(X.values, y, seasons, nJobs=1, directory=directory), 1)
+    parallelTime, parallel = timeIt(lambda: runBacktest(X.values, y, seasons, nJobs=-1, directory=directory), 1)
+    same = np.allclose(serial.Accuracy, parallel.Accuracy)
+    df = pd.DataFrame([['One process', len(serial), serialTime, serial.Seconds.sum(), same],
+                       ['Parallel', len(parallel), parallelTime, parallel.Seconds.sum(), same]],
+                      columns=['Method','Seasons','WallSeconds','SumOfSeasonSeconds','SameMetrics'])
+    print 'Walk-forward backtest (' + str(nSeasons) + ' seasons)'
+    print df.to_string(index=False)
+    return df
+
+"""----------------------------------------------------------------"""
+def main():
+    """
+    Main function for running
+    """
+    benchmarkTableParsers()
+    benchmarkCleanGameLogs()
+    benchmarkTradedDuplicates()
+    benchmarkCompactDtypes()
+    benchmarkSeasonSummary()
+    benchmarkWorkload()
+    benchmarkFeatureSelection()
+    benchmarkModelScoring()
+    benchmarkSimilarPlayers()
+    benchmarkClusterSweep()
+    benchmarkStreamingClusters()
+    benchmarkTrackingLoad()
+    benchmarkBacktest()
+
+
+"""*******************************************************************
+*                                                                    *
+*                   Script Execution                                 *
+*                                                                    *
+*******************************************************************"""
+if __name__ == '__main__':
+    main()
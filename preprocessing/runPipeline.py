@@ -0,0 +1,385 @@
+"""
+----------------------------------------------------------------------
+    runPipeline.py
+----------------------------------------------------------------------
+    Runs the data pipeline (cleaning -> season summaries -> model
+    tables -> predictions -> MySQL) like make: each step declares the
+    tables it reads and writes, and a step is skipped when the
+    contents of its inputs (and its code) are the same as the last
+    time it ran and its outputs are still there
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import hashlib
+import multiprocessing
+import pandas as pd
+from storeData import tableHash, tableExists
+import storeData
+import playerRegistry
+import injuryModel
+import similarPlayers
+import cleanData
+import prepareData
+import buildFeatures
+import makePredictions
+import backtestModel
+import clusterTracking
+import loadTracking
+import loadMySQL
+
+
+# Helper modules whose code can change any step's results (table
+# schemas, player IDs); part of every step's signature
+SHARED_MODULES = [storeData, playerRegistry]
+
+
+class Node:
+    """
+    A class to describe one pipeline step: a function with its
+    arguments and the tables it reads and writes
+    """
+
+    def __init__(self, name, func, inputs, outputs, args=(), inProcess=False, modules=()):
+        """
+        name      - unique name of the step
+        func      - function to run
+        inputs    - names of the tables it reads
+        outputs   - names of the tables it writes
+        args      - arguments passed to func
+        inProcess - run in the pipeline's own process even when running
+                    in parallel (for steps that start their own worker
+                    processes, which pool workers cannot do)
+        modules   - other modules whose code the results depend on
+                    (besides the step's own module and SHARED_MODULES)
+        """
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.args = tuple(args)
+        self.inProcess = inProcess
+        self.modules = list(modules)
+
+    """------------------------------------------------------------"""
+    def signature(self):
+        """
+        Hash of everything that decides the step's results: the
+        contents of its inputs, its arguments and its code (the whole
+        module, so changes to helper functions count, plus the shared
+        helper modules and any the step lists)
+        """
+        sha = hashlib.sha1()
+        for name in self.inputs:
+            sha.update(name + '=' + str(tableHash(name)) + '\n')
+        sha.update(repr(self.args) + '\n')
+        modules = [inspect.getmodule(self.func)] + SHARED_MODULES + self.modules
+        for module in modules:
+            sha.update(inspect.getsource(module))
+        return sha.hexdigest()
+
+    """------------------------------------------------------------"""
+    def run(self):
+        """
+        Run the step
+        """
+        self.func(*self.args)
+
+
+"""----------------------------------------------------------------"""
+def runStep(func, args):
+    """
+    Run a pipeline step (in a worker process when running in
+    parallel); returns the seconds taken
+    """
+    start = time.time()
+    func(*args)
+    return time.time() - start
+
+"""----------------------------------------------------------------"""
+def pipelineNodes():
+    """
+    Steps of the pipeline (the player registry is shared by several
+    steps but only ever gains new IDs, under a file lock, so it is not
+    tracked and does not stop steps running at the same time)
+    """
+    total = 'BR_Player_StatsSummary_RegularSeason_Total'
+    perGame = 'BR_Player_StatsSummary_RegularSeason_PerGame'
+    modelTables = ['BR_Player_Summary_BuildModel', 'BR_Player_Summary_BuildModel_Train',
+                   'BR_Player_Summary_BuildModel_Test', 'BR_Player_Summary_Predict']
+    return [
+        Node('cleanDemographics_NBA', cleanData.cleanDemographics_NBA,
+             ['NBA_Player_Demographics__RAW', 'NBA_Player_ProfileLinks__RAW'],
+             ['NBA_Player_Demographics']),
+        Node('cleanGameLogs_BR', cleanData.cleanGameLogs_BR,
+             ['BR_Player_GameLogs__RAW'], ['BR_Player_GameLogs_RegularSeason']),
+        Node('cleanStatsSummary_BR_Total', cleanData.cleanStatsSummary_BR,
+             [total + '__RAW'], [total], args=(total,)),
+        Node('cleanStatsSummary_BR_PerGame', cleanData.cleanStatsSummary_BR,
+             [perGame + '__RAW'], [perGame], args=(perGame,)),
+        Node('getSeasonSummary_BR', prepareData.getSeasonSummary_BR,
+             ['BR_Player_Demographics__RAW', 'BR_Player_GameLogs_RegularSeason', perGame, total],
+             ['BR_Player_Summary_RegularSeason']),
+        Node('buildWorkload_BR', buildFeatures.buildWorkload_BR,
+             ['BR_Player_GameLogs_RegularSeason'], ['BR_Player_Workload']),
+        Node('getClassificationData', prepareData.getClassificationData,
+             ['BR_Player_Summary_RegularSeason', 'BR_Player_Workload'], modelTables),
+        Node('classifyData', makePredictions.classifyData,
+             modelTables, ['Predict_InjuryRisk'], inProcess=True, modules=[injuryModel]),
+        Node('backtestModel', backtestModel.backtestModel,
+             ['BR_Player_Summary_BuildModel'], ['Backtest_InjuryRisk'], inProcess=True,
+             modules=[makePredictions]),
+        Node('clusterData', makePredictions.clusterData,
+             ['NBA_Player_SportVU_RegularSeason_2014'], ['Predict_SimilarPlayers'],
+             modules=[similarPlayers, loadTracking]),
+        Node('clusterSeasons', clusterTracking.clusterSeasons,
+             [name for name, season in loadTracking.trackingTables()], ['Predict_SeasonClusters'],
+             modules=[loadTracking]),
+        Node('loadMySQL_NBA_Teams', loadMySQL.loadTable,
+             ['NBA_Teams'], [], args=('NBA_Teams', 'City')),
+        Node('loadMySQL_NBA_Player_Demographics', loadMySQL.loadTable,
+             ['NBA_Player_Demographics'], [], args=('NBA_Player_Demographics', 'Player')),
+        Node('loadMySQL_Predict_SimilarPlayers', loadMySQL.loadTable,
+             ['Predict_SimilarPlayers'], [], args=('Predict_SimilarPlayers', 'Player')),
+        Node('loadMySQL_Predict_InjuryRisk', loadMySQL.loadTable,
+             ['Predict_InjuryRisk'], [], args=('Predict_InjuryRisk', 'Player')),
+    ]
+
+
+class Pipeline:
+    """
+    A class to run pipeline steps in dependency order, skipping those
+    whose inputs have not changed; independent steps can run at the
+    same time in a process pool (steps marked inProcess, which start
+    their own worker processes, run in this process instead).
+    Signatures of finished steps are kept in a JSON file between runs
+    """
+
+    def __init__(self, nodes, statePath='../../data/checkpoints/Pipeline.json'):
+        """
+        nodes     - list of Node
+        statePath - location of the saved step signatures
+        """
+        self.nodes = dict((node.name, node) for node in nodes)
+        self.order = [node.name for node in nodes]
+        self.statePath = statePath
+        # Step that writes each table
+        self.producers = {}
+        for node in nodes:
+            for table in node.outputs:
+                self.producers[table] = node.name
+        # Signatures from earlier runs
+        self.state = {}
+        if os.path.exists(statePath):
+            with open(statePath) as f:
+                self.state = json.load(f)
+
+    """------------------------------------------------------------"""
+    def dependencies(self, name):
+        """
+        Steps whose outputs a step reads
+        """
+        node = self.nodes[name]
+        return sorted(set(self.producers[table] for table in node.inputs if table in self.producers))
+
+    """------------------------------------------------------------"""
+    def sortedNodes(self, targets=None):
+        """
+        Names of the steps needed for the targets (all steps if None),
+        each after the steps it depends on
+        """
+        if targets is None:
+            targets = self.order
+        ordered = []
+        visiting = set()
+        # ----------------
+        def visit(name):
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError('Pipeline has a cycle at ' + name)
+            visiting.add(name)
+            for dependency in self.dependencies(name):
+                visit(dependency)
+            visiting.remove(name)
+            ordered.append(name)
+        # ----------------
+        for name in targets:
+            if name not in self.nodes:
+                raise KeyError('Unknown pipeline step: ' + name)
+            visit(name)
+        return ordered
+
+    """------------------------------------------------------------"""
+    def isCurrent(self, name):
+        """
+        Check whether a step can be skipped: same signature as its last
+        run and all of its outputs still stored
+        """
+        node = self.nodes[name]
+        if not all(tableExists(table) for table in node.outputs):
+            return False
+        return self.state.get(name) == node.signature()
+
+    """------------------------------------------------------------"""
+    def saveState(self):
+        """
+        Write the step signatures
+        """
+        if not os.path.isdir(os.path.dirname(self.statePath)):
+            os.makedirs(os.path.dirname(self.statePath))
+        with open(self.statePath, 'w') as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+
+    """------------------------------------------------------------"""
+    def finishNode(self, name, signature):
+        """
+        Record the signature of a step that ran successfully
+        """
+        self.state[name] = signature
+        self.saveState()
+
+    """------------------------------------------------------------"""
+    def run(self, targets=None, force=False, workers=1):
+        """
+        Run the steps needed for the targets (all steps if None); with
+        force=True nothing is skipped. With workers > 1, steps whose
+        dependencies are done run at the same time in a process pool.
+        Returns the timing report (see timingReport)
+        """
+        names = self.sortedNodes(targets)
+        selected = set(names)
+        pending = list(names)
+        done = set()
+        running = {}
+        # Step -> (status, start, seconds)
+        timings = {}
+        pool = None
+        if workers > 1:
+            # A fresh process for each step, so memory is released
+            pool = multiprocessing.Pool(workers, maxtasksperchild=1)
+        pipelineStart = time.time()
+        try:
+            while pending or running:
+                # Start steps whose dependencies are done
+                for name in list(pending):
+                    if len(running) >= max(workers, 1):
+                        break
+                    if not all(dep in done for dep in self.dependencies(name) if dep in selected):
+                        continue
+                    pending.remove(name)
+                    if not force and self.isCurrent(name):
+                        print 'Skipping ' + name + ' (up to date)'
+                        timings[name] = ('skipped', time.time() - pipelineStart, 0.0)
+                        done.add(name)
+                        continue
+                    print 'Running ' + name
+                    node = self.nodes[name]
+                    # Inputs don't change while the step runs
+                    signature = node.signature()
+                    started = time.time() - pipelineStart
+                    if pool is None or node.inProcess:
+                        # Steps already in the pool keep running meanwhile
+                        elapsed = runStep(node.func, node.args)
+                        self.finishNode(name, signature)
+                        timings[name] = ('ran', started, elapsed)
+                        done.add(name)
+                        print '  ' + name + ' finished in ' + str(round(elapsed, 1)) + ' s'
+                    else:
+                        running[name] = (pool.apply_async(runStep, (node.func, node.args)), signature, started)
+                # Collect finished steps
+                for name, (result, signature, started) in running.items():
+                    if result.ready():
+                        elapsed = result.get()
+                        del running[name]
+                        self.finishNode(name, signature)
+                        timings[name] = ('ran', started, elapsed)
+                        done.add(name)
+                        print '  ' + name + ' finished in ' + str(round(elapsed, 1)) + ' s'
+                if running:
+                    time.sleep(0.1)
+        except:
+            if pool is not None:
+                pool.terminate()
+                pool = None
+            raise
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        wallTime = time.time() - pipelineStart
+        return self.timingReport(names, timings, wallTime)
+
+    """------------------------------------------------------------"""
+    def criticalPath(self, names, timings):
+        """
+        Longest chain of dependent steps (by seconds taken); returns
+        (seconds, list of step names)
+        """
+        finish = {}
+        previous = {}
+        for name in names:
+            deps = [dep for dep in self.dependencies(name) if dep in finish]
+            before = max(deps, key=lambda dep: finish[dep]) if deps else None
+            finish[name] = timings[name][2] + (finish[before] if before is not None else 0.0)
+            previous[name] = before
+        if not finish:
+            return 0.0, []
+        name = max(finish, key=finish.get)
+        seconds = finish[name]
+        chain = []
+        while name is not None:
+            chain.insert(0, name)
+            name = previous[name]
+        return seconds, chain
+
+    """------------------------------------------------------------"""
+    def timingReport(self, names, timings, wallTime):
+        """
+        Print and return a dataframe with the status, start time and
+        seconds taken of each step, plus the wall time, the sum of step
+        times and the critical path
+        """
+        df = pd.DataFrame([[name] + list(timings[name]) for name in names],
+                          columns=['Step','Status','Start','Seconds'])
+        pathSeconds, path = self.criticalPath(names, timings)
+        print 'Pipeline steps'
+        print df.to_string(index=False)
+        print 'Wall time: ' + str(round(wallTime, 1)) + ' s'
+        print 'Sum of step times: ' + str(round(df.Seconds.sum(), 1)) + ' s'
+        print 'Critical path: ' + str(round(pathSeconds, 1)) + ' s (' + ' -> '.join(path) + ')'
+        return df
+
+"""----------------------------------------------------------------"""
+def main():
+    """
+    Main function for running
+    (pass step names to only run those and what they depend on,
+     --force to run steps even if their inputs have not changed,
+     --workers=N to run up to N independent steps at once; default
+     is one per CPU)
+    """
+    args = sys.argv[1:]
+    targets = [arg for arg in args if not arg.startswith('--')] or None
+    workers = multiprocessing.cpu_count()
+    for arg in args:
+        if arg.startswith('--workers='):
+            workers = int(arg.split('=', 1)[1])
+    pipeline = Pipeline(pipelineNodes())
+    pipeline.run(targets, force='--force' in args, workers=workers)
+
+
+"""*******************************************************************
+*                                                                    *
+*                   Script Execution                                 *
+*                                                                    *
+*******************************************************************"""
+if __name__ == '__main__':
+    main()
@@ -9,18 +9,174 @@
     downloaded directly as csv files
 ----------------------------------------------------------------------
     Created by Megan Schroeder
-    Last Modified 2014-08-06
+    Last Modified 2026-10-18
 ----------------------------------------------------------------------
 """
 
-import urllib2
-import time
+import os
+import sys
 import string
-import re
 from datetime import datetime
 from bs4 import BeautifulSoup
 import numpy as np
 import pandas as pd
+from fetchData import Fetcher, ResponseCache, ScrapePipeline, currentSeason
+from checkpointData import ProgressManifest, replaceRows
+from requestPolicy import RetryQueue
+from parseTables import toUnicode, extractTable, firstText, tableHeader, tableToDF, tableAndHeaderToDF
+
+
+def parseDemographics_NBA(page_source, player_name):
+    """
+    Demographic information from a player's NBA.com playerfile page
+    - height, weight, birthdate, etc.
+    """
+    colNames = ['Height', 'Weight', 'BirthDate', 'YearsPro', 'Team', 'JerseyNum', 'Position', 'PictureURL', 'StatsURL']
+    # Soupify the page
+    soup = BeautifulSoup(page_source)
+    # Link to stats
+    stats_url_list = soup.find_all("a", attrs = {"id":"tab-stats"})
+    stats_url = unicode(stats_url_list[0]["href"])
+    # Jersey number and position
+    num_position = unicode(soup.find("h2", attrs = {"class":"num-position"}).find(text=True).strip())
+    num, position = num_position.split(' | ')
+    # Current team
+    team = unicode(soup.find("h3", attrs = {"class":"player-team"}).find(text=True).strip())
+    # Height and weight data have same class
+    height_weight = soup.find_all("span", attrs = {"class":"nbaHeight"}) # e.g. [6'3", 185 lbs.]
+    # Convert height to inches
+    height = int(height_weight[0].find(text=True).strip().split("'")[0])*12 + int(height_weight[0].find(text=True).strip().split("'")[1][0])
+    # Strip 'lbs' from weight
+    weight = int(height_weight[1].find(text=True).strip().split(' ')[0])
+    # Birthdate
+    birthdate_str = soup.find("span", attrs = {"itemprop":"birthDate"}).find(text=True).strip() # e.g. March 14, 1988
+    birthdate = datetime.date(datetime.strptime(birthdate_str, '%B %d, %Y'))
+    # Years pro
+    yearspro = int(soup.find("span", text = u'Years Pro:').next_sibling.next_sibling.find(text=True))
+    # URL to profile picture
+    picture_url = unicode(soup.find("div", attrs = {"class":"player-headshot"}).find("img")["src"])
+    # Build dictionary
+    return dict(zip(colNames, [height, weight, birthdate, yearspro, team, num, position, picture_url, stats_url]))
+
+"""----------------------------------------------------------------"""
+def parsePlayerLinks_BR(page_source, letter):
+    """
+    Names and URL's of currently active players (shown in bold) on a
+    basketball-reference player index page
+    """
+    names_urls = []
+    # Soupify the page
+    soup = BeautifulSoup(page_source)
+    # Currently active players
+    current_players = soup.find_all('strong')
+    # Loop through current names
+    for name in current_players:
+        name_data = name.children.next()
+        names_urls.append((unicode(name_data.contents[0]), 'http://www.basketball-reference.com' + name_data.attrs['href']))
+    return names_urls
+
+"""----------------------------------------------------------------"""
+def parseDemographics_BR(page_source, letter):
+    """
+    Header and rows of the players table on a basketball-reference
+    player index page
+    """
+    # Parse only the players table
+    table = extractTable(page_source, 'players')
+    table_rows = table.findall('.//tr')
+    # Extract header information
+    cells = table_rows[0].findall('th')
+    table_header = []
+    for c in cells:
+        table_header.append(firstText(c))
+    table_header.insert(1,u'URL')
+    # Iterate through each row and extract text in each cell
+    table_data = []
+    for row in range(1, len(table_rows)):
+        cells = table_rows[row].findall('td')
+        row_data = []
+        for i, cell in enumerate(cells):
+            if i == 0:
+                row_data.append(firstText(cell))
+                row_data.append(u'http://www.basketball-reference.com' + cell.find('.//a').get('href'))
+            elif i == 4:
+                heightStr = firstText(cell)
+                height = 12*int(heightStr.split('-')[0]) + int(heightStr.split('-')[1])
+                row_data.append(height)
+            else:
+                row_data.append(firstText(cell))
+        table_data.append(row_data)
+    return table_header, table_data
+
+"""----------------------------------------------------------------"""
+def parseGameLogLinks_BR(page_source, name):
+    """
+    Links to a player's game log pages (one per season)
+    """
+    # Soupify the page
+    soup = BeautifulSoup(page_source)
+    # Return list of game log <a> tags
+    aList = soup.find(text=u'Game Logs').parent.next.next.next.next.findAll('a')
+    # Get links
+    links = [u'http://www.basketball-reference.com' + aTag.get('href') for aTag in aList]
+    years = [int(link.split('/')[-2]) for link in links]
+    name_urls = [(name, years[j], link) for j, link in enumerate(links)]
+    return pd.DataFrame(name_urls, columns=['Player','Year','URL'])
+
+"""----------------------------------------------------------------"""
+def parseGameLogs_BR(page_source, name, year):
+    """
+    Regular season and playoff game logs for a player season;
+    returns (reg, playoff), either of which may be None (raises if the
+    page cannot be parsed)
+    """
+    # Parse only the game log tables
+    page_source = toUnicode(page_source)
+    reg_season_table = extractTable(page_source, 'pgl_basic')  # id for reg season table
+    playoff_table = extractTable(page_source, 'pgl_basic_playoffs') # id for playoff table
+    # Errors propagate, so the pipeline records the page as a parse failure
+    if reg_season_table is None:
+        raise ValueError('No regular season game log table')
+    # Parse the table header
+    header = tableHeader(reg_season_table, unique=True)
+    # Add in headers for home/away and w/l columns to get the DataFrame to parse correctly
+    header[5] = u'HomeAway'
+    header.insert(7, u'WinLoss')
+    reg = tableToDF(reg_season_table, header)
+    # Add column for regular season vs. playoffs; add column for player name
+    if reg is not None:
+        reg.insert(0, u'Season', u'Regular')
+        reg.insert(0, u'Year', year)
+        reg.insert(0, u'Player', name)
+    playoff = tableToDF(playoff_table, header)
+    if playoff is not None:
+        playoff.insert(0, u'Season', u'Playoffs')
+        playoff.insert(0, u'Year', year)
+        playoff.insert(0, u'Player', name)
+    return reg, playoff
+
+"""----------------------------------------------------------------"""
+def parseStatsSummary_BR(page_source, name):
+    """
+    Season summary tables for a player; returns a dictionary of table
+    name to dataframe (None if the player page does not have it)
+    """
+    page_source = toUnicode(page_source)
+    # ----------------
+    def soupTableAndHeaderToDF(page_source, tableID, rowRegex):
+        # Parse only the requested table
+        return tableAndHeaderToDF(extractTable(page_source, tableID), rowRegex, name)
+    # ----------------
+    tables = {}
+    # Regular Season Totals
+    tables['RegularSeason_Total'] = soupTableAndHeaderToDF(page_source, 'totals', '^totals[.]\d+')
+    # Regular Per Game summaries
+    tables['RegularSeason_PerGame'] = soupTableAndHeaderToDF(page_source, 'per_game', '^per_game[.]\d+')
+    # Playoffs Totals
+    tables['Playoffs_Total'] = soupTableAndHeaderToDF(page_source, 'playoffs_totals', '^playoffs_totals[.]\d+')
+    # Playoffs Per Game summaries
+    tables['Playoffs_PerGame'] = soupTableAndHeaderToDF(page_source, 'playoffs_per_game', '^playoffs_per_game[.]\d+')
+    return tables
 
 
 class Scraper:
@@ -28,6 +184,44 @@ class Scraper:
     A class to scrape baksetball websites and create CSV files
     """
 
+    def __init__(self, fetcher=None, parsers=None, incremental=False, retryQueue=None):
+        """
+        fetcher - object used to download pages (see fetchData.Fetcher);
+                  requests to each host are rate limited by the fetcher
+                  and responses are cached on disk by default
+        parsers - number of processes parsing pages while more are
+                  downloaded (default: one per CPU)
+        incremental - only fetch game logs (and game log links) that are
+                      missing from the stored CSV files or belong to the
+                      season in progress, then merge them in
+        retryQueue - RetryQueue recording failed requests so they can be
+                     replayed with replayFailures()
+        """
+        if retryQueue is None:
+            retryQueue = RetryQueue()
+        if fetcher is None:
+            fetcher = Fetcher(cache=ResponseCache(), retryQueue=retryQueue)
+        elif fetcher.retryQueue is None:
+            fetcher.retryQueue = retryQueue
+        self.fetcher = fetcher
+        self.pipeline = ScrapePipeline(fetcher, parsers)
+        self.incremental = incremental
+        self.retryQueue = retryQueue
+        # Set while replayFailures() is running
+        self.replaying = False
+
+    """------------------------------------------------------------"""
+    def replayTasks(self, job):
+        """
+        Tasks for a job from the retry queue while replaying failures,
+        including pages that could not be parsed (None during a normal
+        run)
+        """
+        if not self.replaying:
+            return None
+        return self.retryQueue.tasks(job, kinds=('retryable','parse'))
+
+    """------------------------------------------------------------"""
     def getPlayerLinks_NBA(self):
         """
         Create a dictionary mapping the player name (First Last) to
@@ -36,8 +230,7 @@ class Scraper:
         # Base URL
         url = 'http://stats.nba.com/players.html#ap-L'
         # Open the URL and read
-        response = urllib2.urlopen(url)
-        page_source = response.read()
+        page_source = self.fetcher.fetch(url)
         # Soupify the page
         soup = BeautifulSoup(page_source)
         # Get directories of players
@@ -69,47 +262,25 @@ class Scraper:
         Create a dictionary mapping the player name (First Last) to their
         demographic information - height, weight, birthdate, etc.
         """
+        job = 'NBA_Player_Demographics'
+        csvPath = '../../data/NBA_Player_Demographics__RAW.csv'
         # Initialize dictionary
         player_dict = {}
         colNames = ['Height', 'Weight', 'BirthDate', 'YearsPro', 'Team', 'JerseyNum', 'Position', 'PictureURL', 'StatsURL']
-        # Iterate through playerfile links
-        for i, player_url in enumerate(self.playerLinksNBA['ProfileURL']):
-            player_name = self.playerLinksNBA['Player'][i]
-            # Handle error
-            try:
-                # Open the URL and read
-                response = urllib2.urlopen(player_url)
-                page_source = response.read()
-                # Soupify the page
-                soup = BeautifulSoup(page_source)
-                # Link to stats
-                stats_url_list = soup.find_all("a", attrs = {"id":"tab-stats"})
-                stats_url = stats_url_list[0]["href"]
-                # Jersey number and position
-                num_position = soup.find("h2", attrs = {"class":"num-position"}).find(text=True).strip()
-                num, position = num_position.split(' | ')
-                # Current team
-                team = soup.find("h3", attrs = {"class":"player-team"}).find(text=True).strip()
-                # Height and weight data have same class
-                height_weight = soup.find_all("span", attrs = {"class":"nbaHeight"}) # e.g. [6'3", 185 lbs.]
-                # Convert height to inches
-                height = int(height_weight[0].find(text=True).strip().split("'")[0])*12 + int(height_weight[0].find(text=True).strip().split("'")[1][0])
-                # Strip 'lbs' from weight
-                weight = int(height_weight[1].find(text=True).strip().split(' ')[0])
-                # Birthdate
-                birthdate_str = soup.find("span", attrs = {"itemprop":"birthDate"}).find(text=True).strip() # e.g. March 14, 1988
-                birthdate = datetime.date(datetime.strptime(birthdate_str, '%B %d, %Y'))
-                # Years pro
-                yearspro = int(soup.find("span", text = u'Years Pro:').next_sibling.next_sibling.find(text=True))
-                # URL to profile picture
-                picture_url = soup.find("div", attrs = {"class":"player-headshot"}).find("img")["src"]
-                # Build dictionary
-                demographic_dict = dict(zip(colNames, [height, weight, birthdate, yearspro, team, num, position, picture_url, stats_url]))
-                player_dict[player_name] = demographic_dict
-                print 'Finished processing ' + player_name
-            except:
-                player_dict[player_name] = dict(zip(colNames, [None, None, None, None, None, None, None, None, None]))
+        # Iterate through playerfile links (or only failed ones when replaying)
+        tasks = self.replayTasks(job)
+        replay = tasks is not None
+        if not replay:
+            tasks = zip(self.playerLinksNBA['ProfileURL'], [(name,) for name in self.playerLinksNBA['Player']])
+        done = []
+        for player_url, (player_name,), demographic_dict in self.pipeline.run(tasks, parseDemographics_NBA, job):
+            if demographic_dict is None:
                 print 'Error with ' + player_name
+                continue
+            player_dict[player_name] = demographic_dict
+            done.append(player_url)
+            print 'Finished processing ' + player_name
+        self.retryQueue.resolve(job, done)
         # Convert to dataframe (make player names the row indices)
         player_df = pd.DataFrame(player_dict).transpose()
         player_df.index.names = ['Player']
@@ -120,34 +291,31 @@ class Scraper:
         # Add to instance
         self.demographicsNBA = player_df
         # Save to CSV
-        player_df.to_csv('../../data/NBA_Player_Demographics__RAW.csv')
+        if replay:
+            player_df.to_csv(csvPath + '.delta', encoding='utf-8')
+            replaceRows(csvPath, csvPath + '.delta', ['Player'])
+        else:
+            player_df.to_csv(csvPath, encoding='utf-8')
 
     """------------------------------------------------------------"""
     def getPlayerLinks_BR(self):
         """
         Map current players to URL's at basketball-reference
         """
+        job = 'BR_Player_Links'
         names_urls = []
+        # URL for each letter
+        tasks = [('http://www.basketball-reference.com/players/' + letter + '/', (letter,))
+                 for letter in string.ascii_lowercase]
         # Go through all letters
-        for letter in string.ascii_lowercase:
-            # URL
-            url = 'http://www.basketball-reference.com/players/' + letter + '/'
-            try:
-                # Open the URL and read
-                response = urllib2.urlopen(url)
-                page_source = response.read()
-                # Soupify the page
-                soup = BeautifulSoup(page_source)
-                # Currently active players
-                current_players = soup.find_all('strong')
-                # Loop through current names
-                for name in current_players:
-                    name_data = name.children.next()
-                    names_urls.append((name_data.contents[0], 'http://www.basketball-reference.com' + name_data.attrs['href']))
-                # Pause
-                time.sleep(1)
-            except:
-                pass
+        done = []
+        for url, (letter,), letter_names_urls in self.pipeline.run(tasks, parsePlayerLinks_BR, job):
+            if letter_names_urls is None:
+                print 'Problem processing the letter ' + letter.upper()
+                continue
+            names_urls.extend(letter_names_urls)
+            done.append(url)
+        self.retryQueue.resolve(job, done)
         # Convert to dataframe
         br_df = pd.DataFrame(names_urls, columns=['Player','URL'])
         # Add to instance
@@ -160,41 +328,26 @@ class Scraper:
         """
         Get player (all) demographics from basketball-reference
         """
+        job = 'BR_Player_Demographics'
         table_data = []
+        table_header = None
+        # URL for each letter
+        letters = string.ascii_lowercase[:-3]+string.ascii_lowercase[-2:] # ignore x
+        tasks = [('http://www.basketball-reference.com/players/' + letter + '/', (letter,)) for letter in letters]
         # Go through all letters
-        for letter in (string.ascii_lowercase[:-3]+string.ascii_lowercase[-2:]): # ignore x
-            # URL
-            url = 'http://www.basketball-reference.com/players/' + letter + '/'
-            # Open the URL and read
-            response = urllib2.urlopen(url)
-            page_source = response.read()
-            # Soupify the page
-            soup = BeautifulSoup(page_source)
-            table = soup.find("table", attrs = {"id":"players"})
-            table_rows = table.findAll("tr")
-            # Extract header information on first run of loop
-            if letter == 'a':
-                cells = table_rows[0].find_all("th")
-                table_header = []
-                for c in cells:
-                    table_header.append(c.find(text=True))
-                table_header.insert(1,u'URL')
-            # Iterate through each row and extract text in each cell
-            for row in range(1, len(table_rows)):
-                cells = table_rows[row].find_all("td")
-                row_data = []
-                for i, cell in enumerate(cells):
-                    if i == 0:
-                        row_data.append(cell.find(text=True))
-                        row_data.append(u'http://www.basketball-reference.com' + cell.a['href'])
-                    elif i == 4:
-                        heightStr = cell.find(text=True)
-                        height = 12*int(heightStr.split('-')[0]) + int(heightStr.split('-')[1])
-                        row_data.append(height)
-                    else:
-                        row_data.append(cell.find(text=True))
-                table_data.append(row_data)
+        done = []
+        for url, (letter,), result in self.pipeline.run(tasks, parseDemographics_BR, job):
+            if result is None:
+                print 'Problem processing the letter ' + letter.upper()
+                continue
+            header, rows = result
+            # Keep header information from the first page
+            if table_header is None:
+                table_header = header
+            table_data.extend(rows)
+            done.append(url)
             print 'Finished processing the letter ' + letter.upper()
+        self.retryQueue.resolve(job, done)
         df = pd.DataFrame(table_data, columns=table_header)
         df.drop('College', axis=1, inplace=True)
         # Rename columns
@@ -209,210 +362,201 @@ class Scraper:
         """
         Get links to all game logs for all players who've played since 2010
         """
-        df = self.demographicsBR
-        # Drop players who didn't play in the last 4 seasons
-        df = df[df.ToYear > 2010]
-        df.set_index(np.arange(0, len(df)), inplace=True)
-        name_urls = []
-        for i, player_url in enumerate(df.URL.tolist()):
-            name = df.Player[i]
-            # Open the URL and read
-            response = urllib2.urlopen(player_url)
-            page_source = response.read()
-            # Soupify the page
-            soup = BeautifulSoup(page_source)
-            # Return list of game log <a> tags
-            aList = soup.find(text=u'Game Logs').parent.next.next.next.next.findAll('a')
-            # Get links
-            links = [u'http://www.basketball-reference.com' + aTag.get('href') for aTag in aList]
-            years = [int(link.split('/')[-2]) for link in links]
-            # Append to big list
-            for j, link in enumerate(links):
-                name_urls.append((name, years[j], link))
-            # Pause
-            time.sleep(1)
+        job = 'BR_Player_GameLogLinks'
+        linksPath = '../../data/BR_Player_GameLogLinks__RAW.csv'
+        # Only failed players when replaying
+        tasks = self.replayTasks(job)
+        merge = tasks is not None
+        if tasks is None:
+            df = self.demographicsBR
+            # Drop players who didn't play in the last 4 seasons
+            df = df[df.ToYear > 2010]
+            if self.incremental and os.path.exists(linksPath):
+                # Only visit players without stored links, or active players
+                # missing the link for the season in progress
+                season = currentSeason()
+                stored = pd.read_csv(linksPath, encoding='utf-8')
+                storedPlayers = set(stored.Player)
+                currentPlayers = set(stored.Player[stored.Year >= season])
+                visit = [player not in storedPlayers or (toYear >= season and player not in currentPlayers)
+                         for player, toYear in zip(df.Player, df.ToYear)]
+                df = df[np.array(visit, dtype=bool)]
+                merge = True
+                print 'Incremental update: ' + str(len(df)) + ' players to visit'
+            tasks = zip(df.URL.tolist(), [(name,) for name in df.Player.tolist()])
+        merge = merge and os.path.exists(linksPath)
+        # Skip players finished by a previous (interrupted) run
+        manifest = ProgressManifest(job)
+        sink = manifest.sink('GameLogLinks', 'Year')
+        tasks = [task for task in tasks if not manifest.isDone(task[0])]
+        done = []
+        for player_url, (name,), links_df in self.pipeline.run(tasks, parseGameLogLinks_BR, job):
+            if links_df is None:
+                print 'Problem processing ' + name
+                continue
+            # Save player's links, then record player as done
+            sink.append(links_df)
+            manifest.markDone(player_url)
+            done.append(player_url)
             print 'Finished processing ' + name
-        # Convert to dataframe
-        newDF = pd.DataFrame(name_urls, columns=['Player','Year','URL'])
-        # Add to instance
-        self.gameLogLinksBR = newDF
+        self.retryQueue.resolve(job, done)
         # Save to CSV
-        newDF.to_csv('../data/BR_Player_GameLogLinks__RAW.csv', index=False)
+        if merge:
+            # Replace stored links for the players visited
+            sink.assemble(linksPath + '.delta')
+            replaceRows(linksPath, linksPath + '.delta', ['Player'])
+        else:
+            sink.assemble(linksPath)
+        manifest.clear()
+        # Add to instance
+        if os.path.exists(linksPath):
+            self.gameLogLinksBR = pd.read_csv(linksPath, encoding='utf-8')
+        else:
+            self.gameLogLinksBR = pd.DataFrame(columns=['Player','Year','URL'])
 
     """------------------------------------------------------------"""
     def getGameLogs_BR(self):
         """
         Get game logs since 2010 for all players
         """
-        df = self.gameLogLinksBR
-        df = df[df.Year >= 2010]
-        df.set_index(np.arange(0, len(df)), inplace=True)
+        job = 'BR_Player_GameLogs'
+        rawPath = '../../data/BR_Player_GameLogs__RAW.csv'
+        # Only failed player seasons when replaying
+        tasks = self.replayTasks(job)
+        merge = tasks is not None
+        if tasks is None:
+            df = self.gameLogLinksBR
+            df = df[df.Year >= 2010]
+            if self.incremental and os.path.exists(rawPath):
+                # Only fetch player seasons not stored yet, or still in progress
+                season = currentSeason()
+                stored = pd.read_csv(rawPath, usecols=['Player','Year'], encoding='utf-8').drop_duplicates()
+                storedPairs = set(zip(stored.Player, stored.Year))
+                fetch = [(player, year) not in storedPairs or year >= season
+                         for player, year in zip(df.Player, df.Year)]
+                df = df[np.array(fetch, dtype=bool)]
+                merge = True
+                print 'Incremental update: ' + str(len(df)) + ' player seasons to fetch'
+            tasks = zip(df.URL.tolist(), zip(df.Player.tolist(), df.Year.tolist()))
+        merge = merge and os.path.exists(rawPath)
+        # Skip player seasons finished by a previous (interrupted) run
+        manifest = ProgressManifest(job)
+        sink = manifest.sink('GameLogs', 'Year')
+        tasks = [task for task in tasks if not manifest.isDone(task[0])]
         # Loop through every player
-        for i, url in enumerate(df.URL.tolist()):
-            # Player name
-            name = df.Player[i]
-            # Year
-            year = df.Year[i]
-            # Open the URL and read
-            response = urllib2.urlopen(url)
-            page_source = response.read()
-            # Soupify the page
-            soup = BeautifulSoup(page_source)
-            # ----------------
-            def soupTableToDF(table_soup, header):
-                # Parses the HTML/Soup table for the gamelog stats.
-                # Returns a pandas DataFrame
-                if not table_soup:
-                    return None
-                else:
-                    try:
-                        rows = table_soup[0].findAll('tr')[1:]  # all rows but the header
-                        # remove intermediary header rows
-                        rows = [r for r in rows if len(r.findAll('td')) > 0]
-                        parsed_table = [[col.getText() for col in row.findAll('td')] for row in rows] # build 2d list of table values
-                        return pd.DataFrame(parsed_table, columns=header)
-                    except:
-                        return None
-            # ----------------
-            reg_season_table = soup.findAll('table', attrs={'id': 'pgl_basic'})  # id for reg season table
-            playoff_table = soup.findAll('table', attrs={'id': 'pgl_basic_playoffs'}) # id for playoff table
-            # Parse the table header
-            try:
-                header = []
-                for th in reg_season_table[0].findAll('th'):
-                    if not th.getText() in header:
-                        header.append(th.getText())
-                # Add in headers for home/away and w/l columns to get the DataFrame to parse correctly
-                header[5] = u'HomeAway'
-                header.insert(7, u'WinLoss')
-                reg = soupTableToDF(reg_season_table, header)
-                # Add column for regular season vs. playoffs; add column for player name
-                if reg is not None:
-                    reg.insert(0, u'Season', u'Regular')
-                    reg.insert(0, u'Year', year)
-                    reg.insert(0, u'Player', name)
-                playoff = soupTableToDF(playoff_table, header)
-                if playoff is not None:
-                    playoff.insert(0, u'Season', u'Playoffs')
-                    playoff.insert(0, u'Year', year)
-                    playoff.insert(0, u'Player', name)
-            except:
-                reg = None
-                playoff = None
-            # Append to big dataframe
-            if i == 0:
-                if reg is None:
-                    final_df = playoff
-                elif playoff is None:
-                    final_df = reg
-                else:
-                    final_df = pd.concat([reg, playoff])
-            else:
-                if reg is None:
-                    final_df = pd.concat([final_df, playoff])
-                elif playoff is None:
-                    final_df = pd.concat([final_df, reg])
-                else:
-                    final_df = pd.concat([final_df, reg, playoff])
+        done = []
+        for url, (name, year), result in self.pipeline.run(tasks, parseGameLogs_BR, job):
+            if result is None:
+                print 'Problem processing ' + name + ' ' + str(year)
+                continue
+            reg, playoff = result
+            # Save rows for this player season, then record it as done
+            sink.append(reg)
+            sink.append(playoff)
+            manifest.markDone(url)
+            done.append(url)
             # Message to user
             print 'Finished ' + name + ' ' + str(year)
-            # Save periodically
-            if i in range(len(df.URL.tolist()), 10):
-                final_df.to_csv('../../data/BR_Player_GameLogs__TEMP.csv', index=False)
-                print '******* Saved at index ' + str(i)
-        # Update Home/Away column
-        final_df.HomeAway[final_df.HomeAway == u'@'] = u'Away'
-        # Add column for DidNotPlay (Boolean)
-        final_df.insert(6, u'DidNotPlay', False)
-        final_df.DidNotPlay[final_df.GS == u'Did Not Play'] = True
-        final_df.DidNotPlay[final_df.GS == u'Player Suspended'] = True
-        # Add column for Inactive (Boolean)
-        final_df.insert(6, u'Inactive', False)
-        final_df.Inactive[final_df.GS == u'Inactive'] = True
-        # Update GS
-        final_df.GS[final_df.GS == u'Inactive'] = np.nan
-        final_df.GS[final_df.GS == u'Did Not Play'] = np.nan
-        final_df.GS[final_df.GS == u'Player Suspended'] = np.nan
-        # Save to CSV
-        final_df.to_csv('../../data/BR_Player_GameLogs__RAW.csv', index=False)
+        self.retryQueue.resolve(job, done)
+        # ----------------
+        def updateStatus(final_df):
+            # Update Home/Away column
+            final_df.HomeAway[final_df.HomeAway == u'@'] = u'Away'
+            # Add column for DidNotPlay (Boolean)
+            final_df.insert(6, u'DidNotPlay', False)
+            final_df.DidNotPlay[final_df.GS == u'Did Not Play'] = True
+            final_df.DidNotPlay[final_df.GS == u'Player Suspended'] = True
+            # Add column for Inactive (Boolean)
+            final_df.insert(6, u'Inactive', False)
+            final_df.Inactive[final_df.GS == u'Inactive'] = True
+            # Update GS
+            final_df.GS[final_df.GS == u'Inactive'] = np.nan
+            final_df.GS[final_df.GS == u'Did Not Play'] = np.nan
+            final_df.GS[final_df.GS == u'Player Suspended'] = np.nan
+            return final_df
+        # ----------------
+        # Save to CSV (one season at a time)
+        if merge:
+            # Replace stored game logs for the player seasons fetched
+            sink.assemble(rawPath + '.delta', transform=updateStatus, dtype=object)
+            replaceRows(rawPath, rawPath + '.delta', ['Player','Year'])
+        else:
+            sink.assemble(rawPath, transform=updateStatus, dtype=object)
+        manifest.clear()
 
     """------------------------------------------------------------"""
     def getStatsSummary_BR(self):
         """
         Get season summaries for players from basketball-reference
         """
-        df = self.demographicsBR
-        # Drop players who didn't play in the last 4 seasons
-        df = df[df.ToYear > 2010]
-        df.set_index(np.arange(0, len(df)), inplace=True)
+        job = 'BR_Player_StatsSummary'
+        # Only failed players when replaying
+        tasks = self.replayTasks(job)
+        merge = tasks is not None
+        if tasks is None:
+            df = self.demographicsBR
+            # Drop players who didn't play in the last 4 seasons
+            df = df[df.ToYear > 2010]
+            tasks = zip(df.URL.tolist(), [(name,) for name in df.Player.tolist()])
+        # Skip players finished by a previous (interrupted) run
+        manifest = ProgressManifest(job)
+        sinks = dict((table, manifest.sink(table, 'Season')) for table in
+                     ['RegularSeason_Total', 'RegularSeason_PerGame', 'Playoffs_Total', 'Playoffs_PerGame'])
+        tasks = [task for task in tasks if not manifest.isDone(task[0])]
         # Loop
-        for i, player_url in enumerate(df.URL.tolist()):
-            # Player name
-            name = df.Player[i]
-            # Open the URL and read
-            response = urllib2.urlopen(player_url)
-            page_source = response.read()
-            # Soupify the page
-            soup = BeautifulSoup(page_source)
-            if not soup:
-                print 'Problem soupifying ' + name
+        done = []
+        for player_url, (name,), tables in self.pipeline.run(tasks, parseStatsSummary_BR, job):
+            if tables is None:
+                print 'Problem processing ' + name
                 continue
-            # ----------------
-            def soupTableAndHeaderToDF(soup, tableID, rowRegex):
-                tableFind = soup.find('table', id=tableID)
-                if not tableFind:
-                    return None
-                else:
-                    tableHeader = tableFind.findAll('th')
-                    header = []
-                    for th in tableHeader:
-                        header.append(re.sub('%', 'pct', th.getText()))
-                    allrows = soup.findAll('tr', id=re.compile(rowRegex))
-                    parsed_table = [[col.getText() for col in row.findAll('td')] for row in allrows]
-                    df = pd.io.parsers.TextParser(parsed_table, names=header, parse_dates=True).get_chunk()
-                    df['Season'] = df['Season'].map(lambda x: x[:7])
-                    df.insert(0, u'Player', name)
-                    return df
-            # ----------------
-            # Regular Season Totals
-            reg_totals_df = soupTableAndHeaderToDF(soup, 'totals', '^totals[.]\d+')
-            # Regular Per Game summaries
-            reg_pergame_df = soupTableAndHeaderToDF(soup, 'per_game', '^per_game[.]\d+')
-            # Playoffs Totals
-            playoffs_totals_df = soupTableAndHeaderToDF(soup, 'playoffs_totals', '^playoffs_totals[.]\d+')
-            # Playoffs Per Game summaries
-            playoffs_pergame_df = soupTableAndHeaderToDF(soup, 'playoffs_per_game', '^playoffs_per_game[.]\d+')
-            # ----------------
-            def joinDataframes(df, dfAll):
-                if dfAll is not None:
-                    if df is not None:
-                        dfNEW = pd.concat([dfAll, df])
-                    else:
-                        dfNEW = dfAll
-                else:
-                    if df is not None:
-                        dfNEW = df
-                    else:
-                        dfNEW = None
-                return dfNEW
-            # ----------------
-            # Append to big dataframe
-            reg_totals_df_ALL = joinDataframes(reg_totals_df, reg_totals_df_ALL)
-            reg_pergame_df_ALL = joinDataframes(reg_pergame_df, reg_pergame_df_ALL)
-            playoffs_totals_df_ALL = joinDataframes(playoffs_totals_df, playoffs_totals_df_ALL)
-            playoffs_pergame_df_ALL = joinDataframes(playoffs_pergame_df, playoffs_pergame_df_ALL)
+            # Save rows for this player, then record player as done
+            for table, table_df in tables.iteritems():
+                sinks[table].append(table_df)
+            manifest.markDone(player_url)
+            done.append(player_url)
             # Message
             print 'Done processing ' + name
+        self.retryQueue.resolve(job, done)
         # ----------------
-        def writeCSV(df, pathToCSV):
-            if df is not None:
-                df.to_csv('../../data/' + pathToCSV + '.csv', index=False)
+        def writeCSV(table, pathToCSV):
+            csvPath = '../../data/' + pathToCSV + '.csv'
+            if merge and os.path.exists(csvPath):
+                # Replace stored rows for the players fetched
+                sinks[table].assemble(csvPath + '.delta')
+                replaceRows(csvPath, csvPath + '.delta', ['Player'])
+            else:
+                sinks[table].assemble(csvPath)
         # ----------------
         # Write to CSV
-        writeCSV(reg_totals_df_ALL, 'BR_Player_StatsSummary_RegularSeason_Total__RAW')
-        writeCSV(reg_pergame_df_ALL, 'BR_Player_StatsSummary_RegularSeason_PerGame__RAW')
-        writeCSV(playoffs_totals_df_ALL, 'BR_Player_StatsSummary_Playoffs_Total__RAW')
-        writeCSV(playoffs_pergame_df_ALL, 'BR_Player_StatsSummary_Playoffs_PerGame__RAW')
+        writeCSV('RegularSeason_Total', 'BR_Player_StatsSummary_RegularSeason_Total__RAW')
+        writeCSV('RegularSeason_PerGame', 'BR_Player_StatsSummary_RegularSeason_PerGame__RAW')
+        writeCSV('Playoffs_Total', 'BR_Player_StatsSummary_Playoffs_Total__RAW')
+        writeCSV('Playoffs_PerGame', 'BR_Player_StatsSummary_Playoffs_PerGame__RAW')
+        manifest.clear()
+
+    """------------------------------------------------------------"""
+    def replayFailures(self):
+        """
+        Retry only the requests recorded in the retry queue and merge
+        the results into the stored CSV files
+        """
+        self.replaying = True
+        try:
+            if self.retryQueue.tasks('NBA_Player_Demographics'):
+                self.getDemographics_NBA()
+            # Player index pages are few; redo them in full
+            if self.retryQueue.tasks('BR_Player_Links'):
+                self.getPlayerLinks_BR()
+            if self.retryQueue.tasks('BR_Player_Demographics'):
+                self.getDemographics_BR()
+            if self.retryQueue.tasks('BR_Player_GameLogLinks'):
+                self.getGameLogLinks_BR()
+            if self.retryQueue.tasks('BR_Player_GameLogs'):
+                self.getGameLogs_BR()
+            if self.retryQueue.tasks('BR_Player_StatsSummary'):
+                self.getStatsSummary_BR()
+        finally:
+            self.replaying = False
 
     """------------------------------------------------------------"""
     def main(self):
@@ -435,6 +579,11 @@ class Scraper:
 *******************************************************************"""
 if __name__ == '__main__':
     # Create instance of class
-    scraper = Scraper()
+    # (pass --incremental to only refresh new and in-progress seasons)
+    scraper = Scraper(incremental='--incremental' in sys.argv[1:])
     # Run code
-    scraper.main()
+    # (pass --replay to only retry requests that failed in earlier runs)
+    if '--replay' in sys.argv[1:]:
+        scraper.replayFailures()
+    else:
+        scraper.main()
@@ -0,0 +1,124 @@
+"""
+----------------------------------------------------------------------
+    similarPlayers.py
+----------------------------------------------------------------------
+    Nearest-neighbour index of players over standardized SportVU
+    tracking stats, used to list each player's most similar players
+
+    The index (a KD-tree, or a ball tree for many features) is built
+    once, queried for every player in one batch, and saved with the
+    player IDs, names, standardization and batch results to
+    ../../data/models/SimilarPlayers.pkl, so looking up one player
+    later is a dictionary access
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import cPickle as pickle
+import numpy as np
+from sklearn.neighbors import KDTree, BallTree
+from storeData import DATA_DIR
+
+
+INDEX_PATH = os.path.join(DATA_DIR, 'models', 'SimilarPlayers.pkl')
+# KD-trees lose their edge over ball trees above about this many features
+KDTREE_MAX_FEATURES = 20
+
+
+class SimilarPlayerIndex:
+    """
+    A class to find the players closest to each other in standardized
+    feature space (Euclidean distance)
+    """
+
+    def __init__(self, data, playerIDs, names, k=3, leafSize=30):
+        """
+        data      - feature matrix (one row per player, not standardized)
+        playerIDs - player ID of each row
+        names     - player name of each row
+        k         - number of similar players kept for each player
+        leafSize  - leaf size of the tree
+        """
+        data = np.asarray(data, dtype=np.float64)
+        self.playerIDs = np.asarray(playerIDs)
+        self.names = list(names)
+        self.k = k
+        # Standardize to zero mean and unit variance (as scale() does)
+        self.mean = data.mean(axis=0)
+        self.std = data.std(axis=0)
+        self.std[self.std == 0] = 1.0
+        if data.shape[1] <= KDTREE_MAX_FEATURES:
+            self.tree = KDTree(self.standardize(data), leaf_size=leafSize)
+        else:
+            self.tree = BallTree(self.standardize(data), leaf_size=leafSize)
+        # Similar players for everyone (one batched query)
+        self.neighbours = self.queryRows(np.arange(len(data)), k)
+        self.rows = dict((playerID, row) for row, playerID in enumerate(self.playerIDs))
+
+    """------------------------------------------------------------"""
+    def standardize(self, data):
+        """
+        Standardize rows with the index's mean and standard deviation
+        """
+        return (np.asarray(data, dtype=np.float64) - self.mean)/self.std
+
+    """------------------------------------------------------------"""
+    def queryRows(self, rows, k):
+        """
+        Row numbers of the k nearest other players for indexed rows
+        (array of shape len(rows) x k, nearest first)
+        """
+        data = np.asarray(self.tree.data)[rows]
+        # One extra neighbour, as each player is nearest to itself
+        _, nearest = self.tree.query(data, k=min(k + 1, len(self.names)))
+        isSelf = nearest == np.asarray(rows)[:, np.newaxis]
+        # Exact duplicates may push a player out of its own list; drop
+        # the farthest neighbour instead
+        isSelf[~isSelf.any(axis=1), -1] = True
+        return nearest[~isSelf].reshape(len(rows), -1)
+
+    """------------------------------------------------------------"""
+    def query(self, data, k=None):
+        """
+        Row numbers of the k nearest players to new (not standardized)
+        feature rows
+        """
+        _, nearest = self.tree.query(self.standardize(np.atleast_2d(data)), k=k or self.k)
+        return nearest
+
+    """------------------------------------------------------------"""
+    def similarTo(self, playerID):
+        """
+        Names of the players most similar to an indexed player
+        """
+        return [self.names[row] for row in self.neighbours[self.rows[playerID]]]
+
+    """------------------------------------------------------------"""
+    def similarNames(self):
+        """
+        Comma-separated similar player names for every indexed player
+        (in row order)
+        """
+        return [', '.join(self.names[row] for row in rows) for rows in self.neighbours]
+
+    """------------------------------------------------------------"""
+    def save(self, path=INDEX_PATH):
+        """
+        Write the index to a file
+        """
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+"""----------------------------------------------------------------"""
+def loadIndex(path=INDEX_PATH):
+    """
+    Read a saved SimilarPlayerIndex
+    """
+    with open(path, 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,418 @@
+"""
+----------------------------------------------------------------------
+    storeData.py
+----------------------------------------------------------------------
+    Storage for the tables passed between pipeline stages
+
+    Tables are kept as Parquet datasets under ../../data/ (one
+    directory per table, split by Year/Season where the table has one)
+    with an explicit schema, so later stages read back the same dtypes
+    (dates included) without re-parsing text and can read only the
+    columns and seasons they need. CSV is kept as an export option,
+    and tables that only exist as CSV (scraper output, downloaded
+    files) are read from CSV with the same schema
+----------------------------------------------------------------------
+    Created by Megan Schroeder
+    Last Modified 2026-10-18
+----------------------------------------------------------------------
+"""
+
+import os
+import shutil
+import hashlib
+import pandas as pd
+from checkpointData import appendCSV
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+DATA_DIR = '../../data'
+
+# Column types for each table; columns not listed keep the type of the
+# '*' entry (if any) or whatever pandas infers. Game logs and season
+# stats use compact types: categories for repeated names, small ints
+# and float32 (stats with missing games stay float)
+SCHEMAS = {
+    # ----- Scraper output -----
+    'NBA_Player_Demographics__RAW': {'BirthDate':'datetime64[ns]'},
+    'BR_Player_Demographics__RAW': {'BirthDate':'datetime64[ns]'},
+    'BR_Player_GameLogs__RAW': {'Player':'category', 'Year':'int16', 'Season':'object',
+                                'Date':'datetime64[ns]', 'Inactive':'bool', 'DidNotPlay':'bool',
+                                'Age':'object', 'Tm':'category', 'Opp':'category', 'MP':'object',
+                                'HomeAway':'object', 'WinLoss':'object'},
+    'BR_Player_StatsSummary_RegularSeason_Total__RAW': {'Player':'object', 'Season':'object',
+                                                       'Tm':'object', 'Lg':'object', 'Pos':'object'},
+    'BR_Player_StatsSummary_RegularSeason_PerGame__RAW': {'Player':'object', 'Season':'object',
+                                                         'Tm':'object', 'Lg':'object', 'Pos':'object'},
+    # ----- Player IDs -----
+    'Player_Registry': {'PlayerID':'int32', 'Key':'object', 'Player':'object'},
+    # ----- cleanData -----
+    'NBA_Player_Demographics': {'PlayerID':'int32', 'Player':'object', 'ProfileURL':'object', 'BirthDate':'datetime64[ns]',
+                                'PictureURL':'object', 'StatsURL':'object'},
+    'BR_Player_GameLogs_RegularSeason': {'PlayerID':'int32', 'Year':'int16', 'Rk':'int16',
+                                         'G':'float32', 'Date':'datetime64[ns]',
+                                         'Inactive':'bool', 'DidNotPlay':'bool', 'Age':'float32',
+                                         'Tm':'category', 'Home':'bool', 'Opp':'category',
+                                         'Win':'bool', 'PtDif':'int8', 'GS':'float32',
+                                         'MP':'float32', '*':'float32'},
+    'BR_Player_StatsSummary_RegularSeason_Total': {'PlayerID':'int32', 'Player':'object', 'Season':'int16', 'Tm':'category',
+                                                   'Pos':'int8', '*':'float32'},
+    'BR_Player_StatsSummary_RegularSeason_PerGame': {'PlayerID':'int32', 'Player':'object', 'Season':'int16', 'Tm':'category',
+                                                     'Pos':'int8', '*':'float32'},
+    # ----- buildFeatures -----
+    'BR_Player_Workload': {'PlayerID':'int32', 'Season':'int16', 'BackToBacks':'int16',
+                           'FourInFives':'int16', 'MaxGames5Nights':'int8', '*':'float32'},
+    # ----- prepareData -----
+    'BR_Player_Summary_RegularSeason': {'Year':'int64', 'PlayerID':'int32', 'Player':'object', 'Tm':'object',
+                                        'Pos':'int64', '*':'float64'},
+    'BR_Player_Summary_BuildModel': {'PlayerID':'int32', 'Player':'object', 'Season':'int64', 'MissedBin':'int64',
+                                     '*':'float64'},
+    'BR_Player_Summary_BuildModel_Train': {'PlayerID':'int32', 'Player':'object', 'Season':'int64', 'MissedBin':'int64',
+                                           '*':'float64'},
+    'BR_Player_Summary_BuildModel_Test': {'PlayerID':'int32', 'Player':'object', 'Season':'int64', 'MissedBin':'int64',
+                                          '*':'float64'},
+    'BR_Player_Summary_Predict': {'PlayerID':'int32', 'Player':'object', 'Season':'int64', '*':'float64'},
+    # ----- makePredictions -----
+    'Predict_InjuryRisk': {'PlayerID':'int32', 'Player':'object', 'Probability':'float64'},
+    'Predict_SimilarPlayers': {'PlayerID':'int32', 'Player':'object', 'SimilarPlayers':'object',
+                               'Cluster':'int16'},
+    # ----- backtestModel -----
+    'Backtest_InjuryRisk': {'Season':'int16', 'FirstTrainSeason':'int16', 'LastTrainSeason':'int16',
+                            'TrainRows':'int32', 'TestRows':'int32', 'Features':'int16', '*':'float64'},
+    # ----- clusterTracking -----
+    'Predict_SeasonClusters': {'PlayerID':'int32', 'Player':'object', 'Season':'int16', 'Cluster':'int16'},
+}
+
+# Column each table is split on (one directory per season)
+PARTITIONS = {
+    'BR_Player_GameLogs_RegularSeason': 'Year',
+    'BR_Player_StatsSummary_RegularSeason_Total': 'Season',
+    'BR_Player_StatsSummary_RegularSeason_PerGame': 'Season',
+    'BR_Player_Summary_RegularSeason': 'Year',
+}
+
+
+def tablePath(name):
+    """
+    Location of a table's Parquet dataset
+    """
+    return os.path.join(DATA_DIR, name + '.parquet')
+
+"""----------------------------------------------------------------"""
+def csvPath(name):
+    """
+    Location of a table's CSV file
+    """
+    return os.path.join(DATA_DIR, name + '.csv')
+
+"""----------------------------------------------------------------"""
+def csvReadArgs(name, columns=None, filters=None):
+    """
+    read_csv arguments for a table: columns to read (plus those used
+    by filters), date columns to parse and text columns kept as text
+    """
+    schema = SCHEMAS.get(name, {})
+    usecols = None
+    if columns is not None:
+        usecols = list(columns) + [f[0] for f in (filters or []) if f[0] not in columns]
+    keep = lambda col: col != '*' and (usecols is None or col in usecols)
+    dateCols = [col for col, dtype in schema.items() if dtype == 'datetime64[ns]' and keep(col)]
+    textCols = dict((col, object) for col, dtype in schema.items() if dtype == 'object' and keep(col))
+    return {'usecols':usecols, 'parse_dates':dateCols or False, 'dtype':textCols or None}
+
+"""----------------------------------------------------------------"""
+def tableColumns(name):
+    """
+    Column names of a stored table, without reading any rows
+    """
+    if pq is not None and os.path.exists(tablePath(name)):
+        dataset = pq.ParquetDataset(tablePath(name))
+        columns = dataset.schema.names
+        partitionBy = PARTITIONS.get(name)
+        if partitionBy is not None and partitionBy not in columns:
+            columns = columns + [partitionBy]
+        return columns
+    if os.path.exists(csvPath(name)):
+        return pd.read_csv(csvPath(name), nrows=0).columns.tolist()
+    raise IOError('No stored table: ' + name)
+
+"""----------------------------------------------------------------"""
+def applySchema(df, name):
+    """
+    Cast the columns of a dataframe to the types in the table's schema
+    """
+    schema = SCHEMAS.get(name, {})
+    default = schema.get('*')
+    for col in df.columns:
+        dtype = schema.get(col, default)
+        if dtype is None or str(df[col].dtype) == dtype:
+            continue
+        if dtype == 'datetime64[ns]':
+            df[col] = pd.to_datetime(df[col])
+        elif dtype == 'bool' and df[col].dtype == object:
+            # Text flags ('True'/'False') from CSV
+            df[col] = (df[col].astype(str).str.lower() == 'true').values
+        elif dtype == 'object':
+            df[col] = df[col].astype(object)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+"""----------------------------------------------------------------"""
+def toArrow(df):
+    """
+    Arrow table for writing; categories are stored as plain text (the
+    files dictionary-encode them anyway) so pieces written separately
+    do not need matching category lists
+    """
+    df = df.copy()
+    for col in df.columns:
+        if str(df[col].dtype) == 'category':
+            df[col] = df[col].astype(object)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+"""----------------------------------------------------------------"""
+def defaultTypes(df):
+    """
+    Copy of a dataframe with the types pandas would give it when read
+    from CSV (text as objects, 64-bit numbers)
+    """
+    df = df.copy()
+    for col in df.columns:
+        dtype = df[col].dtype
+        if str(dtype) == 'category':
+            df[col] = df[col].astype(object)
+        elif dtype.kind == 'i':
+            df[col] = df[col].astype('int64')
+        elif dtype.kind == 'f':
+            df[col] = df[col].astype('float64')
+    return df
+
+"""----------------------------------------------------------------"""
+def memoryUsage(df, name):
+    """
+    Bytes used by a dataframe with default types and with the table's
+    schema applied; returns (default, schema)
+    """
+    default = defaultTypes(df).memory_usage(index=True, deep=True).sum()
+    compact = applySchema(df.copy(), name).memory_usage(index=True, deep=True).sum()
+    return default, compact
+
+"""----------------------------------------------------------------"""
+def printMemory(name, default, compact):
+    """
+    Print memory use before and after applying a table's schema
+    """
+    print (name + ': ' + str(round(default/1e6, 1)) + ' MB -> ' + str(round(compact/1e6, 1)) +
+           ' MB (' + str(int(round(100.0*compact/max(default, 1)))) + '%)')
+
+"""----------------------------------------------------------------"""
+def filterRows(df, filters):
+    """
+    Keep rows matching all filters, given as (column, op, value) with
+    op one of '=', '!=', '<', '<=', '>', '>=', 'in'
+    """
+    if not filters:
+        return df
+    for col, op, value in filters:
+        if op == '=':
+            df = df[df[col] == value]
+        elif op == '!=':
+            df = df[df[col] != value]
+        elif op == '<':
+            df = df[df[col] < value]
+        elif op == '<=':
+            df = df[df[col] <= value]
+        elif op == '>':
+            df = df[df[col] > value]
+        elif op == '>=':
+            df = df[df[col] >= value]
+        elif op == 'in':
+            df = df[df[col].isin(list(value))]
+        else:
+            raise ValueError('Unknown filter operator: ' + op)
+    return df
+
+"""----------------------------------------------------------------"""
+def tableExists(name):
+    """
+    Check whether a table has been stored (as Parquet or CSV)
+    """
+    return (pq is not None and os.path.exists(tablePath(name))) or os.path.exists(csvPath(name))
+
+"""----------------------------------------------------------------"""
+def tableFiles(name):
+    """
+    Files holding a table: the Parquet dataset's files if there is one,
+    otherwise the CSV file (empty list if the table is not stored)
+    """
+    path = tablePath(name)
+    if pq is not None and os.path.isdir(path):
+        return sorted(os.path.join(root, f) for root, dirs, files in os.walk(path)
+                      for f in files if f.endswith('.parquet'))
+    if pq is not None and os.path.exists(path):
+        return [path]
+    if os.path.exists(csvPath(name)):
+        return [csvPath(name)]
+    return []
+
+"""----------------------------------------------------------------"""
+def tableHash(name):
+    """
+    Hash of a table's stored contents (None if it is not stored). File
+    names inside a dataset are random, so only the partition folder
+    and contents of each file count
+    """
+    files = tableFiles(name)
+    if not files:
+        return None
+    digests = []
+    for path in files:
+        sha = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        folder = os.path.basename(os.path.dirname(path))
+        digests.append(folder + ':' + sha.hexdigest())
+    return hashlib.sha1('\n'.join(sorted(digests))).hexdigest()
+
+"""----------------------------------------------------------------"""
+def removeTable(name):
+    """
+    Delete a table's Parquet dataset and CSV copy (if they exist)
+    """
+    path = tablePath(name)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+    if os.path.exists(csvPath(name)):
+        os.remove(csvPath(name))
+
+"""----------------------------------------------------------------"""
+def writeTable(df, name, csv=False):
+    """
+    Write a dataframe as a table (replacing any previous version);
+    with csv=True a CSV copy is exported as well. Without pyarrow the
+    table is only written as CSV
+    """
+    df = applySchema(df.reset_index(drop=True), name)
+    if pq is None:
+        exportCSV(df, name)
+        return
+    removeTable(name)
+    table = toArrow(df)
+    partitionBy = PARTITIONS.get(name)
+    if partitionBy is not None:
+        pq.write_to_dataset(table, tablePath(name), partition_cols=[partitionBy])
+    else:
+        pq.write_table(table, tablePath(name))
+    if csv:
+        exportCSV(df, name)
+
+"""----------------------------------------------------------------"""
+def readTable(name, columns=None, filters=None):
+    """
+    Read a table; columns (optional) limits the columns read and
+    filters (optional, see filterRows) the rows. On partitioned tables
+    filters on the partition column skip the other seasons' files.
+    Falls back to the table's CSV file if there is no Parquet version
+    """
+    schema = SCHEMAS.get(name, {})
+    if pq is not None and os.path.exists(tablePath(name)):
+        readColumns = columns
+        if columns is not None and filters:
+            # Filter columns need to be read too
+            readColumns = list(columns) + [f[0] for f in filters if f[0] not in columns]
+        dataset = pq.ParquetDataset(tablePath(name), filters=filters or None)
+        df = dataset.read(columns=readColumns).to_pandas()
+        # Partition values come back as categories
+        partitionBy = PARTITIONS.get(name)
+        if partitionBy in df.columns:
+            df[partitionBy] = df[partitionBy].astype(str).astype(schema.get(partitionBy, 'object'))
+    elif os.path.exists(csvPath(name)):
+        df = pd.read_csv(csvPath(name), **csvReadArgs(name, columns, filters))
+    else:
+        raise IOError('No stored table: ' + name)
+    df = filterRows(applySchema(df, name), filters)
+    if columns is not None:
+        df = df[list(columns)]
+    return df.reset_index(drop=True)
+
+"""----------------------------------------------------------------"""
+def exportCSV(df, name):
+    """
+    Write a table to CSV (dates as YYYY-MM-DD)
+    """
+    df.to_csv(csvPath(name), index=False, date_format='%Y-%m-%d', encoding='utf-8')
+
+"""----------------------------------------------------------------"""
+def tableToCSV(name):
+    """
+    Export a stored table to CSV
+    """
+    exportCSV(readTable(name), name)
+
+"""----------------------------------------------------------------"""
+def iterTable(name, columns=None, filters=None, chunksize=100000):
+    """
+    Read a table in pieces so only one is in memory at a time: chunks
+    of chunksize rows from CSV, or one Parquet row group (at most one
+    season on partitioned tables) at a time. Filters are applied to
+    each piece as it is read
+    """
+    schema = SCHEMAS.get(name, {})
+    if pq is not None and os.path.exists(tablePath(name)):
+        partitionBy = PARTITIONS.get(name)
+        readColumns = None
+        if columns is not None:
+            readColumns = [col for col in list(columns) + [f[0] for f in (filters or [])]
+                           if col != partitionBy]
+        for path in tableFiles(name):
+            parquetFile = pq.ParquetFile(path)
+            for i in range(parquetFile.num_row_groups):
+                df = parquetFile.read_row_group(i, columns=readColumns).to_pandas()
+                # Partition value from the directory name (e.g. Year=2013)
+                folder = os.path.basename(os.path.dirname(path))
+                if partitionBy is not None and folder.startswith(partitionBy + '='):
+                    df[partitionBy] = folder.split('=', 1)[1]
+                    df[partitionBy] = df[partitionBy].astype(schema.get(partitionBy, 'object'))
+                df = filterRows(applySchema(df, name), filters)
+                if columns is not None:
+                    df = df[list(columns)]
+                if len(df) > 0:
+                    yield df.reset_index(drop=True)
+    elif os.path.exists(csvPath(name)):
+        reader = pd.read_csv(csvPath(name), chunksize=chunksize, **csvReadArgs(name, columns, filters))
+        for df in reader:
+            df = filterRows(applySchema(df, name), filters)
+            if columns is not None:
+                df = df[list(columns)]
+            if len(df) > 0:
+                yield df.reset_index(drop=True)
+    else:
+        raise IOError('No stored table: ' + name)
+
+"""----------------------------------------------------------------"""
+def appendTable(df, name):
+    """
+    Add rows to a table (created if needed) without reading it back;
+    each call adds new files to the table's Parquet dataset (or rows
+    to its CSV file without pyarrow)
+    """
+    if df is None or len(df) == 0:
+        return
+    df = applySchema(df.reset_index(drop=True), name)
+    if pq is None:
+        appendCSV(df, csvPath(name))
+        return
+    table = toArrow(df)
+    partitionBy = PARTITIONS.get(name)
+    if partitionBy is not None:
+        pq.write_to_dataset(table, tablePath(name), partition_cols=[partitionBy])
+    else:
+        pq.write_to_dataset(table, tablePath(name))